@@ -4,6 +4,7 @@ config();
 
 import { createClient } from '@supabase/supabase-js';
 import OpenAI from 'openai';
+import { datasetVersion } from '../src/services/search.js';
 
 // Initialize clients
 const supabase = createClient(
@@ -266,6 +267,8 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
 
     if (path === '/api/v1/discover' && req.method === 'POST') {
       const result = await handleDiscover(req.body);
+      // Lets clients drop cached results when the catalog is reloaded.
+      res.setHeader('X-Dataset-Version', datasetVersion());
       return res.status(200).json(result);
     }
 
@@ -0,0 +1,134 @@
+"""Benchmark discover response size on the wire and client decode time.
+
+Builds limit=20 ``POST /api/v1/discover`` responses from the bundled
+snapshot (the same recommendations local mode returns), then for each
+field projection and content encoding reports the encoded size and the
+time to decompress and parse it with ``json`` and, if installed, ``orjson``::
+
+    python benchmarks/bench_discover_payload.py
+    python benchmarks/bench_discover_payload.py --json
+
+Encoder settings match the API (gzip level 6, brotli quality 5). Brotli
+rows need the ``brotli`` package.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_discovery_tool import _FORMAT_FIELDS  # noqa: E402
+from mcp_local_search import get_local_engine  # noqa: E402
+
+QUERIES = [
+    "postgres database",
+    "send emails",
+    "file system operations",
+    "weather data",
+    "github pull requests",
+    "slack notifications",
+]
+
+
+def _encoders() -> dict:
+    encoders = {
+        "identity": (lambda b: b, lambda b: b),
+        "gzip": (lambda b: gzip.compress(b, 6), gzip.decompress),
+    }
+    try:
+        import brotli
+
+        encoders["br"] = (
+            lambda b: brotli.compress(b, quality=5, mode=brotli.MODE_TEXT),
+            brotli.decompress,
+        )
+    except ImportError:
+        pass
+    return encoders
+
+
+def _parsers() -> dict:
+    parsers = {"json": json.loads}
+    try:
+        import orjson
+
+        parsers["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    return parsers
+
+
+def _project(response: dict, fields) -> dict:
+    """Python mirror of the API's ``fields`` projection."""
+    if fields is None:
+        return response
+    keep = {"server", *fields}
+    return {
+        **response,
+        "recommendations": [
+            {k: v for k, v in rec.items() if k in keep} for rec in response["recommendations"]
+        ],
+    }
+
+
+def run(limit: int, repeat: int) -> dict:
+    engine = get_local_engine()
+    responses = []
+    for query in QUERIES:
+        recommendations = engine.discover(query, limit)
+        responses.append({
+            "recommendations": recommendations,
+            "total_found": len(recommendations),
+            "query_time_ms": 3,
+        })
+
+    projections = {
+        "all fields": None,
+        "full format": _FORMAT_FIELDS["full"],
+        "compact format": _FORMAT_FIELDS["compact"],
+    }
+    rows = []
+    for projection, fields in projections.items():
+        bodies = [json.dumps(_project(r, fields)).encode() for r in responses]
+        for encoding, (encode, decode) in _encoders().items():
+            wire = [encode(b) for b in bodies]
+            row = {
+                "fields": projection,
+                "encoding": encoding,
+                "avg_bytes": sum(map(len, wire)) / len(wire),
+                "decode_us": {},
+            }
+            for parser_name, parse in _parsers().items():
+                seconds = timeit.timeit(lambda: [parse(decode(w)) for w in wire], number=repeat)
+                row["decode_us"][parser_name] = seconds / (repeat * len(wire)) * 1e6
+            rows.append(row)
+    return {"limit": limit, "queries": len(QUERIES), "results": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    report = run(args.limit, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    parser_names = list(report["results"][0]["decode_us"])
+    print(f"limit={report['limit']}  queries={report['queries']}  (decode = decompress + parse)")
+    print(f"{'fields':<15} {'encoding':<9} {'bytes':>8}" + "".join(f" {p + ' µs':>11}" for p in parser_names))
+    for row in report["results"]:
+        print(
+            f"{row['fields']:<15} {row['encoding']:<9} {row['avg_bytes']:>8.0f}"
+            + "".join(f" {row['decode_us'][p]:>11.1f}" for p in parser_names)
+        )
+
+
+if __name__ == "__main__":
+    main()
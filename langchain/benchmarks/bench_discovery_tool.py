@@ -0,0 +1,192 @@
+"""Offline load benchmark for MCPDiscoveryTool against a local stub API.
+
+Starts :class:`StubDiscoverAPI` with the given latency, jitter and error
+rate, then drives ``run`` (one thread per concurrent caller), ``arun``
+(one task per caller) and ``batch_discover`` at each concurrency level,
+recording throughput and p50/p95/p99 latency. It also times
+``_format_results`` for 1–20 results in each output format. Every
+query is distinct and the client cache is off, so each call is a request::
+
+    python benchmarks/bench_discovery_tool.py
+    python benchmarks/bench_discovery_tool.py --concurrency 1,8,64,512 \\
+        --latency-ms 20 --jitter-ms 10 --error-rate 0.01 --output results.json
+
+Results go to ``--output`` as JSON, with a summary table on stdout.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mcp_discovery_tool import MCPDiscoveryTool, _format_results  # noqa: E402
+from stub_api import StubDiscoverAPI, StubDiscoverProcess, _recommendation  # noqa: E402
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else None
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": cuts[49] * 1000, "p95_ms": cuts[94] * 1000, "p99_ms": cuts[98] * 1000}
+
+
+def _queries(prefix: str, count: int) -> list[str]:
+    return [f"{prefix} capability {i}" for i in range(count)]
+
+
+def _make_tool(api: StubDiscoverAPI, args: argparse.Namespace, concurrency: int) -> MCPDiscoveryTool:
+    return MCPDiscoveryTool(
+        api_url=api.url,
+        cache_maxsize=0,
+        canonicalize_queries=False,
+        pool_maxsize=min(concurrency, args.pool_maxsize),
+        batch_concurrency=concurrency,
+        max_retries=args.max_retries,
+        hedge_requests=not args.no_hedge,
+        adaptive_timeout=not args.no_adaptive_timeout,
+        circuit_failure_threshold=0,
+    )
+
+
+def bench_run(tool: MCPDiscoveryTool, queries: list[str], concurrency: int) -> tuple[list[float], float]:
+    def timed(query: str) -> float:
+        start = time.perf_counter()
+        tool._run(query)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, queries))
+    return latencies, time.perf_counter() - start
+
+
+def bench_arun(tool: MCPDiscoveryTool, queries: list[str], concurrency: int) -> tuple[list[float], float]:
+    async def scenario() -> tuple[list[float], float]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(query: str) -> float:
+            async with semaphore:
+                start = time.perf_counter()
+                await tool._arun(query)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(timed(q) for q in queries))
+        elapsed = time.perf_counter() - start
+        await tool.aclose()
+        return list(latencies), elapsed
+
+    return asyncio.run(scenario())
+
+
+def bench_batch(tool: MCPDiscoveryTool, queries: list[str], concurrency: int) -> tuple[list[float], float]:
+    start = time.perf_counter()
+    tool.batch_discover(queries, max_concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    # Per-query latencies are not visible to the caller; use the tool's own histogram.
+    return [], elapsed
+
+
+def bench_format(repeat: int) -> list[dict]:
+    rows = []
+    for count in (1, 5, 10, 20):
+        servers = [_recommendation("postgres database", rank) for rank in range(count)]
+        for style in ("full", "compact", "table"):
+            seconds = timeit.timeit(lambda: _format_results("postgres database", servers, style), number=repeat)
+            rows.append({"results": count, "style": style, "us_per_call": seconds / repeat * 1e6})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4,16,64,256,512",
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--modes", default="run,arun,batch")
+    parser.add_argument("--requests", type=int, default=0,
+                        help="requests per point (default: max(200, 4 x concurrency))")
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-retries", type=int, default=0)
+    parser.add_argument("--no-hedge", action="store_true", help="disable hedged requests")
+    parser.add_argument("--no-adaptive-timeout", action="store_true",
+                        help="use the fixed timeout instead of 3x observed p99")
+    parser.add_argument("--in-process", action="store_true",
+                        help="serve the stub from a thread of this process (shares the GIL)")
+    parser.add_argument("--pool-maxsize", type=int, default=100)
+    parser.add_argument("--format-repeat", type=int, default=2000)
+    parser.add_argument("--output", default="bench_discovery_tool.json")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    runners = {"run": bench_run, "arun": bench_arun, "batch": bench_batch}
+    modes = [m for m in args.modes.split(",") if m in runners]
+
+    results = []
+    stub = StubDiscoverAPI if args.in_process else StubDiscoverProcess
+    with stub(args.latency_ms, args.jitter_ms, args.error_rate) as api:
+        for mode in modes:
+            for concurrency in levels:
+                count = args.requests or max(200, 4 * concurrency)
+                tool = _make_tool(api, args, concurrency)
+                latencies, elapsed = runners[mode](tool, _queries(f"{mode}-{concurrency}", count), concurrency)
+                tool.close()
+                stats = tool.get_stats()
+                if latencies:
+                    percentiles = _percentiles(latencies)
+                else:
+                    call = stats["call_seconds"]
+                    percentiles = {f"{q}_ms": call[q] * 1000 for q in ("p50", "p95", "p99")}
+                row = {
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "requests": count,
+                    "errors": stats["errors"],
+                    "throughput_rps": count / elapsed,
+                    **percentiles,
+                }
+                results.append(row)
+                print(
+                    f"{mode:<6} c={concurrency:<4} {row['throughput_rps']:9.0f} req/s  "
+                    f"p50 {row['p50_ms']:8.1f}  p95 {row['p95_ms']:8.1f}  p99 {row['p99_ms']:8.1f} ms  "
+                    f"errors {row['errors']}",
+                    flush=True,
+                )
+
+    format_rows = bench_format(args.format_repeat)
+    for row in format_rows:
+        print(f"_format_results {row['style']:<7} n={row['results']:<3} {row['us_per_call']:8.1f} µs")
+
+    report = {
+        "config": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "max_retries": args.max_retries,
+            "pool_maxsize": args.pool_maxsize,
+            "hedge_requests": not args.no_hedge,
+            "adaptive_timeout": not args.no_adaptive_timeout,
+            "stub": "thread" if args.in_process else "process",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+        "format_results": format_rows,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
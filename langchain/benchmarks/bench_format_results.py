@@ -0,0 +1,97 @@
+"""Benchmark the text formats of ``_format_results``.
+
+Renders real recommendations from the bundled snapshot (queried with the
+embedded engine, so no API is needed) in every format, with and without a
+budget, and reports output size, estimated tokens and render time::
+
+    python benchmarks/bench_format_results.py
+    python benchmarks/bench_format_results.py --limit 20 --budget 1500 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_discovery_tool import _CHARS_PER_TOKEN, _format_results  # noqa: E402
+from mcp_local_search import get_local_engine  # noqa: E402
+
+QUERIES = [
+    "postgres database",
+    "send emails",
+    "file system operations",
+    "weather data",
+    "github pull requests",
+    "slack notifications",
+]
+
+
+def _count_tokens():
+    """Exact token counts when tiktoken is installed, else the 4 chars/token estimate."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except Exception:
+        return lambda text: -(-len(text) // _CHARS_PER_TOKEN), f"estimate ({_CHARS_PER_TOKEN} chars/token)"
+
+
+def run(limit: int, budget: int, repeat: int) -> dict:
+    engine = get_local_engine()
+    results = {q: engine.discover(q, limit) for q in QUERIES}
+    count_tokens, tokenizer = _count_tokens()
+
+    variants = [("full", None), ("compact", None), ("table", None),
+                ("full", budget), ("compact", budget), ("table", budget)]
+    rows = []
+    for style, max_chars in variants:
+        texts = [_format_results(q, servers, style, max_chars) for q, servers in results.items()]
+        seconds = timeit.timeit(
+            lambda: [_format_results(q, s, style, max_chars) for q, s in results.items()],
+            number=repeat,
+        )
+        rows.append({
+            "style": style,
+            "budget_chars": max_chars,
+            "avg_chars": sum(map(len, texts)) / len(texts),
+            "avg_tokens": sum(map(count_tokens, texts)) / len(texts),
+            "avg_servers_shown": sum(_shown(t, style) for t in texts) / len(texts),
+            "render_us": seconds / (repeat * len(texts)) * 1e6,
+        })
+    return {"limit": limit, "queries": len(QUERIES), "tokenizer": tokenizer, "results": rows}
+
+
+def _shown(text: str, style: str) -> int:
+    """Servers rendered in ``text`` (numbered rows)."""
+    prefix = ". " if style != "table" else " | "
+    return sum(1 for line in text.splitlines() if line.split(prefix, 1)[0].strip().isdigit())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=2000, help="character budget for the budgeted runs")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    report = run(args.limit, args.budget, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"limit={report['limit']}  queries={report['queries']}  tokens: {report['tokenizer']}")
+    print(f"{'style':<8} {'budget':>7} {'chars':>8} {'tokens':>8} {'servers':>8} {'render µs':>10}")
+    for row in report["results"]:
+        budget = row["budget_chars"] or "-"
+        print(
+            f"{row['style']:<8} {budget:>7} {row['avg_chars']:>8.0f} {row['avg_tokens']:>8.0f} "
+            f"{row['avg_servers_shown']:>8.1f} {row['render_us']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
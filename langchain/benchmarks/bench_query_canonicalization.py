@@ -0,0 +1,108 @@
+"""Replay a query log and compare cache hit rates with and without canonical keys.
+
+Each query is looked up in an LRU cache keyed either on the plain
+normalized text (lowercase, collapsed whitespace) or on
+:func:`canonical_query`; a miss inserts the key. With no ``--log`` a
+synthetic agent log is generated: a Zipf-distributed mix of capability
+needs, each phrased several ways the way agents actually word them::
+
+    python benchmarks/bench_query_canonicalization.py
+    python benchmarks/bench_query_canonicalization.py --log queries.txt --cache-size 256
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_discovery_tool import _cache_key, canonical_query  # noqa: E402
+
+INTENTS = [
+    ["postgres database", "PostgreSQL database", "query a postgres db", "pg database",
+     "I need a Postgres database", "database postgres", "postgres databases"],
+    ["send emails", "send email", "email sending", "send mail", "Send emails via Gmail",
+     "email send", "sending emails"],
+    ["file system operations", "filesystem operations", "file system operation",
+     "operations on the file system", "files system operations"],
+    ["web scraping", "scrape the web", "scrape web pages", "web scraper", "scraping web"],
+    ["slack messages", "send slack message", "Slack messaging", "message slack", "slack message"],
+    ["github pull requests", "GitHub PRs", "gh pull requests", "pull requests github",
+     "github pull request"],
+    ["weather data", "Weather data", "weather forecast data", "data weather"],
+    ["kubernetes cluster management", "k8s cluster management", "manage kubernetes clusters",
+     "kubernetes clusters management"],
+    ["browser automation", "automate the browser", "browser automations", "automating browsers"],
+    ["vector search", "vector database search", "search vectors", "vector searching"],
+    ["calendar events", "google calendar events", "calendar event", "events calendar"],
+    ["payments with stripe", "stripe payments", "stripe payment", "payment stripe"],
+]
+
+
+def synthetic_log(size: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(INTENTS))]
+    log = []
+    for _ in range(size):
+        phrasings = rng.choices(INTENTS, weights)[0]
+        log.append(rng.choice(phrasings))
+    return log
+
+
+def replay(log: list[str], key_fn, cache_size: int) -> dict:
+    cache: OrderedDict = OrderedDict()
+    hits = 0
+    for query in log:
+        key = key_fn(query)
+        if key in cache:
+            hits += 1
+            cache.move_to_end(key)
+        else:
+            cache[key] = True
+            if len(cache) > cache_size:
+                cache.popitem(last=False)
+    return {
+        "hits": hits,
+        "misses": len(log) - hits,
+        "hit_rate": hits / len(log),
+        "distinct_keys": len({key_fn(q) for q in log}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="file with one query per line (default: synthetic log)")
+    parser.add_argument("--size", type=int, default=1000, help="synthetic log length")
+    parser.add_argument("--cache-size", type=int, default=256)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, encoding="utf-8") as f:
+            log = [line.strip() for line in f if line.strip()]
+    else:
+        log = synthetic_log(args.size)
+
+    report = {
+        "queries": len(log),
+        "cache_size": args.cache_size,
+        "normalized_text": replay(log, lambda q: _cache_key(q, 5), args.cache_size),
+        "canonical": replay(log, lambda q: (canonical_query(q), 5), args.cache_size),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"queries={report['queries']}  cache_size={report['cache_size']}")
+    for name in ("normalized_text", "canonical"):
+        row = report[name]
+        print(
+            f"{name:<16} hit rate {row['hit_rate']:6.1%}   API calls {row['misses']:>6}"
+            f"   distinct keys {row['distinct_keys']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Time semantic search over 5k, 100k and 1M records.
+
+The bundled snapshot (~5k records) is embedded for real, and the build
+time is reported. Larger corpora are made by tiling the real embeddings
+with Gaussian noise (renormalized), so every row is distinct but the
+score distribution stays realistic. Queries are embedded with the fitted
+embedder and answered by ``SemanticSearchEngine.top_k``: one float32
+matrix-vector product plus ``argpartition``. A full ``argsort`` of the
+scores is timed alongside for comparison::
+
+    python benchmarks/bench_semantic_search.py
+    python benchmarks/bench_semantic_search.py --sizes 5000,100000,1000000 --output semantic.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_local_search import load_local_dataset  # noqa: E402
+from mcp_semantic_search import SemanticSearchEngine  # noqa: E402
+
+QUERIES = [
+    "persist data", "send emails", "browser automation", "search the web",
+    "kubernetes cluster management", "store vectors for rag", "read pdf files",
+    "postgres database", "slack messages", "github pull requests", "weather forecast",
+    "payments with stripe", "calendar events", "file system operations",
+    "translate text", "monitor server logs",
+]
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summary(samples: list[float]) -> dict:
+    return {
+        "p50_ms": _percentile(samples, 0.50) * 1000,
+        "p95_ms": _percentile(samples, 0.95) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def scaled_vectors(base: np.ndarray, size: int, noise: float, seed: int) -> np.ndarray:
+    """``size`` unit rows: ``base`` tiled, each copy after the first perturbed."""
+    rng = np.random.default_rng(seed)
+    out = np.empty((size, base.shape[1]), dtype=np.float32)
+    for start in range(0, size, len(base)):
+        block = out[start:start + len(base)]
+        block[:] = base[: len(block)]
+        if start:
+            block += rng.standard_normal(block.shape, dtype=np.float32) * noise
+    out /= np.linalg.norm(out, axis=1, keepdims=True)
+    return out
+
+
+def bench_size(engine: SemanticSearchEngine, vectors: np.ndarray, k: int, repeat: int) -> dict:
+    records = [engine.records[i % len(engine.records)] for i in range(len(vectors))]
+    scaled = SemanticSearchEngine(records, embedder=engine.embedder, vectors=vectors)
+    embed, top_k, argsort = [], [], []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            q = scaled.embed(query)
+            embed.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scaled.top_k(q, k)
+            top_k.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            np.argsort(-(scaled.vectors @ q))[:k]
+            argsort.append(time.perf_counter() - start)
+    return {
+        "records": len(vectors),
+        "matrix_mb": vectors.nbytes / 2**20,
+        "embed_query": _summary(embed),
+        "top_k": _summary(top_k),
+        "full_argsort": _summary(argsort),
+        "queries_per_second": len(top_k) / (sum(embed) + sum(top_k)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="5000,100000,1000000",
+                        help="comma-separated corpus sizes")
+    parser.add_argument("--k", type=int, default=10, help="results per query")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the query set")
+    parser.add_argument("--noise", type=float, default=0.05,
+                        help="std-dev of the noise added to synthetic rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    records = load_local_dataset()
+    start = time.perf_counter()
+    engine = SemanticSearchEngine(records)
+    build_seconds = time.perf_counter() - start
+    print(f"embedded {len(records)} records into {engine.vectors.shape[1]} dims "
+          f"in {build_seconds:.2f}s")
+
+    results = {"build": {"records": len(records), "seconds": build_seconds,
+                         "dims": engine.vectors.shape[1]}, "sizes": []}
+    print(f"{'records':>10} {'matrix MB':>10} {'embed p50':>10} {'top-k p50':>10} "
+          f"{'top-k p95':>10} {'argsort p50':>12} {'q/s':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        vectors = scaled_vectors(engine.vectors, size, args.noise, args.seed)
+        row = bench_size(engine, vectors, args.k, args.repeat)
+        del vectors
+        results["sizes"].append(row)
+        print(f"{row['records']:>10} {row['matrix_mb']:>10.1f} "
+              f"{row['embed_query']['p50_ms']:>8.2f}ms {row['top_k']['p50_ms']:>8.2f}ms "
+              f"{row['top_k']['p95_ms']:>8.2f}ms {row['full_argsort']['p50_ms']:>10.2f}ms "
+              f"{row['queries_per_second']:>8.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""A local stand-in for the MCP Discovery API, for offline benchmarks.
+
+Serves ``POST /api/v1/discover`` (plus ``/health``) from an aiohttp app on
+a background thread. Latency, jitter and the error rate are configurable
+so client behavior can be measured without a database or network::
+
+    with StubDiscoverAPI(latency_ms=20, jitter_ms=5, error_rate=0.01) as api:
+        tool = MCPDiscoveryTool(api_url=api.url)
+
+Run it as a script to serve from a separate process, so the server does
+not compete with the client for the GIL::
+
+    python benchmarks/stub_api.py --latency-ms 20 --port 8765
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import threading
+from typing import Optional
+
+from aiohttp import web
+
+
+def _recommendation(query: str, rank: int) -> dict:
+    slug = f"{'-'.join(query.lower().split()) or 'server'}-{rank}"
+    return {
+        "server": slug,
+        "npm_package": f"@example/{slug}",
+        "install_command": f"npx -y @example/{slug}",
+        "confidence": round(0.95 - rank * 0.03, 2),
+        "description": (
+            f"An MCP server for {query} that exposes tools to list, search, read "
+            "and update resources, with pagination, retries and structured errors."
+        ),
+        "category": ("database", "communication", "development")[rank % 3],
+        "capabilities": ["read", "write", "search"],
+        "metrics": {"avg_latency_ms": 80 + rank * 7, "uptime_pct": 99.2, "last_checked": None},
+        "docs_url": f"https://example.com/{slug}",
+        "github_url": f"https://github.com/example/{slug}",
+        "is_verified": rank % 3 == 0,
+        "trust_score": 90 - rank * 2,
+    }
+
+
+class StubDiscoverAPI:
+    """Threaded aiohttp server answering discover requests with synthetic results.
+
+    Args:
+        latency_ms: Mean server-side delay per request.
+        jitter_ms: Uniform +/- jitter around ``latency_ms``.
+        error_rate: Fraction of requests answered with HTTP 503.
+        seed: Seed for jitter and error sampling.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = 0,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.url = ""
+        self._rng = random.Random(seed)
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="stub-discover-api", daemon=True)
+
+    async def _delay(self) -> None:
+        delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    async def _discover(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        await self._delay()
+        if self._rng.random() < self.error_rate:
+            return web.json_response({"error": "stub failure"}, status=503)
+        query, limit = body.get("need", ""), int(body.get("limit", 5))
+        recommendations = [_recommendation(query, rank) for rank in range(limit)]
+        fields = body.get("fields")
+        if fields:
+            keep = {"server", *fields}
+            recommendations = [{k: v for k, v in r.items() if k in keep} for r in recommendations]
+        return web.json_response({
+            "recommendations": recommendations,
+            "total_found": len(recommendations),
+            "query_time_ms": 1,
+        })
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/v1/discover", self._discover)
+        app.router.add_get("/health", self._health)
+        return app
+
+    def _serve(self, port: int = 0) -> None:
+        async def start() -> None:
+            self._runner = web.AppRunner(self._app(), access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", port, backlog=1024)
+            await site.start()
+            self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(start())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "StubDiscoverAPI":
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError("stub API did not start")
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop.close()
+
+    def __enter__(self) -> "StubDiscoverAPI":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class StubDiscoverProcess:
+    """:class:`StubDiscoverAPI` in a child process; same constructor and context manager."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0) -> None:
+        self._args = [
+            "--latency-ms", str(latency_ms),
+            "--jitter-ms", str(jitter_ms),
+            "--error-rate", str(error_rate),
+        ]
+        self.url = ""
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self) -> "StubDiscoverProcess":
+        self._process = subprocess.Popen(
+            [sys.executable, __file__, *self._args], stdout=subprocess.PIPE, text=True
+        )
+        line = self._process.stdout.readline().strip()
+        if not line.startswith("http://"):
+            self._process.kill()
+            raise RuntimeError(f"stub API did not start: {line!r}")
+        self.url = line
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(10)
+
+    def __enter__(self) -> "StubDiscoverProcess":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a stub MCP Discovery API.")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    api = StubDiscoverAPI(args.latency_ms, args.jitter_ms, args.error_rate)
+    threading.Thread(target=lambda: (api._ready.wait(), print(api.url, flush=True)), daemon=True).start()
+    try:
+        api._serve(args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
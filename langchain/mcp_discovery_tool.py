@@ -4,13 +4,60 @@ This tool enables LangChain agents to dynamically discover MCP (Model Context Pr
 servers based on natural language queries about their needs.
 """
 
-from typing import Optional, Type, Any
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+from contextvars import ContextVar, copy_context
+from typing import TYPE_CHECKING, Callable, Literal, Optional, Sequence, Type, Union, Any
 import asyncio
+import importlib
+import json
+import random
+import re
+import sys
+import threading
+import time
 
-import aiohttp
-import requests
+from langchain_core.callbacks import adispatch_custom_event, dispatch_custom_event
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError
+
+from mcp_local_search import tokenize
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+    from mcp_disk_cache import SQLiteResultCache
+    from mcp_rate_limit import TokenBucketLimiter
+
+
+class _LazyModule:
+    """Placeholder for a module that is imported on first attribute access.
+
+    The HTTP clients cost more to import than the rest of this module, and
+    most processes only use one of them (or neither, in embedded mode). On
+    first use the placeholder imports the module and replaces itself in this
+    module's globals, so later lookups cost nothing extra.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self._name)
+        globals()[self._name] = module
+        return getattr(module, attr)
+
+
+aiohttp = _LazyModule("aiohttp")  # noqa: F811
+requests = _LazyModule("requests")  # noqa: F811
+
+try:  # optional: several times faster decoding of large responses
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 
 class MCPDiscoveryInput(BaseModel):
@@ -36,60 +83,1078 @@ class MCPDiscoveryInput(BaseModel):
             "than a cached response."
         ),
     )
+    category: Optional[str] = Field(
+        default=None,
+        description="Only return servers in this category, e.g. 'database' or 'communication'.",
+    )
+    verified_only: bool = Field(
+        default=False,
+        description="Only return servers verified by the MCP Discovery team.",
+    )
+    min_trust_score: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=100,
+        description="Only return servers with at least this trust score (0–100).",
+    )
+
+
+class ServerMetrics(BaseModel):
+    """Latest probe metrics for a recommended server (null in local mode)."""
+
+    model_config = ConfigDict(frozen=True)
+
+    avg_latency_ms: Optional[float] = None
+    uptime_pct: Optional[float] = None
+    last_checked: Optional[str] = None
+
+
+class ServerRecommendation(BaseModel):
+    """One entry of ``recommendations`` from ``POST /api/v1/discover``.
+
+    Returned as the tool's artifact when ``response_format`` is
+    ``"content_and_artifact"``. Instances are immutable and shared between
+    calls that hit the same cached result.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    server: str
+    npm_package: Optional[str] = None
+    install_command: Optional[str] = None
+    confidence: float = 0.0
+    description: Optional[str] = None
+    category: Optional[str] = None
+    capabilities: tuple[str, ...] = ()
+    metrics: ServerMetrics = ServerMetrics()
+    docs_url: Optional[str] = None
+    github_url: Optional[str] = None
+    is_verified: bool = False
+    trust_score: Optional[int] = None
+
+
+_ToolOutput = Union[str, tuple[str, list[ServerRecommendation]]]
+
+
+def _validate_recommendation(server: dict) -> Optional[ServerRecommendation]:
+    """``server`` as a typed model, or None if the record is malformed."""
+    try:
+        return ServerRecommendation.model_validate(server)
+    except ValidationError:
+        return None
+
+
+class _Results(list):
+    """Raw recommendation dicts that validate into typed models once, on demand."""
+
+    __slots__ = ("_models", "_typed", "_source")
+
+    def _validated(self) -> tuple[Optional[ServerRecommendation], ...]:
+        """One model per record, None where the record failed validation."""
+        try:
+            return self._models
+        except AttributeError:
+            pass
+        try:
+            parent, indices = self._source
+            self._models = tuple(parent._validated()[i] for i in indices)
+        except AttributeError:
+            self._models = tuple(_validate_recommendation(s) for s in self)
+        return self._models
+
+    def typed(self) -> tuple[ServerRecommendation, ...]:
+        """The records as models; malformed records (e.g. no ``server``) are skipped."""
+        try:
+            return self._typed
+        except AttributeError:
+            self._typed = tuple(m for m in self._validated() if m is not None)
+        return self._typed
+
+    def subset(self, indices: Sequence[int]) -> "_Results":
+        """The servers at ``indices``, sharing this list's validated models."""
+        subset = _Results(self[i] for i in indices)
+        subset._source = (self, tuple(indices))
+        return subset
+
+
+class _ResultFilter:
+    """Client-side filters applied to a cached result window."""
+
+    __slots__ = ("category", "verified_only", "min_trust_score")
+
+    def __init__(
+        self,
+        category: Optional[str] = None,
+        verified_only: bool = False,
+        min_trust_score: Optional[int] = None,
+    ) -> None:
+        self.category = category.strip().lower() if category else None
+        self.verified_only = verified_only
+        self.min_trust_score = min_trust_score
+
+    def __bool__(self) -> bool:
+        return bool(self.category or self.verified_only or self.min_trust_score is not None)
+
+    def matches(self, server: dict) -> bool:
+        if self.category and (server.get("category") or "").lower() != self.category:
+            return False
+        if self.verified_only and not server.get("is_verified"):
+            return False
+        if self.min_trust_score is not None and (server.get("trust_score") or 0) < self.min_trust_score:
+            return False
+        return True
+
+    def select(self, servers: list[dict], limit: int) -> list[dict]:
+        """The first ``limit`` matching servers, in their ranked order."""
+        if not self and len(servers) <= limit:
+            return servers
+        indices = [i for i, server in enumerate(servers) if self.matches(server)][:limit]
+        if isinstance(servers, _Results):
+            return servers.subset(indices)
+        return [servers[i] for i in indices]
+
+
+_NO_FILTER = _ResultFilter()
+
+
+def _full_block(idx: int, server: dict) -> str:
+    """Every field of one server, several lines (the default format)."""
+    lines: list[str] = []
+    name = server.get("name") or server.get("server") or "Unknown"
+    verified = server.get("is_verified", False)
+    trust_score = server.get("trust_score")
+    verified_badge = " ✓ Verified" if verified else ""
+
+    lines.append(f"\n{idx}. {name}{verified_badge}")
+
+    if server.get("description"):
+        lines.append(f"   Description: {server['description']}")
+
+    if trust_score is not None:
+        lines.append(f"   Trust Score:  {trust_score}/100")
+
+    install_cmd = server.get("install_command") or server.get("installCommand")
+    if install_cmd:
+        lines.append(f"   Install:      {install_cmd}")
+
+    if "confidence" in server:
+        lines.append(f"   Confidence:   {server['confidence']:.1%}")
+
+    if server.get("category"):
+        lines.append(f"   Category:     {server['category']}")
 
+    metrics = server.get("metrics", {})
+    if metrics.get("uptime_pct") is not None:
+        lines.append(f"   Uptime:       {metrics['uptime_pct']:.1f}%")
+    if metrics.get("avg_latency_ms") is not None:
+        lines.append(f"   Avg Latency:  {metrics['avg_latency_ms']}ms")
 
-def _format_results(query: str, servers: list[dict]) -> str:
-    """Format discovery results into a human-readable string."""
+    repo = server.get("github_url") or server.get("repository")
+    if repo:
+        lines.append(f"   Repo:         {repo}")
+
+    return "\n".join(lines)
+
+
+_ELLIPSIS = "…"
+_CHARS_PER_TOKEN = 4  # rough average for English text with typical BPE tokenizers
+
+
+def _truncate(text: Optional[str], width: int) -> str:
+    """Shorten ``text`` to ``width`` characters at a sentence or word boundary."""
+    text = " ".join((text or "").split())
+    if len(text) <= width:
+        return text
+    if width <= len(_ELLIPSIS):
+        return ""
+    cut = text[: width - len(_ELLIPSIS)]
+    sentence = cut.rfind(". ")
+    if sentence >= width // 2:
+        return cut[: sentence + 1]
+    space = cut.rfind(" ")
+    if space >= width // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,;:-") + _ELLIPSIS
+
+
+def _summary(server: dict) -> dict[str, Optional[str]]:
+    """Decision-relevant fields for the dense formats, most important first."""
+    metrics = server.get("metrics") or {}
+    trust_score = server.get("trust_score")
+    latency = metrics.get("avg_latency_ms")
+    return {
+        "name": (server.get("name") or server.get("server") or "Unknown")
+        + (" ✓" if server.get("is_verified") else ""),
+        "match": f"{server['confidence']:.0%}" if "confidence" in server else None,
+        "trust": f"{trust_score}" if trust_score is not None else None,
+        "latency": f"{latency}ms" if latency is not None else None,
+        "install": server.get("install_command") or server.get("installCommand"),
+    }
+
+
+def _description(server: dict, width: Optional[int]) -> str:
+    if width is None:
+        return " ".join((server.get("description") or "").split())
+    return _truncate(server.get("description"), width)
+
+
+def _compact_row(idx: int, server: dict, width: Optional[int]) -> str:
+    fields = _summary(server)
+    parts = [fields["name"]]
+    if fields["match"]:
+        parts.append(f"{fields['match']} match")
+    if fields["trust"]:
+        parts.append(f"trust {fields['trust']}")
+    if fields["latency"]:
+        parts.append(fields["latency"])
+    if fields["install"]:
+        parts.append(fields["install"])
+    row = f"{idx}. " + " | ".join(parts)
+    description = _description(server, width)
+    return f"{row}\n   {description}" if description else row
+
+
+def _table_row(idx: int, server: dict, width: Optional[int]) -> str:
+    cells = [str(idx)] + [value or "-" for value in _summary(server).values()]
+    description = _description(server, width)
+    return " | ".join(cells + ([description] if description else []))
+
+
+_ROW_RENDERERS = {"compact": _compact_row, "table": _table_row}
+_TABLE_HEADER = "# | server | match | trust | latency | install | description"
+
+# Descriptions shorter than this after truncation are dropped rather than shown.
+_MIN_DESCRIPTION = 40
+
+
+def _more_note(dropped: int) -> str:
+    return f"(+{dropped} more not shown)"
+
+
+def _format_packed(query: str, servers: list[dict], style: str, max_chars: Optional[int]) -> str:
+    """Dense rendering that packs the most useful fields into ``max_chars``.
+
+    Summary fields come first, best-ranked servers first; the budget left
+    over is shared out among the descriptions. To make room for readable
+    descriptions, up to half of the servers that would fit bare are left out.
+    """
+    render = _ROW_RENDERERS[style]
+    header = f"Found {len(servers)} MCP server(s) for: '{query}'"
+    if style == "table":
+        header += "\n" + _TABLE_HEADER
+    if max_chars is None:
+        return "\n".join([header] + [render(i, s, None) for i, s in enumerate(servers, 1)])
+
+    bare = [render(i, s, 0) for i, s in enumerate(servers, 1)]
+    # sizes[k]: header, the first k bare rows and the "+N more" note if k < all
+    sizes = [len(header)]
+    for row in bare:
+        sizes.append(sizes[-1] + 1 + len(row))
+    for k in range(len(bare)):
+        sizes[k] += 1 + len(_more_note(len(bare) - k))
+    fits = max((k for k, size in enumerate(sizes) if size <= max_chars), default=0)
+
+    kept, width = max(fits, 1), 0
+    for k in range(fits, (fits - 1) // 2, -1):
+        described = sum(1 for server in servers[:k] if server.get("description"))
+        if described:
+            candidate = (max_chars - sizes[k]) // described - 4  # "\n   " or " | "
+            if candidate >= _MIN_DESCRIPTION:
+                kept, width = k, candidate
+                break
+    rows = [render(i, s, width) for i, s in enumerate(servers[:kept], 1)]
+    dropped = len(servers) - kept
+    return "\n".join([header] + rows + ([_more_note(dropped)] if dropped else []))
+
+
+def _format_results(
+    query: str,
+    servers: list[dict],
+    style: Literal["full", "compact", "table"] = "full",
+    max_chars: Optional[int] = None,
+) -> str:
+    """Format discovery results into a human-readable string.
+
+    ``style`` picks the layout: ``"full"`` prints every field, ``"compact"``
+    two short lines per server and ``"table"`` one line per server. With
+    ``max_chars``, the lowest-ranked servers are left out (and in the dense
+    styles, descriptions shortened) until the text fits.
+    """
     if not servers:
         return f"No MCP servers found matching: '{query}'. Try a different search."
+    if style != "full":
+        return _format_packed(query, servers, style, max_chars)
+    header = f"Found {len(servers)} MCP server(s) for: '{query}'\n"
+    blocks = [_full_block(i, s) for i, s in enumerate(servers, 1)]
+    kept, size = len(blocks), len(header) + sum(1 + len(b) for b in blocks)
+    while max_chars is not None and kept > 1:
+        dropped = len(blocks) - kept
+        if size + (1 + len(_more_note(dropped)) if dropped else 0) <= max_chars:
+            break
+        kept -= 1
+        size -= 1 + len(blocks[kept])
+    dropped = len(blocks) - kept
+    return "\n".join([header] + blocks[:kept] + ([_more_note(dropped)] if dropped else []))
+
+
+# Recommendation fields each text format reads; "server" is always returned.
+_FORMAT_FIELDS = {
+    "full": ("install_command", "confidence", "description", "category", "metrics",
+             "github_url", "is_verified", "trust_score"),
+    "compact": ("install_command", "confidence", "description", "category", "metrics",
+                "is_verified", "trust_score"),
+}
+_FORMAT_FIELDS["table"] = _FORMAT_FIELDS["compact"]
+
+
+# The standardized categories of ``map_category`` in scripts/scrape_all_mcp_servers.py.
+DEFAULT_WARMUP_QUERIES: tuple[str, ...] = (
+    "database", "search", "automation", "ai", "cloud", "blockchain",
+    "communication", "productivity", "development", "security", "monitoring",
+    "scraping", "research", "finance", "social", "media", "content",
+    "translation", "fitness", "design", "3d",
+)
+
+
+def _embedded_discover(query: str, limit: int) -> list[dict]:
+    """Answer a discover query from the in-process snapshot index."""
+    from mcp_local_search import get_local_engine
+
+    return get_local_engine().discover(query, limit)
+
+
+def _semantic_discover(query: str, limit: int) -> list[dict]:
+    """Answer a discover query by embedding similarity over the snapshot."""
+    from mcp_semantic_search import get_semantic_engine
+
+    return get_semantic_engine().discover(query, limit)
+
+
+_LOCAL_BACKENDS: dict[str, Callable[[str, int], list[dict]]] = {
+    "embedded": _embedded_discover,
+    "semantic": _semantic_discover,
+}
+
+
+def _build_local_index(mode: str) -> None:
+    """Build (or reuse) the process-wide index behind a local mode."""
+    if mode == "embedded":
+        from mcp_local_search import get_local_engine
+
+        get_local_engine()
+    elif mode == "semantic":
+        from mcp_semantic_search import get_semantic_engine
+
+        get_semantic_engine()
+
+
+DEFAULT_QUERY_SYNONYMS: dict[str, str] = {
+    "pg": "postgres",
+    "postgresql": "postgres",
+    "psql": "postgres",
+    "mail": "email",
+    "gmail": "email",
+    "db": "database",
+    "k8s": "kubernetes",
+    "gh": "github",
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "llm": "ai",
+    "filesystem": "file",
+    "fs": "file",
+}
+
+
+def _stem(token: str) -> str:
+    """Light suffix stripping so inflections share a key.
+
+    Not a full Porter stemmer, only consistent: "emails"/"email",
+    "scraping"/"scrape"/"scraped" and "databases"/"database" each map to
+    the same stem.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        token = token[:-3] + "y"
+    elif token.endswith("sses"):
+        token = token[:-2]
+    elif token.endswith(("xes", "zes", "ches", "shes")):
+        token = token[:-2]
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[: -len(suffix)]
+            if len(token) > 3 and token[-1] == token[-2] and token[-1] not in "lsz":
+                token = token[:-1]  # "shipped" -> "ship"
+            break
+    if token.endswith("e") and len(token) > 4:
+        token = token[:-1]
+    return token
+
+
+# Stems of words that say how the user wants to reach a capability, not
+# which one: "query a PostgreSQL database", "postgres db access" and
+# "PostgreSQL database" all ask for the same servers.
+_GENERIC_STEMS = frozenset(_stem(w) for w in (
+    "able", "access", "connect", "help", "interact", "let", "query", "talk",
+    "use", "using", "work",
+))
+
+
+def canonical_query(query: str, synonyms: Optional[dict[str, str]] = None) -> str:
+    """Reduce a query to a canonical form for caching and coalescing.
+
+    Lowercases, tokenizes and drops stopwords like local search does, maps
+    ``synonyms`` (default :data:`DEFAULT_QUERY_SYNONYMS`), stems, drops
+    generic request words like "access" and "query", and sorts the distinct
+    tokens, so "Send emails via Gmail" and "email send" share a key. Queries
+    made only of stopwords fall back to their normalized text.
+    """
+    synonyms = DEFAULT_QUERY_SYNONYMS if synonyms is None else synonyms
+    tokens = set()
+    for token in tokenize(query):
+        for word in synonyms.get(token, token).split():
+            tokens.add(_stem(word))
+    tokens -= _GENERIC_STEMS
+    return " ".join(sorted(tokens)) or " ".join(query.lower().split())
 
-    lines: list[str] = [f"Found {len(servers)} MCP server(s) for: '{query}'
-"]
 
-    for idx, server in enumerate(servers, 1):
-        name = server.get("name") or server.get("server") or "Unknown"
-        verified = server.get("is_verified", False)
-        trust_score = server.get("trust_score")
-        verified_badge = " ✓ Verified" if verified else ""
+# Verbs that start a new action in a compound need, as stems: "read from
+# postgres and post results to slack" is two needs, "postgres and mysql" one.
+# Words that are mostly nouns in queries ("email", "test", "chart") are left out.
+_ACTION_VERBS = frozenset(_stem(v) for v in (
+    "analyze", "archive", "automate", "backup", "browse", "build", "check",
+    "classify", "collect", "compare", "compress", "convert", "crawl", "create",
+    "deploy", "detect", "download", "edit", "embed", "encrypt", "execute",
+    "export", "extract", "fetch", "find", "generate", "get", "import", "ingest",
+    "manage", "monitor", "notify", "parse", "pay", "post", "publish", "query",
+    "read", "record", "render", "run", "save", "schedule", "scrape", "search",
+    "send", "share", "store", "stream", "summarize", "sync", "track",
+    "transcribe", "transform", "translate", "update", "upload", "visualize",
+    "watch", "write",
+))
+# Always end an intent: sequencing words and semicolons.
+_STRONG_BREAK = re.compile(r"\s*;\s*|\s+(?:and\s+then|then|after\s+that|afterwards|also)\s+", re.I)
+# End an intent only if what follows reads as a separate need.
+_WEAK_BREAK = re.compile(r"\s*,\s*(?:and\s+)?|\s+(?:and|&|plus|as\s+well\s+as)\s+", re.I)
+_LEADING_JOINER = re.compile(r"^(?:(?:and|then|also|plus)\s+)+", re.I)
 
-        lines.append(f"
-{idx}. {name}{verified_badge}")
 
-        if server.get("description"):
-            lines.append(f"   Description: {server['description']}")
+def _starts_action(text: str) -> bool:
+    words = text.lower().split()
+    return bool(words) and _stem(words[0]) in _ACTION_VERBS
 
-        if trust_score is not None:
-            lines.append(f"   Trust Score:  {trust_score}/100")
 
-        install_cmd = server.get("install_command") or server.get("installCommand")
-        if install_cmd:
-            lines.append(f"   Install:      {install_cmd}")
+def decompose_query(query: str, max_intents: int = 4) -> list[str]:
+    """Split a compound need into sub-intents with cheap rules.
+
+    Sequencing words ("then", "also") and semicolons always split. Commas,
+    "and", "&" and "plus" split only when the next part starts with an
+    action verb ("... and post results to slack") or both sides have at
+    least two content words; otherwise they join a list of objects
+    ("postgres, mysql and sqlite") that stays one intent. Parts without
+    content words are dropped, and anything past ``max_intents`` is folded
+    into the last intent. A query with one intent is returned unchanged.
+    """
+    intents: list[str] = []
+    for clause in _STRONG_BREAK.split(query):
+        parts = [p for p in _WEAK_BREAK.split(_LEADING_JOINER.sub("", clause.strip())) if p.strip()]
+        merged: list[str] = []
+        for part in parts:
+            if merged and not (
+                _starts_action(part)
+                or (len(tokenize(merged[-1])) >= 2 and len(tokenize(part)) >= 2)
+            ):
+                merged[-1] = f"{merged[-1]} and {part.strip()}"
+            else:
+                merged.append(part.strip())
+        intents.extend(p for p in merged if tokenize(p))
+    if len(intents) <= 1:
+        return [query]
+    if len(intents) > max_intents:
+        intents[max_intents - 1:] = [" and ".join(intents[max_intents - 1:])]
+    return intents
+
+
+def _server_id(server: dict) -> str:
+    return server.get("server") or server.get("name") or json.dumps(server, sort_keys=True)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[dict]], k: int = 60) -> list[dict]:
+    """Merge ranked result lists: each server scores ``sum(1 / (k + rank))``.
+
+    Servers found by several lists rise above those found by one. Returns
+    the distinct servers, best first, as the first copy seen of each.
+    """
+    scores: dict[str, float] = {}
+    first: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, server in enumerate(ranking, 1):
+            key = _server_id(server)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            first.setdefault(key, server)
+    return [first[key] for key in sorted(scores, key=lambda key: -scores[key])]
+
+
+def _cache_key(query: str, limit: int) -> tuple[str, int]:
+    """Normalize a query into a cache key (case- and whitespace-insensitive)."""
+    return " ".join(query.lower().split()), limit
+
+
+class _ResultCache:
+    """Thread-safe, bounded LRU cache of discovery results with a TTL.
+
+    Expired entries are kept until evicted so they can still be served stale
+    while a background refresh runs. ``maxsize=0`` disables caching.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dataset_version: Optional[str] = None
+
+    def get(self, key: tuple) -> Optional[tuple[list[dict], bool]]:
+        """Return ``(servers, is_fresh)`` for ``key``, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            stored_at, servers = entry
+            return servers, time.monotonic() - stored_at < self.ttl
+
+    def set(self, key: tuple, servers: list[dict]) -> None:
+        """Store ``servers`` under ``key``, evicting the least recently used entry."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), servers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set_dataset_version(self, version: str) -> None:
+        """Drop every entry when the API reports a different dataset version."""
+        with self._lock:
+            if version != self._dataset_version:
+                self._dataset_version = version
+                self._entries.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        """Nothing to release; present for parity with the persistent cache."""
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class _Histogram:
+    """Cumulative fixed-bucket histogram, exportable in Prometheus format."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile by linear interpolation within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20)
+
+
+class _CallMetrics:
+    """Measurements for a single tool call, filled in as the call proceeds.
+
+    DNS and connect times come from aiohttp tracing and are only available
+    on the async path when a new connection is opened.
+    """
+
+    __slots__ = (
+        "dns", "connect", "ttfb", "total", "response_bytes",
+        "results", "cache", "retries", "error",
+    )
+
+    def __init__(self) -> None:
+        self.dns: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.total: Optional[float] = None
+        self.response_bytes: Optional[int] = None
+        self.results: Optional[int] = None
+        self.cache = "miss"
+        self.retries = 0
+        self.error = False
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def fork(self) -> "_CallMetrics":
+        """Fresh metrics for one sub-intent of this call."""
+        part = _CallMetrics()
+        part.cache = self.cache  # "bypass" for force_refresh
+        return part
+
+    def merge(self, parts: Sequence["_CallMetrics"], results: int) -> None:
+        """Fold sub-intent metrics into this call's.
+
+        The cache result is the one every part shares, else ``"partial"``.
+        ``results`` is the length of the fused list. Retries and response
+        bytes add up; DNS, connect and TTFB take the slowest part, as the
+        parts ran concurrently.
+        """
+        caches = {part.cache for part in parts}
+        self.cache = caches.pop() if len(caches) == 1 else "partial"
+        self.results = results
+        self.retries = sum(part.retries for part in parts)
+        self.error = any(part.error for part in parts)
+        sizes = [part.response_bytes for part in parts if part.response_bytes is not None]
+        self.response_bytes = sum(sizes) if sizes else None
+        for name in ("dns", "connect", "ttfb"):
+            values = [getattr(part, name) for part in parts if getattr(part, name) is not None]
+            setattr(self, name, max(values) if values else None)
+
+
+METRICS_EVENT = "mcp_discovery_metrics"
+"""Name of the custom callback event carrying each call's :class:`_CallMetrics`."""
+
+_current_call: ContextVar[Optional[_CallMetrics]] = ContextVar("mcp_discovery_call", default=None)
+
+
+class _DiscoveryStats:
+    """Thread-safe per-tool aggregates of :class:`_CallMetrics`."""
+
+    _HISTOGRAMS = {
+        "dns_seconds": ("dns", _LATENCY_BUCKETS, "DNS resolution time for new connections."),
+        "connect_seconds": ("connect", _LATENCY_BUCKETS, "TCP/TLS connect time for new connections."),
+        "ttfb_seconds": ("ttfb", _LATENCY_BUCKETS, "Time from sending the request to response headers."),
+        "call_seconds": ("total", _LATENCY_BUCKETS, "End-to-end tool call latency, cache hits included."),
+        "response_bytes": ("response_bytes", _BYTES_BUCKETS, "Discover response body size."),
+        "results": ("results", _COUNT_BUCKETS, "Servers returned per call."),
+        "retries": ("retries", _COUNT_BUCKETS, "Retries per call."),
+    }
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms = {name: _Histogram(b) for name, (_, b, _) in self._HISTOGRAMS.items()}
+        self._counters = {
+            "calls": 0, "errors": 0, "cache_hit": 0, "cache_stale": 0, "cache_miss": 0,
+            "cache_partial": 0, "cache_bypass": 0,
+        }
+
+    def record(self, call: _CallMetrics) -> None:
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["errors"] += call.error
+            self._counters[f"cache_{call.cache}"] += 1
+            for name, (attr, _, _) in self._HISTOGRAMS.items():
+                value = getattr(call, attr)
+                if value is not None:
+                    self._histograms[name].observe(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: h.summary() for name, h in self._histograms.items()}
+        lookups = (
+            counters["cache_hit"] + counters["cache_stale"] + counters["cache_miss"]
+            + counters["cache_partial"]
+        )
+        return {
+            "calls": counters["calls"],
+            "errors": counters["errors"],
+            "cache": {
+                "hits": counters["cache_hit"],
+                "stale_hits": counters["cache_stale"],
+                "misses": counters["cache_miss"],
+                "partial": counters["cache_partial"],
+                "bypassed": counters["cache_bypass"],
+                "hit_rate": (counters["cache_hit"] + counters["cache_stale"]) / lookups if lookups else None,
+            },
+            **histograms,
+        }
+
+    def prometheus(self, prefix: str) -> str:
+        lines: list[str] = []
+        with self._lock:
+            lines += [
+                f"# HELP {prefix}_calls_total Discovery tool calls.",
+                f"# TYPE {prefix}_calls_total counter",
+                f"{prefix}_calls_total {self._counters['calls']}",
+                f"# HELP {prefix}_errors_total Discovery tool calls that returned an error.",
+                f"# TYPE {prefix}_errors_total counter",
+                f"{prefix}_errors_total {self._counters['errors']}",
+                f"# HELP {prefix}_cache_lookups_total Client cache lookups by result.",
+                f"# TYPE {prefix}_cache_lookups_total counter",
+            ]
+            for result in ("hit", "stale", "miss", "partial", "bypass"):
+                lines.append(f'{prefix}_cache_lookups_total{{result="{result}"}} {self._counters["cache_" + result]}')
+            for name, (_, _, help_text) in self._HISTOGRAMS.items():
+                h = self._histograms[name]
+                metric = f"{prefix}_{name}"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+                lines += [
+                    f'{metric}_bucket{{le="+Inf"}} {h.count}',
+                    f"{metric}_sum {h.sum}",
+                    f"{metric}_count {h.count}",
+                ]
+        return "\n".join(lines) + "\n"
+
+
+def _trace_config() -> "aiohttp.TraceConfig":
+    """aiohttp hooks that time DNS, connect and TTFB into the current call's metrics."""
+
+    def started(attr: str):
+        async def handler(session, ctx, params) -> None:
+            setattr(ctx, attr, asyncio.get_running_loop().time())
+        return handler
+
+    def ended(attr: str, metric: str):
+        async def handler(session, ctx, params) -> None:
+            call = ctx.trace_request_ctx
+            start = getattr(ctx, attr, None)
+            if isinstance(call, _CallMetrics) and start is not None:
+                elapsed = asyncio.get_running_loop().time() - start
+                if metric == "connect" and call.dns is not None:
+                    elapsed = max(0.0, elapsed - call.dns)  # connection setup includes DNS
+                setattr(call, metric, elapsed)
+        return handler
+
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(started("dns_start"))
+    config.on_dns_resolvehost_end.append(ended("dns_start", "dns"))
+    config.on_connection_create_start.append(started("connect_start"))
+    config.on_connection_create_end.append(ended("connect_start", "connect"))
+    config.on_request_start.append(started("request_start"))
+    config.on_request_end.append(ended("request_start", "ttfb"))
+    return config
 
-        if "confidence" in server:
-            lines.append(f"   Confidence:   {server['confidence']:.1%}")
 
-        if server.get("category"):
-            lines.append(f"   Category:     {server['category']}")
+class _LoopThread:
+    """An asyncio event loop running forever in a daemon thread."""
 
-        metrics = server.get("metrics", {})
-        if metrics.get("uptime_pct") is not None:
-            lines.append(f"   Uptime:       {metrics['uptime_pct']:.1f}%")
-        if metrics.get("avg_latency_ms") is not None:
-            lines.append(f"   Avg Latency:  {metrics['avg_latency_ms']}ms")
+    def __init__(self, name: str) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
 
-        repo = server.get("github_url") or server.get("repository")
-        if repo:
-            lines.append(f"   Repo:         {repo}")
+    @property
+    def is_current(self) -> bool:
+        """True when called from the loop's own thread."""
+        return threading.current_thread() is self._thread
 
-    return "
-".join(lines)
+    def submit(self, coro: Any) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+class _CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+_DISCOVER_PATH = "/api/v1/discover"
+
+_STALE_NOTE = "\n\n(MCP Discovery API unavailable; showing the last cached result.)"
+
+
+def _raised_by(error: BaseException, module: str, *names: str) -> bool:
+    """``isinstance(error, module.<name>)`` for any of ``names``, without importing ``module``.
+
+    An error can only come from a library that has already been imported.
+    """
+    loaded = sys.modules.get(module)
+    if loaded is None:
+        return False
+    types = []
+    for name in names:
+        value: Any = loaded
+        for part in name.split("."):
+            value = getattr(value, part)
+        types.append(value)
+    return isinstance(error, tuple(types))
+
+
+def _error_message(error: BaseException) -> str:
+    """Map a failed discovery call to the message returned to the agent."""
+    if isinstance(error, asyncio.TimeoutError) or _raised_by(error, "requests", "exceptions.Timeout"):
+        return "MCP Discovery API request timed out. Please try again."
+    if _raised_by(error, "mcp_rate_limit", "RateLimitTimeout"):
+        return (
+            "MCP Discovery rate limit reached for this API key; the next request "
+            f"slot opens in about {error.retry_after:.0f}s. Please try again later."
+        )
+    if isinstance(error, _CircuitOpenError):
+        return (
+            "MCP Discovery API is temporarily unavailable after repeated errors. "
+            "Please try again shortly."
+        )
+    if _raised_by(error, "requests", "exceptions.RequestException") or _raised_by(
+        error, "aiohttp", "ClientError"
+    ):
+        return f"Error connecting to MCP Discovery API: {str(error)}"
+    return f"Unexpected error during MCP discovery: {str(error)}"
+
+
+def _retry_status(error: BaseException) -> Optional[tuple[int, Optional[str]]]:
+    """Return ``(status, Retry-After)`` for an HTTP error response, else None."""
+    if _raised_by(error, "requests", "exceptions.HTTPError") and error.response is not None:
+        return error.response.status_code, error.response.headers.get("Retry-After")
+    if _raised_by(error, "aiohttp", "ClientResponseError"):
+        return error.status, (error.headers or {}).get("Retry-After")
+    return None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx are worth another attempt."""
+    status = _retry_status(error)
+    if status is not None:
+        return status[0] == 429 or status[0] >= 500
+    return (
+        isinstance(error, asyncio.TimeoutError)
+        or _raised_by(error, "requests", "exceptions.Timeout", "exceptions.ConnectionError")
+        or _raised_by(error, "aiohttp", "ClientConnectionError")
+    )
+
+
+def _retry_after_seconds(value: Optional[str]) -> float:
+    """Parse a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _LatencyTracker:
+    """Rolling window of recent successful request latencies, in seconds."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The ``q`` quantile (0–1) of the window, or None until it has enough samples."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _CircuitBreaker:
+    """Fail fast after repeated errors, probing again after a cool-down.
+
+    Closed: calls flow. After ``threshold`` consecutive failures it opens and
+    rejects calls for ``reset_timeout`` seconds, then lets one trial call
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.threshold and (self._opened_at is not None or self._failures >= self.threshold):
+                self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+
+class _Endpoint:
+    """Health of one API replica, as exponentially weighted moving averages."""
+
+    __slots__ = ("url", "latency", "error_rate", "inflight", "failures", "ejections", "ejected_until")
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.inflight = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def score(self) -> float:
+        """Expected cost of sending one more request here; lower is better."""
+        if self.latency is None:
+            return 0.0  # not measured yet: try it
+        return self.latency * (self.inflight + 1) / max(0.05, 1.0 - self.error_rate)
+
+
+class _EndpointBalancer:
+    """Spread requests over API replicas with power-of-two-choices.
+
+    Each pick samples two healthy endpoints at random and takes the one with
+    the lower :meth:`_Endpoint.score` (EWMA latency scaled by in-flight
+    requests and error rate). An endpoint whose error-rate EWMA crosses
+    ``eject_error_rate``, or that fails ``eject_failures`` times in a row, is
+    ejected for ``eject_seconds`` (doubling on repeat ejections). When every
+    endpoint is ejected the one due back soonest is used.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        alpha: float = 0.3,
+        eject_error_rate: float = 0.5,
+        eject_failures: int = 3,
+        eject_seconds: float = 10.0,
+    ) -> None:
+        self.endpoints = [_Endpoint(url) for url in urls]
+        self.alpha = alpha
+        self.eject_error_rate = eject_error_rate
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+
+    def pick(self) -> _Endpoint:
+        """Choose an endpoint and count a request in flight on it."""
+        with self._lock:
+            if len(self.endpoints) == 1:
+                endpoint = self.endpoints[0]
+            else:
+                now = time.monotonic()
+                healthy = [e for e in self.endpoints if e.ejected_until <= now]
+                if not healthy:
+                    endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+                elif len(healthy) == 1:
+                    endpoint = healthy[0]
+                else:
+                    first, second = random.sample(healthy, 2)
+                    endpoint = first if first.score() <= second.score() else second
+            endpoint.inflight += 1
+            return endpoint
+
+    def record(self, endpoint: _Endpoint, seconds: float, ok: Optional[bool]) -> None:
+        """Fold one finished request into ``endpoint``'s averages (``ok=None``: abandoned)."""
+        with self._lock:
+            endpoint.inflight -= 1
+            if ok is None:
+                return
+            a = self.alpha
+            endpoint.latency = seconds if endpoint.latency is None else (1 - a) * endpoint.latency + a * seconds
+            endpoint.error_rate = (1 - a) * endpoint.error_rate + a * (0.0 if ok else 1.0)
+            if ok:
+                endpoint.failures = 0
+                endpoint.ejections = 0
+                return
+            endpoint.failures += 1
+            if endpoint.ejected_until > time.monotonic():
+                return  # a straggler from before the ejection
+            if len(self.endpoints) > 1 and (
+                endpoint.failures >= self.eject_failures or endpoint.error_rate >= self.eject_error_rate
+            ):
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds * 2 ** min(endpoint.ejections, 5)
+                endpoint.ejections += 1
+                # Readmitted with a clean slate; one more failure re-ejects it for longer.
+                endpoint.failures = self.eject_failures - 1
+                endpoint.error_rate = 0.0
+
+    def snapshot(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "latency_ewma": e.latency,
+                    "error_rate_ewma": e.error_rate,
+                    "in_flight": e.inflight,
+                    "ejected": e.ejected_until > now,
+                }
+                for e in self.endpoints
+            ]
 
 
 class MCPDiscoveryTool(BaseTool):
     """Tool for discovering MCP servers based on task requirements.
 
     This tool connects to the MCP Discovery API to find relevant MCP servers
-    that match an agent's needs. Each result includes:
+    that match an agent's needs. HTTP connections are pooled and kept alive
+    across calls; use the tool as a (async) context manager or call
+    ``close()``/``aclose()`` to release them. Each result includes:
     - Server name, description, and install command
     - Verification status and trust score (0–100)
     - Performance metrics (latency, uptime)
@@ -116,88 +1181,1240 @@ class MCPDiscoveryTool(BaseTool):
         "Returns server details with installation instructions, trust scores, and performance metrics."
     )
     args_schema: Type[BaseModel] = MCPDiscoveryInput
-    api_url: str = Field(
+    api_url: Union[str, list[str]] = Field(
         default="http://localhost:3000",
-        description="Base URL for the MCP Discovery API",
+        description=(
+            "Base URL for the MCP Discovery API, or a list of replica URLs to "
+            "load-balance across."
+        ),
+    )
+    api_key: Optional[str] = Field(
+        default=None,
+        description="API key sent as X-API-Key; without one the API applies its public tier.",
+    )
+    mode: Literal["api", "embedded", "semantic"] = Field(
+        default="api",
+        description=(
+            "'api' queries the MCP Discovery API over HTTP; 'embedded' searches the "
+            "bundled registry snapshot in-process (no API, no network); 'semantic' "
+            "ranks the snapshot by offline embedding similarity (requires numpy)."
+        ),
     )
+    pool_maxsize: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum keep-alive connections pooled per host (sync and async).",
+    )
+    timeout: float = Field(
+        default=10.0,
+        gt=0,
+        description="Upper bound on a single request's timeout, in seconds.",
+    )
+    adaptive_timeout: bool = Field(
+        default=True,
+        description=(
+            "Once enough calls have been observed, time requests out at 3x the "
+            "observed p99 latency (between min_timeout and timeout)."
+        ),
+    )
+    min_timeout: float = Field(
+        default=1.0,
+        gt=0,
+        description="Lower bound for the adaptive timeout, in seconds.",
+    )
+    hedge_requests: bool = Field(
+        default=True,
+        description=(
+            "Send a second, identical request once observed p95 latency has "
+            "elapsed and use whichever answers first."
+        ),
+    )
+    max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="Retries after a timeout, connection error, 429 or 5xx response.",
+    )
+    retry_backoff: float = Field(
+        default=0.2,
+        ge=0,
+        description="Base delay in seconds for jittered exponential backoff between retries.",
+    )
+    circuit_failure_threshold: int = Field(
+        default=5,
+        ge=0,
+        description="Consecutive failures that open the circuit breaker. 0 disables it.",
+    )
+    circuit_reset_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        description="Seconds the circuit stays open before a trial request is allowed.",
+    )
+
+    cache_ttl: float = Field(
+        default=300.0,
+        ge=0,
+        description="Seconds a cached result is served without asking the API again.",
+    )
+    cache_maxsize: int = Field(
+        default=256,
+        ge=0,
+        description="Maximum cached queries (LRU eviction). 0 disables the client cache.",
+    )
+    cache_path: Optional[str] = Field(
+        default=None,
+        description=(
+            "SQLite file for a persistent cache shared by every process on the host. "
+            "None keeps the cache in memory."
+        ),
+    )
+    cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=0,
+        description="Maximum total size of results kept in the persistent cache.",
+    )
+    output_format: Literal["full", "compact", "table"] = Field(
+        default="full",
+        description=(
+            "'full' prints every field; 'compact' two short lines per server; "
+            "'table' one line per server. The dense formats keep prompts small."
+        ),
+    )
+    max_output_chars: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Character budget for the returned text. Lower-ranked servers and long descriptions are cut to fit.",
+    )
+    max_output_tokens: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Token budget for the returned text, estimated at 4 characters per token.",
+    )
+    compression: bool = Field(
+        default=True,
+        description=(
+            "Opt-out switch. The HTTP clients already accept gzip (and brotli, "
+            "when the brotli package is installed); False sends "
+            "'Accept-Encoding: identity' to ask for uncompressed responses."
+        ),
+    )
+    project_fields: bool = Field(
+        default=True,
+        description=(
+            "Ask the API for only the recommendation fields the output format "
+            "renders. Ignored with response_format='content_and_artifact'."
+        ),
+    )
+    canonicalize_queries: bool = Field(
+        default=True,
+        description=(
+            "Key the cache and in-flight coalescing on the canonical query "
+            "(stopwords removed, synonyms mapped, stemmed, token order ignored)."
+        ),
+    )
+    decompose_queries: bool = Field(
+        default=False,
+        description=(
+            "Split compound needs ('read from postgres and post to slack') into "
+            "sub-intents, search them concurrently and group the results per intent."
+        ),
+    )
+    max_intents: int = Field(
+        default=4,
+        ge=2,
+        description="Most sub-intents a query is split into.",
+    )
+    rrf_k: int = Field(
+        default=60,
+        ge=1,
+        description="Reciprocal-rank fusion constant for merging sub-intent results.",
+    )
+    query_synonyms: dict[str, str] = Field(
+        default_factory=lambda: dict(DEFAULT_QUERY_SYNONYMS),
+        description="Token rewrites applied when canonicalizing queries, e.g. {'pg': 'postgres'}.",
+    )
+    prefetch_limit: int = Field(
+        default=20,
+        ge=0,
+        le=20,
+        description=(
+            "Results fetched on a cache miss, whatever the requested limit, so later "
+            "calls for the same query with a smaller limit or a client-side filter "
+            "(category, verified_only, min_trust_score) are answered from the cache. "
+            "0 fetches exactly the requested limit."
+        ),
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        description=(
+            "In async calls, return an expired cached result immediately and "
+            "refresh it in the background."
+        ),
+    )
+    shared_event_loop: bool = Field(
+        default=False,
+        description=(
+            "Run all requests, sync and async, on one event loop in a background "
+            "thread owned by the tool, so both paths share one aiohttp connection "
+            "pool and one in-flight coalescing table."
+        ),
+    )
+    batch_concurrency: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum concurrent API requests issued by batch_discover/abatch_discover.",
+    )
+    rate_limit_tier: Optional[Literal["free", "pro", "enterprise"]] = Field(
+        default=None,
+        description=(
+            "Keep API requests within this pricing tier's monthly quota with a "
+            "process-wide token bucket that holds the quota and refills over the month "
+            "('enterprise' is unlimited). None disables client-side limiting. Without "
+            "rate_limit_state_file the bucket lives in memory and starts full in every "
+            "process and after every restart, so N workers can spend N times the quota; "
+            "point them at one state file to enforce a single budget."
+        ),
+    )
+    rate_limit_per_second: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Explicit sustained request rate; overrides rate_limit_tier.",
+    )
+    rate_limit_burst: int = Field(
+        default=5,
+        ge=1,
+        description=(
+            "Requests allowed back to back before rate_limit_per_second pacing kicks "
+            "in. Tier budgets use the monthly quota instead."
+        ),
+    )
+    rate_limit_max_wait: float = Field(
+        default=30.0,
+        ge=0,
+        description=(
+            "Seconds a call may queue for a request slot before it falls back to the "
+            "cached answer or a rate-limit message."
+        ),
+    )
+    rate_limit_state_file: Optional[str] = Field(
+        default=None,
+        description=(
+            "Path of a small lock-protected state file that shares the token bucket "
+            "with other processes on this host (POSIX only)."
+        ),
+    )
+    agent_id: Optional[str] = Field(
+        default=None,
+        description=(
+            "Queue identity for fair sharing of the rate limit; tools with the same "
+            "agent_id share one queue. Defaults to one queue per tool instance."
+        ),
+    )
+
+    _session: Optional["requests.Session"] = PrivateAttr(default=None)
+    _async_sessions: dict = PrivateAttr(default_factory=dict)
+    _session_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _cache: Union[_ResultCache, "SQLiteResultCache"] = PrivateAttr()
+    _inflight: dict = PrivateAttr(default_factory=dict)
+    _ainflight: dict = PrivateAttr(default_factory=dict)
+    _inflight_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _refreshing: set = PrivateAttr(default_factory=set)
+    _refresh_tasks: set = PrivateAttr(default_factory=set)
+    _latency: _LatencyTracker = PrivateAttr(default_factory=_LatencyTracker)
+    _breaker: _CircuitBreaker = PrivateAttr()
+    _hedge_pool: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _loop_thread: Optional[_LoopThread] = PrivateAttr(default=None)
+    _stats: _DiscoveryStats = PrivateAttr(default_factory=_DiscoveryStats)
+    _limiter: Optional["TokenBucketLimiter"] = PrivateAttr(default=None)
+    _balancer: _EndpointBalancer = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        urls = [self.api_url] if isinstance(self.api_url, str) else list(self.api_url)
+        if not urls:
+            raise ValueError("api_url must name at least one endpoint")
+        self._balancer = _EndpointBalancer(urls)
+        if self.cache_path is not None:
+            from mcp_disk_cache import SQLiteResultCache
+
+            self._cache = SQLiteResultCache(
+                self.cache_path,
+                self.cache_maxsize,
+                self.cache_ttl,
+                self.cache_max_bytes,
+                scope=self._cache_scope(urls),
+            )
+        else:
+            self._cache = _ResultCache(self.cache_maxsize, self.cache_ttl)
+        self._breaker = _CircuitBreaker(self.circuit_failure_threshold, self.circuit_reset_timeout)
+        rate, burst = self.rate_limit_per_second, self.rate_limit_burst
+        if rate is None and self.rate_limit_tier is not None:
+            from mcp_rate_limit import tier_budget
+
+            rate, burst = tier_budget(self.rate_limit_tier) or (None, burst)
+        if rate is not None and self.mode == "api":
+            from mcp_rate_limit import get_rate_limiter
+
+            self._limiter = get_rate_limiter(
+                (tuple(e.url for e in self._balancer.endpoints), self.api_key),
+                rate,
+                burst,
+                self.rate_limit_state_file,
+            )
+
+    def _headers(self) -> dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if not self.compression:
+            headers["Accept-Encoding"] = "identity"
+        if self.api_key:
+            headers["X-API-Key"] = self.api_key
+        return headers
+
+    def _projection(self) -> Optional[tuple[str, ...]]:
+        """Recommendation fields to request, or None for complete records."""
+        if self.project_fields and self.response_format != "content_and_artifact":
+            return _FORMAT_FIELDS[self.output_format]
+        return None
+
+    def _payload(self, query: str, limit: int, force_refresh: bool) -> dict:
+        """Request body for ``POST /api/v1/discover``."""
+        payload: dict[str, Any] = {"need": query, "limit": limit, "force_refresh": force_refresh}
+        fields = self._projection()
+        if fields is not None:
+            payload["fields"] = list(fields)
+        return payload
+
+    def _cache_scope(self, urls: list[str]) -> str:
+        """Namespace for persistent cache keys: the backend and the requested fields.
+
+        Tools sharing a ``cache_path`` only share entries fetched the same way,
+        so a projected answer never stands in for a complete one.
+        """
+        backend = sorted(urls) if self.mode == "api" else []
+        fields = self._projection() if self.mode == "api" else None
+        return json.dumps([self.mode, backend, fields], separators=(",", ":"))
+
+    def _get_session(self) -> "requests.Session":
+        """Return the pooled ``requests`` session, creating it on first use."""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_maxsize
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(self._headers())
+                self._session = session
+            return self._session
+
+    def _get_async_session(self) -> "aiohttp.ClientSession":
+        """Return the pooled ``aiohttp`` session bound to the running event loop.
+
+        aiohttp sessions cannot be shared across loops, so one session is kept
+        per loop. Entries for loops that have since been closed are dropped.
+        """
+        loop = asyncio.get_running_loop()
+        with self._session_lock:
+            for stale in [l for l in self._async_sessions if l.is_closed()]:
+                del self._async_sessions[stale]
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit_per_host=self.pool_maxsize),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                    headers=self._headers(),
+                    trace_configs=[_trace_config()],
+                )
+                self._async_sessions[loop] = session
+            return session
+
+    def _get_hedge_pool(self) -> ThreadPoolExecutor:
+        """Worker threads that run sync requests so a hedge can race them."""
+        with self._session_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=2 * self.pool_maxsize,
+                    thread_name_prefix="mcp-discovery-hedge",
+                )
+            return self._hedge_pool
+
+    def _get_loop_thread(self) -> _LoopThread:
+        """The tool's own event loop thread (``shared_event_loop``), started on first use."""
+        with self._session_lock:
+            if self._loop_thread is None:
+                self._loop_thread = _LoopThread("mcp-discovery-loop")
+            return self._loop_thread
+
+    def _use_shared_loop(self) -> bool:
+        """Whether to hand this call to the shared loop.
+
+        Not when already running on it: the call just proceeds there, and a
+        sync call blocking the loop thread on itself would deadlock.
+        """
+        if not self.shared_event_loop:
+            return False
+        loop_thread = self._loop_thread
+        return loop_thread is None or not loop_thread.is_current
+
+    def _submit(self, call: Optional[_CallMetrics], coro: Any) -> Future:
+        """Run ``coro`` on the shared loop, recording into the caller's ``call``."""
+
+        async def run() -> Any:
+            _current_call.set(call)
+            return await coro
+
+        return self._get_loop_thread().submit(run())
+
+    async def _close_loop_resources(self) -> None:
+        """On the shared loop: stop background refreshes and close its session."""
+        for task in list(self._refresh_tasks):
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        with self._session_lock:
+            session = self._async_sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def close(self) -> None:
+        """Close the pooled sync session and stop the shared event loop.
+
+        Async sessions are bound to their event loop; close those with
+        :meth:`aclose` from inside the loop that uses them.
+        """
+        with self._session_lock:
+            session, self._session = self._session, None
+            hedge_pool, self._hedge_pool = self._hedge_pool, None
+            loop_thread = self._loop_thread
+            if loop_thread is not None and not loop_thread.is_current:
+                self._loop_thread = None
+            else:
+                loop_thread = None
+        if session is not None:
+            session.close()
+        if hedge_pool is not None:
+            hedge_pool.shutdown(wait=False)
+        if loop_thread is not None:
+            try:
+                loop_thread.submit(self._close_loop_resources()).result(timeout=self.timeout)
+            except Exception:
+                pass  # stopping the loop below releases everything anyway
+            loop_thread.stop()
+        self._cache.close()
+
+    async def aclose(self) -> None:
+        """Close the async session for the running loop, the sync session and the shared loop."""
+        loop = asyncio.get_running_loop()
+        with self._session_lock:
+            session = self._async_sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+        if self._loop_thread is not None:
+            await loop.run_in_executor(None, self.close)
+        else:
+            self.close()
+
+    def __enter__(self) -> "MCPDiscoveryTool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "MCPDiscoveryTool":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def _request_timeout(self) -> float:
+        """Per-attempt timeout: 3x observed p99, clamped to [min_timeout, timeout]."""
+        p99 = self._latency.percentile(0.99) if self.adaptive_timeout else None
+        if p99 is None:
+            return self.timeout
+        return min(self.timeout, max(self.min_timeout, 3 * p99))
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging (observed p95), or None to not hedge.
+
+        Rate-limited tools never hedge: the duplicate request would spend quota.
+        """
+        if not self.hedge_requests or self._limiter is not None:
+            return None
+        return self._latency.percentile(0.95)
+
+    def _agent(self) -> Any:
+        """This tool's queue in the shared rate limiter."""
+        return self.agent_id if self.agent_id is not None else id(self)
+
+    def _refund(self) -> None:
+        """Hand back a rate-limit token for a request that was never sent."""
+        if self._limiter is not None:
+            self._limiter.refund()
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential backoff, stretched to honor ``Retry-After``."""
+        delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+        status = _retry_status(error)
+        if status is not None:
+            delay = max(delay, _retry_after_seconds(status[1]))
+        return min(delay, self.timeout)
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        """Record ``error`` with the circuit breaker and decide whether to retry."""
+        if not _is_retryable(error):
+            self._breaker.record_success()  # the API answered; the request was bad
+            return False
+        self._breaker.record_failure()
+        return attempt < self.max_retries and not self._breaker.is_open
+
+    def _post_json(self, path: str, payload: dict, timeout: float) -> dict:
+        """One POST of ``payload`` to ``path`` on a balanced endpoint over the pooled sync session."""
+        endpoint = self._balancer.pick()
+        start = time.perf_counter()
+        try:
+            response = self._get_session().post(
+                f"{endpoint.url}{path}",
+                json=payload,
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            self._note_dataset_version(response.headers.get("X-Dataset-Version"))
+            body = response.content
+            data = _json_loads(body)
+        except Exception as e:
+            self._balancer.record(endpoint, time.perf_counter() - start, not _is_retryable(e))
+            raise
+        elapsed = time.perf_counter() - start
+        self._balancer.record(endpoint, elapsed, True)
+        if path == _DISCOVER_PATH:  # adaptive timeouts and hedging track discover only
+            self._latency.observe(elapsed)
+        call = _current_call.get()
+        if call is not None:
+            if isinstance(response.elapsed, timedelta):
+                call.ttfb = response.elapsed.total_seconds()
+            call.response_bytes = len(body)
+        return data
+
+    async def _apost_json(self, path: str, payload: dict, timeout: float) -> dict:
+        """Async :meth:`_post_json` over the pooled aiohttp session."""
+        session = self._get_async_session()
+        call = _current_call.get()
+        endpoint = self._balancer.pick()
+        start = time.perf_counter()
+        try:
+            async with session.post(
+                f"{endpoint.url}{path}",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                trace_request_ctx=call,
+            ) as resp:
+                resp.raise_for_status()
+                self._note_dataset_version(resp.headers.get("X-Dataset-Version"))
+                body = await resp.read()
+        except asyncio.CancelledError:
+            self._balancer.record(endpoint, time.perf_counter() - start, None)  # hedge loser
+            raise
+        except Exception as e:
+            self._balancer.record(endpoint, time.perf_counter() - start, not _is_retryable(e))
+            raise
+        elapsed = time.perf_counter() - start
+        self._balancer.record(endpoint, elapsed, True)
+        if path == _DISCOVER_PATH:
+            self._latency.observe(elapsed)
+        if call is not None:
+            call.response_bytes = len(body)
+        return _json_loads(body)
+
+    def _post(self, payload: dict, timeout: float) -> list[dict]:
+        """One POST to ``/api/v1/discover``; returns its recommendations."""
+        return self._post_json(_DISCOVER_PATH, payload, timeout).get("recommendations", [])
+
+    async def _apost(self, payload: dict, timeout: float) -> list[dict]:
+        """Async :meth:`_post`."""
+        return (await self._apost_json(_DISCOVER_PATH, payload, timeout)).get("recommendations", [])
+
+    def _call_api(self, path: str, payload: dict, timeout: float) -> dict:
+        """A single rate-limited, circuit-broken POST to another API route.
+
+        Used for auxiliary calls such as ``/api/v1/metrics``: no retries or
+        hedging, and the rate-limit wait counts against ``timeout``.
+        """
+        if self._limiter is not None:
+            self._limiter.acquire(self._agent(), timeout)
+        if not self._breaker.allow():
+            self._refund()
+            raise _CircuitOpenError("circuit breaker open")
+        try:
+            data = self._post_json(path, payload, timeout)
+        except Exception as e:
+            self._should_retry(self.max_retries, e)
+            raise
+        self._breaker.record_success()
+        return data
+
+    async def _acall_api(self, path: str, payload: dict, timeout: float) -> dict:
+        """Async :meth:`_call_api`."""
+        if self._limiter is not None:
+            await self._limiter.aacquire(self._agent(), timeout)
+        if not self._breaker.allow():
+            self._refund()
+            raise _CircuitOpenError("circuit breaker open")
+        try:
+            data = await self._apost_json(path, payload, timeout)
+        except Exception as e:
+            self._should_retry(self.max_retries, e)
+            raise
+        self._breaker.record_success()
+        return data
+
+    def _note_dataset_version(self, version: Any) -> None:
+        """Invalidate cached results fetched from an older catalog."""
+        if isinstance(version, str) and version:
+            self._cache.set_dataset_version(version)
+
+    def _hedged(self, call: Callable[[], list[dict]]) -> list[dict]:
+        """Run ``call``; if it outlives p95 latency, race a second copy of it."""
+        delay = self._hedge_delay()
+        if delay is None:
+            return call()
+        pool = self._get_hedge_pool()
+        # Run each copy in the caller's context so it can record call metrics.
+        pending = {pool.submit(copy_context().run, call)}
+        if not wait(pending, timeout=delay).done:
+            pending.add(pool.submit(copy_context().run, call))
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _ahedged(self, make_call: Callable[[], Any]) -> list[dict]:
+        """Async :meth:`_hedged`; the losing request is cancelled."""
+        delay = self._hedge_delay()
+        if delay is None:
+            return await make_call()
+        pending = {asyncio.ensure_future(make_call())}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                pending.add(asyncio.ensure_future(make_call()))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _fetch(self, query: str, limit: int, force_refresh: bool) -> list[dict]:
+        """Discover over the sync session with hedging, retries and the circuit breaker."""
+        if self.mode != "api":
+            return _LOCAL_BACKENDS[self.mode](query, limit)
+        payload = self._payload(query, limit, force_refresh)
+        attempt = 0
+        while True:
+            if self._limiter is not None:
+                self._limiter.acquire(self._agent(), self.rate_limit_max_wait)
+            if not self._breaker.allow():
+                self._refund()
+                raise _CircuitOpenError("circuit breaker open")
+            timeout = self._request_timeout()
+            try:
+                servers = self._hedged(lambda: self._post(payload, timeout))
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+                self._count_retry(attempt)
+                continue
+            self._breaker.record_success()
+            return servers
+
+    async def _afetch(self, query: str, limit: int, force_refresh: bool) -> list[dict]:
+        """Async :meth:`_fetch` over the pooled aiohttp session."""
+        if self.mode != "api":
+            return _LOCAL_BACKENDS[self.mode](query, limit)
+        payload = self._payload(query, limit, force_refresh)
+        attempt = 0
+        while True:
+            if self._limiter is not None:
+                await self._limiter.aacquire(self._agent(), self.rate_limit_max_wait)
+            if not self._breaker.allow():
+                self._refund()
+                raise _CircuitOpenError("circuit breaker open")
+            timeout = self._request_timeout()
+            try:
+                servers = await self._ahedged(lambda: self._apost(payload, timeout))
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+                self._count_retry(attempt)
+                continue
+            self._breaker.record_success()
+            return servers
+
+    def _fetch_coalesced(
+        self, key: tuple, query: str, limit: int, force_refresh: bool
+    ) -> list[dict]:
+        """Fetch and cache ``key``, sharing one request among concurrent callers.
+
+        The first caller for a key issues the POST; callers arriving while it
+        is in flight wait on its result (or exception) instead of sending a
+        duplicate request. ``force_refresh`` callers only join other forced
+        requests, so they never receive an answer the caches were allowed to
+        serve.
+        """
+        inflight_key = (key, force_refresh)
+        with self._inflight_lock:
+            future = self._inflight.get(inflight_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[inflight_key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            servers = _Results(self._fetch(query, limit, force_refresh))
+            self._cache.set(key, servers)
+            future.set_result(servers)
+            return servers
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(inflight_key, None)
+
+    async def _afetch_coalesced(
+        self, key: tuple, query: str, limit: int, force_refresh: bool
+    ) -> list[dict]:
+        """Async counterpart of :meth:`_fetch_coalesced`, scoped to the running loop."""
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key, force_refresh)
+        future = self._ainflight.get(inflight_key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = self._ainflight[inflight_key] = loop.create_future()
+        # Mark the exception retrieved even when nobody else was waiting.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            servers = _Results(await self._afetch(query, limit, force_refresh))
+            self._cache.set(key, servers)
+            future.set_result(servers)
+            return servers
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._ainflight.pop(inflight_key, None)
+
+    def _schedule_refresh(self, query: str, limit: int, key: tuple) -> None:
+        """Refresh an expired cache entry in the background (once per key)."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            _current_call.set(None)  # not part of the call that scheduled it
+            try:
+                await self._afetch_coalesced(key, query, limit, False)
+            except Exception:
+                pass  # keep serving the stale entry; the next call retries
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def _key(self, query: str, limit: int) -> tuple[str, int]:
+        """Cache and coalescing key for ``query``: every limit up to the window shares one."""
+        window = self._window(limit)
+        if self.canonicalize_queries:
+            return canonical_query(query, self.query_synonyms), window
+        return _cache_key(query, window)
+
+    def _output_budget(self) -> Optional[int]:
+        """Character budget from ``max_output_chars``/``max_output_tokens``, whichever is tighter."""
+        budgets = [self.max_output_chars]
+        if self.max_output_tokens is not None:
+            budgets.append(self.max_output_tokens * _CHARS_PER_TOKEN)
+        return min((b for b in budgets if b is not None), default=None)
+
+    def _render(self, query: str, servers: list[dict]) -> str:
+        return _format_results(query, servers, self.output_format, self._output_budget())
+
+    def _respond(self, text: str, servers: list[dict]) -> _ToolOutput:
+        """The tool output for ``response_format``: the text, or text plus typed results."""
+        if self.response_format != "content_and_artifact":
+            return text
+        results = servers if isinstance(servers, _Results) else _Results(servers)
+        return text, list(results.typed())
+
+    def _fallback(
+        self, query: str, key: tuple, error: Exception, limit: int, filters: _ResultFilter
+    ) -> tuple[str, list[dict]]:
+        """Serve the last cached answer (even if expired) after a failure, else an error."""
+        call = _current_call.get()
+        if call is not None:
+            call.error = True
+        cached = self._cache.get(key)
+        if cached is not None:
+            servers = filters.select(cached[0], limit)
+            return self._render(query, servers) + _STALE_NOTE, servers
+        return _error_message(error), []
+
+    def _window(self, limit: int) -> int:
+        """How many results to fetch and cache for a call that wants ``limit``."""
+        return max(limit, self.prefetch_limit)
+
+    @staticmethod
+    def _count_retry(attempt: int) -> None:
+        call = _current_call.get()
+        if call is not None:
+            call.retries = attempt
+
+    def _begin_call(self, force_refresh: bool) -> tuple[_CallMetrics, Any, float]:
+        call = _CallMetrics()
+        if force_refresh:
+            call.cache = "bypass"
+        return call, _current_call.set(call), time.perf_counter()
+
+    def _end_call(self, call: _CallMetrics, token: Any, start: float) -> dict:
+        _current_call.reset(token)
+        call.total = time.perf_counter() - start
+        self._stats.record(call)
+        return call.as_dict()
+
+    def get_stats(self) -> dict:
+        """Aggregated call metrics since the tool was created.
+
+        Returns call and error counts, cache hits/misses with the hit rate,
+        and count/sum/p50/p90/p99 summaries for DNS, connect, time to first
+        byte and total call latency (seconds), response bytes, results per
+        call and retries per call. DNS and connect are only measured by the
+        async path when it opens a new connection. ``endpoints`` lists each
+        API replica's latency and error-rate EWMAs and whether it is ejected.
+        """
+        stats = self._stats.snapshot()
+        stats["endpoints"] = self._balancer.snapshot()
+        return stats
+
+    def export_prometheus(self, prefix: str = "mcp_discovery_client") -> str:
+        """The same metrics in the Prometheus text exposition format."""
+        return self._stats.prometheus(prefix)
 
     def _run(
         self,
         query: str,
         limit: int = 5,
         force_refresh: bool = False,
+        category: Optional[str] = None,
+        verified_only: bool = False,
+        min_trust_score: Optional[int] = None,
         run_manager: Optional[Any] = None,
-    ) -> str:
+    ) -> _ToolOutput:
         """Execute the discovery query (synchronous).
 
         Args:
             query: Natural language description of needed capability.
             limit: Max number of results (1–20).
-            force_refresh: Bypass server-side cache when True.
-            run_manager: Optional callback manager.
+            force_refresh: Bypass the client and server-side caches when True.
+            category: Only return servers in this category.
+            verified_only: Only return verified servers.
+            min_trust_score: Only return servers with at least this trust score.
+            run_manager: Optional callback manager. Its handlers receive a
+                ``mcp_discovery_metrics`` custom event with the call's metrics.
 
         Returns:
-            Formatted string with discovered server information.
+            Formatted string with discovered server information; with
+            ``response_format="content_and_artifact"``, a ``(text,
+            list[ServerRecommendation])`` tuple.
         """
+        filters = _ResultFilter(category, verified_only, min_trust_score)
+        call, token, start = self._begin_call(force_refresh)
         try:
-            response = requests.post(
-                f"{self.api_url}/api/v1/discover",
-                json={"need": query, "limit": limit, "force_refresh": force_refresh},
-                headers={"Content-Type": "application/json"},
-                timeout=10,
-            )
-            response.raise_for_status()
-            data = response.json()
-            return _format_results(query, data.get("recommendations", []))
-        except requests.exceptions.Timeout:
-            return "MCP Discovery API request timed out. Please try again."
-        except requests.exceptions.RequestException as e:
-            return f"Error connecting to MCP Discovery API: {str(e)}"
+            if self._use_shared_loop():
+                future = self._submit(
+                    call, self._adiscover(query, limit, force_refresh, call, filters)
+                )
+                return self._respond(*future.result())
+            return self._respond(*self._discover(query, limit, force_refresh, call, filters))
+        finally:
+            metrics = self._end_call(call, token, start)
+            if run_manager is not None:
+                try:
+                    dispatch_custom_event(
+                        METRICS_EVENT, metrics, config={"callbacks": run_manager.get_child()}
+                    )
+                except Exception:
+                    pass  # metrics must never fail the tool call
+
+    def _intents(self, query: str) -> list[str]:
+        if not self.decompose_queries:
+            return [query]
+        return decompose_query(query, self.max_intents)
+
+    def _merge_intents(
+        self, query: str, intents: list[str], answers: list[tuple[str, list[dict]]]
+    ) -> tuple[str, list[dict]]:
+        """Group sub-intent answers, each reordered by reciprocal-rank fusion.
+
+        Servers that match several intents rank higher within each group.
+        A group whose search failed or found nothing shows that message.
+        """
+        rankings = [servers for _, servers in answers]
+        fused = reciprocal_rank_fusion(rankings, self.rrf_k)
+        position = {_server_id(server): i for i, server in enumerate(fused)}
+        budget = self._output_budget()
+        share = None if budget is None else max(1, (budget - len(query) - 40) // len(intents))
+        sections = [f"'{query}' covers {len(intents)} needs:"]
+        for idx, (intent, (text, servers)) in enumerate(zip(intents, answers), 1):
+            if servers:
+                ordered = sorted(servers, key=lambda server: position[_server_id(server)])
+                text = _format_results(intent, ordered, self.output_format, share)
+            sections.append(f"[{idx}/{len(intents)}] {text}")
+        return "\n\n".join(sections), fused
+
+    def _discover_intents(
+        self,
+        query: str,
+        intents: list[str],
+        limit: int,
+        force_refresh: bool,
+        call: _CallMetrics,
+        filters: _ResultFilter,
+    ) -> tuple[str, list[dict]]:
+        """Search each sub-intent on its own thread and merge the answers."""
+        parts = [call.fork() for _ in intents]
+
+        def discover(intent: str, part: _CallMetrics) -> tuple[str, list[dict]]:
+            _current_call.set(part)
+            return self._discover_one(intent, limit, force_refresh, part, filters)
+
+        with ThreadPoolExecutor(max_workers=len(intents)) as pool:
+            futures = [
+                pool.submit(copy_context().run, discover, q, part)
+                for q, part in zip(intents, parts)
+            ]
+            answers = [future.result() for future in futures]
+        text, servers = self._merge_intents(query, intents, answers)
+        call.merge(parts, len(servers))
+        return text, servers
+
+    def _discover(
+        self,
+        query: str,
+        limit: int,
+        force_refresh: bool,
+        call: _CallMetrics,
+        filters: _ResultFilter = _NO_FILTER,
+    ) -> tuple[str, list[dict]]:
+        intents = self._intents(query)
+        if len(intents) > 1:
+            return self._discover_intents(query, intents, limit, force_refresh, call, filters)
+        return self._discover_one(query, limit, force_refresh, call, filters)
+
+    def _discover_one(
+        self,
+        query: str,
+        limit: int,
+        force_refresh: bool,
+        call: _CallMetrics,
+        filters: _ResultFilter = _NO_FILTER,
+    ) -> tuple[str, list[dict]]:
+        window = self._window(limit)
+        key = self._key(query, limit)
+        if not force_refresh:
+            cached = self._cache.get(key)
+            if cached is not None and cached[1]:
+                servers = filters.select(cached[0], limit)
+                call.cache, call.results = "hit", len(servers)
+                return self._render(query, servers), servers
+        try:
+            servers = self._fetch_coalesced(key, query, window, force_refresh)
         except Exception as e:
-            return f"Unexpected error during MCP discovery: {str(e)}"
+            return self._fallback(query, key, e, limit, filters)
+        servers = filters.select(servers, limit)
+        call.results = len(servers)
+        return self._render(query, servers), servers
 
     async def _arun(
         self,
         query: str,
         limit: int = 5,
         force_refresh: bool = False,
+        category: Optional[str] = None,
+        verified_only: bool = False,
+        min_trust_score: Optional[int] = None,
         run_manager: Optional[Any] = None,
-    ) -> str:
+    ) -> _ToolOutput:
         """Execute the discovery query (async with aiohttp).
 
+        With ``stale_while_revalidate`` enabled, an expired cached result is
+        returned immediately while a background task refreshes it.
+
         Args:
             query: Natural language description of needed capability.
             limit: Max number of results (1–20).
-            force_refresh: Bypass server-side cache when True.
-            run_manager: Optional callback manager.
+            force_refresh: Bypass the client and server-side caches when True.
+            category: Only return servers in this category.
+            verified_only: Only return verified servers.
+            min_trust_score: Only return servers with at least this trust score.
+            run_manager: Optional callback manager. Its handlers receive a
+                ``mcp_discovery_metrics`` custom event with the call's metrics.
 
         Returns:
-            Formatted string with discovered server information.
+            Formatted string with discovered server information; with
+            ``response_format="content_and_artifact"``, a ``(text,
+            list[ServerRecommendation])`` tuple.
         """
+        filters = _ResultFilter(category, verified_only, min_trust_score)
+        call, token, start = self._begin_call(force_refresh)
+        try:
+            if self._use_shared_loop():
+                future = self._submit(
+                    call, self._adiscover(query, limit, force_refresh, call, filters)
+                )
+                return self._respond(*await asyncio.wrap_future(future))
+            return self._respond(
+                *await self._adiscover(query, limit, force_refresh, call, filters)
+            )
+        finally:
+            metrics = self._end_call(call, token, start)
+            if run_manager is not None:
+                try:
+                    await adispatch_custom_event(
+                        METRICS_EVENT, metrics, config={"callbacks": run_manager.get_child()}
+                    )
+                except Exception:
+                    pass  # metrics must never fail the tool call
+
+    async def _adiscover(
+        self,
+        query: str,
+        limit: int,
+        force_refresh: bool,
+        call: _CallMetrics,
+        filters: _ResultFilter = _NO_FILTER,
+    ) -> tuple[str, list[dict]]:
+        intents = self._intents(query)
+        if len(intents) > 1:
+            parts = [call.fork() for _ in intents]
+
+            async def discover(intent: str, part: _CallMetrics) -> tuple[str, list[dict]]:
+                _current_call.set(part)  # gather runs each in its own context copy
+                return await self._adiscover_one(intent, limit, force_refresh, part, filters)
+
+            answers = await asyncio.gather(*(discover(q, p) for q, p in zip(intents, parts)))
+            text, servers = self._merge_intents(query, intents, list(answers))
+            call.merge(parts, len(servers))
+            return text, servers
+        return await self._adiscover_one(query, limit, force_refresh, call, filters)
+
+    async def _adiscover_one(
+        self,
+        query: str,
+        limit: int,
+        force_refresh: bool,
+        call: _CallMetrics,
+        filters: _ResultFilter = _NO_FILTER,
+    ) -> tuple[str, list[dict]]:
+        window = self._window(limit)
+        key = self._key(query, limit)
+        if not force_refresh:
+            cached = self._cache.get(key)
+            if cached is not None:
+                servers, fresh = cached
+                if fresh or self.stale_while_revalidate:
+                    servers = filters.select(servers, limit)
+                    call.cache, call.results = ("hit" if fresh else "stale"), len(servers)
+                    if not fresh:
+                        self._schedule_refresh(query, window, key)
+                    return self._render(query, servers), servers
         try:
-            timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    f"{self.api_url}/api/v1/discover",
-                    json={"need": query, "limit": limit, "force_refresh": force_refresh},
-                    headers={"Content-Type": "application/json"},
-                ) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-                    return _format_results(query, data.get("recommendations", []))
-        except asyncio.TimeoutError:
-            return "MCP Discovery API request timed out. Please try again."
-        except aiohttp.ClientError as e:
-            return f"Error connecting to MCP Discovery API: {str(e)}"
+            servers = await self._afetch_coalesced(key, query, window, force_refresh)
         except Exception as e:
-            return f"Unexpected error during MCP discovery: {str(e)}"
+            return self._fallback(query, key, e, limit, filters)
+        servers = filters.select(servers, limit)
+        call.results = len(servers)
+        return self._render(query, servers), servers
+
+    def warm_up(
+        self, queries: Optional[Sequence[str]] = None, limit: int = 5
+    ) -> Future:
+        """Open pooled connections and prefetch ``queries`` in a background thread.
+
+        Returns immediately. The thread pings ``/health`` to open a keep-alive
+        connection, then fetches ``queries`` (default: ``DEFAULT_WARMUP_QUERIES``)
+        into the client cache with up to ``batch_concurrency`` requests at a
+        time. With ``shared_event_loop`` this runs on the shared loop instead
+        of a thread. In embedded and semantic mode it builds the search index
+        (seconds for the semantic embeddings) instead of connecting, even when
+        ``queries`` is empty. With a client-side rate limit configured, only
+        the connection warm-up runs: prefetching would spend the quota on
+        queries nobody asked for. Failures are ignored; warm-up stops early if
+        the circuit breaker opens. Warm-up calls are not counted in
+        :meth:`get_stats`.
+
+        Returns:
+            A future that resolves to the number of queries prefetched.
+        """
+        queries = list(DEFAULT_WARMUP_QUERIES if queries is None else queries)
+        if self._limiter is not None:
+            queries = []
+        limit = self._window(limit)
+        if self._use_shared_loop():
+            return self._submit(None, self._awarm_up(queries, limit))
+        future: Future = Future()
+
+        def prefetch(query: str) -> bool:
+            key = self._key(query, limit)
+            if not self._needs_prefetch(key):
+                return False
+            try:
+                self._fetch_coalesced(key, query, limit, False)
+                return True
+            except Exception:
+                return False
+
+        def run() -> None:
+            try:
+                if self.mode == "api":
+                    for endpoint in self._balancer.endpoints:
+                        try:
+                            self._get_session().get(f"{endpoint.url}/health", timeout=self.timeout)
+                        except Exception:
+                            pass  # the prefetches below retry the connection anyway
+                else:
+                    try:
+                        _build_local_index(self.mode)
+                    except Exception:
+                        pass  # each prefetch below reports the same failure
+                workers = max(1, min(self.batch_concurrency, len(queries)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    future.set_result(sum(pool.map(prefetch, queries)))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="mcp-discovery-warmup", daemon=True).start()
+        return future
+
+    def _needs_prefetch(self, key: tuple) -> bool:
+        return not self._breaker.is_open and self._cache.get(key) is None
+
+    async def _awarm_up(self, queries: list[str], limit: int) -> int:
+        """Async :meth:`warm_up` body, for the shared event loop."""
+        if self.mode == "api":
+            for endpoint in self._balancer.endpoints:
+                try:
+                    async with self._get_async_session().get(f"{endpoint.url}/health") as resp:
+                        await resp.read()
+                except Exception:
+                    pass  # the prefetches below retry the connection anyway
+        else:
+            try:
+                await asyncio.to_thread(_build_local_index, self.mode)
+            except Exception:
+                pass  # each prefetch below reports the same failure
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def prefetch(query: str) -> bool:
+            key = self._key(query, limit)
+            async with semaphore:
+                if not self._needs_prefetch(key):
+                    return False
+                try:
+                    await self._afetch_coalesced(key, query, limit, False)
+                    return True
+                except Exception:
+                    return False
+
+        return sum(await asyncio.gather(*(prefetch(q) for q in queries)))
+
+    def batch_discover(
+        self,
+        queries: Sequence[str],
+        limit: int = 5,
+        max_concurrency: Optional[int] = None,
+    ) -> list[_ToolOutput]:
+        """Discover servers for several queries concurrently (synchronous).
+
+        Requests fan out over a thread pool bounded by ``max_concurrency``
+        (default: ``batch_concurrency``). Duplicate or already in-flight
+        queries share a single API request.
+
+        Args:
+            queries: Natural language capability descriptions.
+            limit: Max number of results per query (1–20).
+            max_concurrency: Upper bound on simultaneous API requests.
+
+        Returns:
+            Tool outputs (see :meth:`_run`), in the same order as ``queries``.
+        """
+        if not queries:
+            return []
+        if self._use_shared_loop():
+            batch = self.abatch_discover(queries, limit, max_concurrency)
+            return self._get_loop_thread().submit(batch).result()
+        workers = min(max_concurrency or self.batch_concurrency, len(queries))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda q: self._run(q, limit), queries))
+
+    async def abatch_discover(
+        self,
+        queries: Sequence[str],
+        limit: int = 5,
+        max_concurrency: Optional[int] = None,
+    ) -> list[_ToolOutput]:
+        """Discover servers for several queries concurrently (async).
+
+        Args:
+            queries: Natural language capability descriptions.
+            limit: Max number of results per query (1–20).
+            max_concurrency: Upper bound on simultaneous API requests.
+
+        Returns:
+            Tool outputs (see :meth:`_run`), in the same order as ``queries``.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.batch_concurrency)
+
+        async def discover(query: str) -> _ToolOutput:
+            async with semaphore:
+                return await self._arun(query, limit)
+
+        return list(await asyncio.gather(*(discover(q) for q in queries)))
 
 
-def create_mcp_discovery_tool(api_url: Optional[str] = None) -> MCPDiscoveryTool:
+def create_mcp_discovery_tool(
+    api_url: Optional[Union[str, Sequence[str]]] = None,
+    mode: Literal["api", "embedded", "semantic"] = "api",
+    warm_up: bool = False,
+    warmup_queries: Optional[Sequence[str]] = None,
+) -> MCPDiscoveryTool:
     """Factory function to create an MCP Discovery tool instance.
 
     Args:
-        api_url: Optional custom API URL. Defaults to production endpoint.
+        api_url: Optional custom API URL, or a list of replica URLs to
+            load-balance across. Defaults to production endpoint.
+        mode: ``"embedded"`` searches the bundled snapshot without the API;
+            ``"semantic"`` ranks it by offline embedding similarity.
+        warm_up: Start :meth:`MCPDiscoveryTool.warm_up` in the background so
+            the first real call finds an open connection and a warm cache.
+            Construction does not wait for it.
+        warmup_queries: Queries to prefetch; defaults to
+            ``DEFAULT_WARMUP_QUERIES``.
 
     Returns:
         Configured MCPDiscoveryTool instance.
@@ -207,6 +2424,10 @@ def create_mcp_discovery_tool(api_url: Optional[str] = None) -> MCPDiscoveryTool
         >>> tool = create_mcp_discovery_tool()
         >>> result = tool.run("file system access")
     """
+    kwargs: dict[str, Any] = {"mode": mode}
     if api_url:
-        return MCPDiscoveryTool(api_url=api_url)
-    return MCPDiscoveryTool()
+        kwargs["api_url"] = api_url if isinstance(api_url, str) else list(api_url)
+    tool = MCPDiscoveryTool(**kwargs)
+    if warm_up:
+        tool.warm_up(warmup_queries)
+    return tool
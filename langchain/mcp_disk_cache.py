@@ -0,0 +1,214 @@
+"""Persistent discovery cache for the MCP Discovery LangChain tool.
+
+``SQLiteResultCache`` keeps discovery results in a SQLite database so that
+short-lived agent processes on one host share a warm cache. The database
+runs in WAL mode: readers never block the single writer, and writers wait
+on a busy timeout instead of failing. Entries expire after a TTL (expired
+entries stay readable for stale fallback until evicted), the table is
+trimmed to a maximum entry count and byte size in least-recently-used
+order, and every entry records the API dataset version it was fetched
+under so a catalog reload invalidates it for every process at once.
+Keys are namespaced by a ``scope`` string, so tools that fetch from
+different backends or request different fields never read each other's
+entries. A write that cannot get the lock in time is dropped, like a miss.
+"""
+
+from typing import Optional
+import json
+import sqlite3
+import threading
+import time
+
+try:  # optional: faster encoding and decoding of cached results
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(value: object) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    servers BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    dataset_version TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_CURRENT_VERSION = "(SELECT value FROM meta WHERE name = 'dataset_version')"
+
+# Reads refresh an entry's LRU position at most this often, so hot keys do
+# not turn every cache hit into a write.
+_TOUCH_INTERVAL = 1.0
+
+
+def _encode_key(key: tuple, scope: str = "") -> str:
+    return json.dumps([scope, *key], separators=(",", ":"))
+
+
+class SQLiteResultCache:
+    """Cross-process LRU cache of discovery results in a SQLite file.
+
+    Drop-in replacement for the tool's in-memory cache: ``get`` returns
+    ``(servers, is_fresh)`` or None, ``set`` stores and evicts.
+    Each thread gets its own connection.
+
+    Args:
+        path: Database file; created with its tables on first use.
+        maxsize: Maximum number of entries. ``0`` disables caching.
+        ttl: Seconds an entry counts as fresh.
+        max_bytes: Maximum total size of the stored results.
+        busy_timeout: Seconds a writer waits for the lock before giving up.
+        scope: Namespace for this cache's keys within the file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int,
+        ttl: float,
+        max_bytes: int = 64 * 1024 * 1024,
+        busy_timeout: float = 5.0,
+        scope: str = "",
+    ) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.busy_timeout = busy_timeout
+        self.scope = scope
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._dataset_version: Optional[str] = None
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; writes open explicit IMMEDIATE transactions.
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get(self, key: tuple) -> Optional[tuple[list[dict], bool]]:
+        """Return ``(servers, is_fresh)`` for ``key``, or None on a miss."""
+        conn = self._connect()
+        encoded = _encode_key(key, self.scope)
+        row = conn.execute(
+            "SELECT servers, stored_at, accessed_at FROM entries "
+            f"WHERE key = ? AND dataset_version IS {_CURRENT_VERSION}",
+            (encoded,),
+        ).fetchone()
+        if row is None:
+            return None
+        blob, stored_at, accessed_at = row
+        now = time.time()
+        if now - accessed_at > _TOUCH_INTERVAL:
+            try:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, encoded))
+            except sqlite3.OperationalError:
+                pass  # database busy; the LRU position is only a hint
+        return _json_loads(blob), now - stored_at < self.ttl
+
+    def set(self, key: tuple, servers: list[dict]) -> None:
+        """Store ``servers`` under ``key`` and evict down to the size limits.
+
+        If another process holds the write lock past ``busy_timeout`` the
+        entry is not stored; the next call simply misses.
+        """
+        if self.maxsize <= 0:
+            return
+        blob = _json_dumps(list(servers))
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, servers, size, dataset_version, stored_at, accessed_at) "
+                f"VALUES (?, ?, ?, {_CURRENT_VERSION}, ?, ?)",
+                (_encode_key(key, self.scope), blob, len(blob), now, now),
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError:
+            conn.execute("ROLLBACK")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.maxsize and total <= self.max_bytes:
+            return
+        excess_bytes = total - self.max_bytes
+        doomed: list[str] = []
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if count - len(doomed) <= self.maxsize and excess_bytes <= 0:
+                break
+            doomed.append(key)
+            excess_bytes -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in doomed])
+
+    def set_dataset_version(self, version: str) -> None:
+        """Record the API's dataset version, dropping entries cached under another one."""
+        if version == self._dataset_version:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            return  # retried on the next response
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('dataset_version', ?)",
+                (version,),
+            )
+            conn.execute("DELETE FROM entries WHERE dataset_version IS NOT ?", (version,))
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError:
+            conn.execute("ROLLBACK")
+            return
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._dataset_version = version
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Close every thread's connection."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            f"SELECT COUNT(*) FROM entries WHERE dataset_version IS {_CURRENT_VERSION}"
+        ).fetchone()[0]
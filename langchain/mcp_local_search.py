@@ -0,0 +1,293 @@
+"""Embedded local search for the MCP Discovery LangChain tool.
+
+A Python port of ``src/services/local-search.ts``: it loads the bundled
+registry snapshot and answers discover queries in-process with the same
+tokenizer, stopwords and keyword scoring the API uses in local mode, so
+``MCPDiscoveryTool(mode="embedded")`` needs no running API and no HTTP.
+
+Scoring is looked up through an inverted index instead of scanning every
+record. The TS scorer matches query tokens as substrings of the lowercased
+name, slug and description. Tokens are ``[a-z0-9]+``, so a match always lies
+inside a single alphanumeric run of the field; indexing those runs (and a
+trigram index over them to find the runs containing a token) gives exactly
+the same matches as the substring scan.
+"""
+
+from collections import Counter
+from typing import Optional
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "for", "i", "in", "mcp", "need", "of", "or", "server",
+    "servers", "that", "the", "to", "tool", "want", "with",
+})
+
+_SPLIT = re.compile(r"[^a-z0-9]+")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _dataset_candidates() -> list[str]:
+    """Candidate dataset locations, first match wins (same order as the TS loader)."""
+    candidates: list[str] = []
+    if os.environ.get("MCP_DISCOVERY_DATA"):
+        candidates.append(os.environ["MCP_DISCOVERY_DATA"])
+    candidates.append(os.path.join(_ROOT, "data_massive", "mcp_servers_all.json"))
+    candidates.append(os.path.join(_ROOT, "data", "mcp_servers_complete.json"))
+    return candidates
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split on non-alphanumerics, drop 1-char tokens and stopwords."""
+    return [t for t in _SPLIT.split(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _github_url(value: object) -> Optional[str]:
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return value.get("url")
+    return None
+
+
+def load_local_dataset(path: Optional[str] = None) -> list[dict]:
+    """Load and normalize the registry snapshot, deduplicated by slug.
+
+    When two records share a slug (case-insensitively) the one with more
+    stars wins but keeps the position of the first occurrence, as in the TS
+    loader.
+
+    Raises:
+        FileNotFoundError: If no dataset file exists.
+    """
+    if path is None:
+        path = next((p for p in _dataset_candidates() if os.path.exists(p)), None)
+    if path is None:
+        raise FileNotFoundError(
+            "Local dataset not found. Clone the full repository (the dataset lives "
+            "in data/), or point MCP_DISCOVERY_DATA at a registry JSON file."
+        )
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    by_slug: dict[str, dict] = {}
+    for r in raw:
+        slug = (r.get("slug") or r.get("name") or "").strip()
+        if not slug:
+            continue
+        stars = r.get("stars")
+        record = {
+            "name": r.get("name") or slug,
+            "slug": slug,
+            "description": r.get("description"),
+            "npm_package": r.get("npm_package"),
+            "github_url": _github_url(r.get("github_url")),
+            "install_command": r.get("install_command") or f"npx -y {r.get('npm_package') or slug}",
+            "docs_url": r.get("docs_url"),
+            "category": r.get("category"),
+            "source": r.get("source"),
+            "stars": stars if isinstance(stars, (int, float)) and not isinstance(stars, bool) else 0,
+        }
+        existing = by_slug.get(slug.lower())
+        if existing is None or record["stars"] > existing["stars"]:
+            by_slug[slug.lower()] = record
+    return list(by_slug.values())
+
+
+def _star_boost(stars: float) -> float:
+    return min(0.15, math.log10(stars + 1) / 20)
+
+
+def score_record(record: dict, tokens: list[str]) -> float:
+    """Keyword relevance, 0–1. Name hits weigh most, then slug, then description.
+
+    Reference implementation of the TS ``scoreRecord``; the engine computes
+    the same value from its index.
+    """
+    if not tokens:
+        return 0
+    name = record["name"].lower()
+    slug = record["slug"].lower()
+    description = (record.get("description") or "").lower()
+
+    score = 0
+    for token in tokens:
+        if token in name:
+            score += 4
+        elif token in slug:
+            score += 3
+        elif token in description:
+            score += 2
+    if score == 0:
+        return 0
+    relevance = score / (len(tokens) * 4)
+    return min(1, relevance * 0.9 + _star_boost(record["stars"]))
+
+
+def local_trust_score(stars: float) -> int:
+    """Trust score for local mode, derived purely from GitHub stars (0–100)."""
+    return min(100, _js_round(math.log10(stars + 1) * 25))
+
+
+def _js_round(value: float) -> int:
+    """``Math.round``: halves round up, unlike Python's banker's rounding."""
+    return math.floor(value + 0.5)
+
+
+class LocalSearchEngine:
+    """Inverted-index keyword search over a list of normalized records."""
+
+    _FIELDS = ("name", "slug", "description")
+
+    def __init__(self, records: list[dict]) -> None:
+        self.records = records
+        self._boost = [_star_boost(r["stars"]) for r in records]
+        self._max_boost = max(self._boost, default=0.0)
+        # Position of each record when ordered by (star boost desc, id asc),
+        # i.e. by final score among records with the same keyword points.
+        order = sorted(range(len(records)), key=lambda i: (-self._boost[i], i))
+        self._rank = [0] * len(records)
+        for position, idx in enumerate(order):
+            self._rank[idx] = position
+        # term -> record ids, one index per field
+        self._postings: tuple[dict[str, list[int]], ...] = ({}, {}, {})
+        for idx, record in enumerate(records):
+            for field, index in zip(self._FIELDS, self._postings):
+                for term in set(_SPLIT.split((record.get(field) or "").lower())):
+                    if term:
+                        index.setdefault(term, []).append(idx)
+        self._terms = sorted(set().union(*self._postings))
+        self._trigrams: dict[str, set[int]] = {}
+        for term_id, term in enumerate(self._terms):
+            for i in range(len(term) - 2):
+                self._trigrams.setdefault(term[i:i + 3], set()).add(term_id)
+        self._token_cache: dict[str, tuple[frozenset, frozenset, frozenset]] = {}
+        self._lock = threading.Lock()
+
+    def _matching_terms(self, token: str) -> list[str]:
+        """Indexed terms that contain ``token`` as a substring."""
+        if len(token) < 3:
+            return [t for t in self._terms if token in t]
+        grams = [self._trigrams.get(token[i:i + 3], set()) for i in range(len(token) - 2)]
+        candidates = set.intersection(*sorted(grams, key=len))
+        return [self._terms[i] for i in candidates if token in self._terms[i]]
+
+    def _token_hits(self, token: str) -> tuple[frozenset, frozenset, frozenset]:
+        """Record ids scoring 4 (name), 3 (slug only) and 2 (description only)."""
+        hits = self._token_cache.get(token)
+        if hits is not None:
+            return hits
+        terms = self._matching_terms(token)
+        name, slug, desc = (
+            frozenset(i for t in terms for i in index.get(t, ()))
+            for index in self._postings
+        )
+        hits = (name, slug - name, desc - name - slug)
+        with self._lock:
+            if len(self._token_cache) >= 4096:
+                self._token_cache.clear()
+            self._token_cache[token] = hits
+        return hits
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """Rank records for ``query``; mirrors the TS ``localSearch``."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        if len(tokens) == 1:
+            # Single token: the three hit sets already are the point buckets.
+            buckets = {w: list(ids) for w, ids in zip((4, 3, 2), self._token_hits(tokens[0])) if ids}
+        else:
+            points: Counter = Counter()
+            for token in tokens:
+                for weight, ids in zip((4, 3, 2), self._token_hits(token)):
+                    for _ in range(weight):
+                        points.update(ids)
+            buckets = {}
+            for idx, pts in points.items():
+                buckets.setdefault(pts, []).append(idx)
+
+        # Records with equal points rank by star boost, so each bucket only
+        # contributes its best ``limit`` by rank. Buckets where the cap at 1
+        # can tie records (broken by id, not boost) are scored in full.
+        max_points = len(tokens) * 4
+        boost = self._boost
+        scored = []
+        for pts, ids in buckets.items():
+            base = pts / max_points * 0.9
+            if base + self._max_boost < 1 and len(ids) > limit:
+                ids = heapq.nsmallest(limit, ids, key=self._rank.__getitem__)
+            for idx in ids:
+                score = min(1, base + boost[idx])
+                if score > 0.2:
+                    scored.append((score, -idx))
+        top = heapq.nlargest(limit, scored)
+
+        results = []
+        for score, neg_idx in top:
+            record = self.records[-neg_idx]
+            results.append({
+                "id": record["slug"],
+                "name": record["name"],
+                "slug": record["slug"],
+                "npm_package": record["npm_package"],
+                "description": record["description"],
+                "install_command": record["install_command"],
+                "docs_url": record["docs_url"],
+                "github_url": record["github_url"],
+                "category": record["category"],
+                "is_verified": False,
+                "similarity": _js_round(score * 100) / 100,
+                "stars": record["stars"],
+            })
+        return results
+
+    def discover(self, query: str, limit: int = 5) -> list[dict]:
+        """Recommendations shaped like ``POST /api/v1/discover`` in local mode."""
+        recommendations = [
+            {
+                "server": m["slug"],
+                "npm_package": m["npm_package"],
+                "install_command": m["install_command"],
+                "confidence": _js_round(m["similarity"] * 100) / 100,
+                "description": m["description"],
+                "category": m["category"],
+                "capabilities": [],
+                "metrics": {"avg_latency_ms": None, "uptime_pct": None, "last_checked": None},
+                "docs_url": m["docs_url"],
+                "github_url": m["github_url"],
+                "is_verified": False,
+                "trust_score": local_trust_score(m["stars"]),
+            }
+            for m in self.search(query, limit * 2)
+        ]
+        recommendations = [r for r in recommendations if r["confidence"] > 0.2]
+        recommendations.sort(key=lambda r: -r["confidence"])
+        return recommendations[:limit]
+
+
+_engine: Optional[LocalSearchEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_local_engine() -> LocalSearchEngine:
+    """Return the process-wide engine, building its index on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = LocalSearchEngine(load_local_dataset())
+        return _engine
+
+
+def reset_local_engine() -> None:
+    """Test hook: drop the memoized engine so the next call re-reads disk."""
+    global _engine
+    with _engine_lock:
+        _engine = None
@@ -0,0 +1,288 @@
+"""Client-side rate limiting for the MCP Discovery LangChain tool.
+
+A token bucket sized to the API key's tier keeps a process (or, with a
+file backend, every worker process on the host) under the per-key quota
+that ``checkRateLimit`` enforces, so bursts wait their turn instead of
+coming back as 429s. A tier's bucket holds its whole monthly quota and
+refills over the month, so calls run at full speed until the budget is
+spent. Callers that have to wait are queued per agent and served
+round-robin, so one busy agent cannot starve the others. A caller whose
+slot cannot come before its deadline fails at once instead of sleeping
+until the deadline.
+"""
+
+from collections import OrderedDict, deque
+from typing import Hashable, Optional
+import asyncio
+import os
+import threading
+import time
+
+# Monthly query quotas from ``GET /api/v1/pricing``; None means unlimited.
+TIER_QUERIES_PER_MONTH: dict[str, Optional[int]] = {
+    "free": 100,
+    "pro": 10000,
+    "enterprise": None,
+}
+
+_MONTH_SECONDS = 30 * 24 * 3600
+
+
+def tier_rate(tier: str) -> Optional[float]:
+    """Sustained requests per second that spread the tier's monthly quota evenly."""
+    if tier not in TIER_QUERIES_PER_MONTH:
+        raise ValueError(f"Unknown tier {tier!r}; expected one of {sorted(TIER_QUERIES_PER_MONTH)}")
+    quota = TIER_QUERIES_PER_MONTH[tier]
+    return None if quota is None else quota / _MONTH_SECONDS
+
+
+def tier_budget(tier: str) -> Optional[tuple[float, int]]:
+    """``(rate, burst)`` for a bucket that holds the tier's monthly quota.
+
+    The quota is a monthly budget, not a per-second pace: the bucket starts
+    full and refills at :func:`tier_rate`, so a burst may spend the whole
+    month's queries. None means the tier is unlimited.
+    """
+    rate = tier_rate(tier)
+    return None if rate is None else (rate, TIER_QUERIES_PER_MONTH[tier])
+
+
+class RateLimitTimeout(Exception):
+    """No request slot became free within the caller's maximum wait."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"rate limit: next request slot in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class _MemoryBucket:
+    """Token bucket state for one process."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token: 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def refund(self) -> None:
+        self._tokens = min(self.burst, self._tokens + 1)
+
+
+class _FileBucket:
+    """Token bucket state in a small file, shared by every process that opens it.
+
+    Each update holds an exclusive ``flock`` on the file while it reads,
+    refills and writes the ``tokens timestamp`` pair, using wall-clock time
+    so all processes agree.
+    """
+
+    def __init__(self, path: str, rate: float, burst: int) -> None:
+        import fcntl  # POSIX only; imported here so the module loads everywhere
+
+        self._flock = fcntl.flock
+        self._lock_ex, self._lock_un = fcntl.LOCK_EX, fcntl.LOCK_UN
+        self.rate = rate
+        self.burst = burst
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _update(self, change: float) -> float:
+        self._flock(self._fd, self._lock_ex)
+        try:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            raw = os.read(self._fd, 64).split()
+            now = time.time()
+            try:
+                tokens, stamp = float(raw[0]), float(raw[1])
+            except (IndexError, ValueError):
+                tokens, stamp = float(self.burst), now
+            tokens = min(self.burst, tokens + max(0.0, now - stamp) * self.rate)
+            wait = 0.0
+            if change < 0 and tokens < 1:
+                wait = (1 - tokens) / self.rate
+            else:
+                tokens = min(self.burst, tokens + change)
+            state = f"{tokens!r} {now!r}".encode()
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.ftruncate(self._fd, 0)
+            os.write(self._fd, state)
+            return wait
+        finally:
+            self._flock(self._fd, self._lock_un)
+
+    def take(self) -> float:
+        return self._update(-1)
+
+    def refund(self) -> None:
+        self._update(1)
+
+
+class _Waiter:
+    __slots__ = ("agent", "granted", "event", "loop", "future")
+
+    def __init__(self, agent: Hashable, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.agent = agent
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+            return
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        except RuntimeError:
+            pass  # the waiter's loop is gone; nobody is waiting any more
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class TokenBucketLimiter:
+    """Token bucket with round-robin queueing across agents.
+
+    ``acquire``/``aacquire`` return at once while tokens are available.
+    Otherwise the caller joins its agent's FIFO queue; as tokens refill
+    they go to the agents with waiters in turn. Sync and async callers
+    share the same queues.
+
+    Args:
+        rate: Tokens added per second.
+        burst: Bucket capacity (requests allowed back to back).
+        path: Optional state file to share the bucket across processes.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, path: Optional[str] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        burst = max(1, burst)
+        self.rate = rate
+        self.burst = burst
+        self._bucket = _FileBucket(path, rate, burst) if path else _MemoryBucket(rate, burst)
+        self._lock = threading.Lock()
+        self._queues: "OrderedDict[Hashable, deque[_Waiter]]" = OrderedDict()
+
+    def _dispatch(self) -> float:
+        """Grant free tokens round-robin; seconds until the next token if callers still wait."""
+        while self._queues:
+            wait = self._bucket.take()
+            if wait:
+                return wait
+            agent, queue = next(iter(self._queues.items()))
+            queue.popleft().grant()
+            if queue:
+                self._queues.move_to_end(agent)
+            else:
+                del self._queues[agent]
+        return 0.0
+
+    def _enqueue(self, waiter: _Waiter) -> float:
+        with self._lock:
+            self._queues.setdefault(waiter.agent, deque()).append(waiter)
+            return self._dispatch()
+
+    def _give_up(self, waiter: _Waiter) -> bool:
+        """Withdraw ``waiter``; returns False if it was granted in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            queue = self._queues.get(waiter.agent)
+            if queue is not None:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[waiter.agent]
+            return True
+
+    def refund(self) -> None:
+        """Return an unused token (e.g. the request was never sent)."""
+        with self._lock:
+            self._bucket.refund()
+
+    def acquire(self, agent: Hashable = None, timeout: Optional[float] = None) -> None:
+        """Block until a request slot is granted to ``agent``.
+
+        Raises:
+            RateLimitTimeout: If no slot is granted within ``timeout`` seconds,
+                or as soon as the next token is known to refill after that.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = _Waiter(agent)
+        delay = self._enqueue(waiter)
+        while not waiter.granted:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and (remaining <= 0 or delay > remaining):
+                if self._give_up(waiter):
+                    raise RateLimitTimeout(delay)
+                break
+            waiter.event.wait(_next_wake(delay, remaining))
+            with self._lock:
+                delay = self._dispatch()
+
+    async def aacquire(self, agent: Hashable = None, timeout: Optional[float] = None) -> None:
+        """Async :meth:`acquire`. Cancelling the wait releases the slot."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = _Waiter(agent, asyncio.get_running_loop())
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and (remaining <= 0 or delay > remaining):
+                    if self._give_up(waiter):
+                        raise RateLimitTimeout(delay)
+                    break
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), _next_wake(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    delay = self._dispatch()
+        except asyncio.CancelledError:
+            if not self._give_up(waiter):
+                self.refund()
+            raise
+
+
+def _next_wake(delay: float, remaining: Optional[float]) -> Optional[float]:
+    """How long a waiter sleeps before re-checking the bucket."""
+    wake = delay if delay > 0 else 0.05
+    return wake if remaining is None else min(wake, remaining)
+
+
+_limiters: dict[tuple, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    key: Hashable, rate: float, burst: int = 1, path: Optional[str] = None
+) -> TokenBucketLimiter:
+    """The process-wide limiter for ``key`` (e.g. API URL and key), created on first use.
+
+    Every tool instance that uses the same key shares one bucket and one
+    set of queues. A limiter keeps the ``rate``/``burst`` it was created with.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get((key, path))
+        if limiter is None:
+            limiter = _limiters[(key, path)] = TokenBucketLimiter(rate, burst, path)
+        return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Test hook: forget every process-wide limiter."""
+    with _limiters_lock:
+        _limiters.clear()
+
@@ -0,0 +1,404 @@
+"""Composite server-selection tool for LangChain.
+
+Choosing a server used to take an agent three or more steps: discover
+candidates, fetch metrics for each one, then compare them. This tool does
+all of it in one step. It calls ``POST /api/v1/discover``, then sends
+``/api/v1/metrics`` for each of the top-k servers and one
+``/api/v1/compare`` for all of them at the same time, and merges the
+answers into a single ranking. Each sub-call has its own timeout. A
+sub-call that fails or times out only removes its signals from the
+ranking; the answer says which ones are missing.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Literal, Optional, Type
+import asyncio
+import threading
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+from mcp_discovery_tool import MCPDiscoveryTool, _error_message, _raised_by
+
+METRICS_PATH = "/api/v1/metrics"
+COMPARE_PATH = "/api/v1/compare"
+
+# ``/api/v1/compare`` accepts 2 to 10 server ids.
+_MAX_TOP_K = 10
+
+# How much each signal counts in the merged score. Signals a server is
+# missing (e.g. its metrics call timed out) are left out of its average.
+DEFAULT_SIGNAL_WEIGHTS: dict[str, float] = {
+    "relevance": 0.5,
+    "latency": 0.15,
+    "uptime": 0.15,
+    "success_rate": 0.1,
+    "features": 0.1,
+}
+
+
+class MCPServerSelectionInput(BaseModel):
+    """Input schema for the MCP server selection tool."""
+
+    query: str = Field(
+        description=(
+            "Natural language description of the capability or tool needed. "
+            "Examples: 'database access', 'send emails', 'weather data'"
+        )
+    )
+    top_k: int = Field(
+        default=3,
+        ge=2,
+        le=_MAX_TOP_K,
+        description="How many discovered servers to fetch metrics for and compare (2–10).",
+    )
+    time_range: Literal["1h", "24h", "7d", "30d"] = Field(
+        default="24h",
+        description="Window of metrics history to consider.",
+    )
+
+
+def _first(*values: Any) -> Any:
+    return next((v for v in values if v is not None), None)
+
+
+def _scaled(values: dict[str, Optional[float]], scale: float) -> dict[str, float]:
+    """Known values divided by ``scale`` and clamped to [0, 1]."""
+    return {k: min(1.0, max(0.0, v / scale)) for k, v in values.items() if v is not None}
+
+
+def _relative(values: dict[str, Optional[float]], higher_is_better: bool) -> dict[str, float]:
+    """Min-max scale the known values to [0, 1], best = 1. Ties all score 1."""
+    known = {k: v for k, v in values.items() if v is not None}
+    if not known:
+        return {}
+    low, high = min(known.values()), max(known.values())
+    if high == low:
+        return {k: 1.0 for k in known}
+    return {
+        k: (v - low) / (high - low) if higher_is_better else (high - v) / (high - low)
+        for k, v in known.items()
+    }
+
+
+def merge_selection(
+    servers: list[dict],
+    metrics: dict[str, dict],
+    comparison: Optional[dict],
+    weights: Optional[dict[str, float]] = None,
+) -> list[dict]:
+    """Merge discover, metrics and compare answers into one ranked list.
+
+    Args:
+        servers: Recommendations from ``/api/v1/discover``, best first.
+        metrics: ``/api/v1/metrics`` answers by server id; ids whose call
+            failed are simply absent.
+        comparison: The ``/api/v1/compare`` answer, or None if it failed.
+        weights: Signal weights; defaults to ``DEFAULT_SIGNAL_WEIGHTS``.
+
+    Returns:
+        One dict per server, best first, with ``server``, ``score``,
+        ``signals`` (the normalized inputs to the score), ``latency_ms``,
+        ``uptime_pct``, ``success_rate``, ``capabilities``, ``ranking``
+        (compare's per-dimension ranks) and the original ``recommendation``.
+    """
+    weights = DEFAULT_SIGNAL_WEIGHTS if weights is None else weights
+    compared = {}
+    for entry in (comparison or {}).get("servers", []):
+        for ident in (entry.get("slug"), entry.get("id"), entry.get("name")):
+            if ident:
+                compared[ident] = entry
+
+    rows = []
+    for server in servers:
+        ident = server.get("server")
+        current = ((metrics.get(ident) or {}).get("metrics") or {}).get("current") or {}
+        entry = compared.get(ident) or {}
+        entry_metrics = entry.get("metrics") or {}
+        listed = server.get("metrics") or {}
+        capabilities = entry.get("capabilities") or server.get("capabilities")
+        rows.append({
+            "server": ident,
+            "latency_ms": _first(current.get("latency_ms"), entry_metrics.get("latency_ms"),
+                                 listed.get("avg_latency_ms")),
+            "uptime_pct": _first(current.get("uptime_pct"), entry_metrics.get("uptime_pct"),
+                                 listed.get("uptime_pct")),
+            "success_rate": _first(current.get("success_rate"), entry_metrics.get("success_rate")),
+            "capabilities": list(capabilities) if capabilities is not None else None,
+            "ranking": entry.get("ranking"),
+            "recommendation": server,
+        })
+
+    # Bounded signals keep their absolute value; latency and capability count
+    # have no natural scale, so they are scored relative to the other candidates.
+    signals = {
+        "relevance": _scaled({r["server"]: r["recommendation"].get("confidence") for r in rows}, 1),
+        "latency": _relative({r["server"]: r["latency_ms"] for r in rows}, False),
+        "uptime": _scaled({r["server"]: r["uptime_pct"] for r in rows}, 100),
+        "success_rate": _scaled({r["server"]: r["success_rate"] for r in rows}, 100),
+        "features": _relative(
+            {r["server"]: len(r["capabilities"]) if r["capabilities"] is not None else None
+             for r in rows},
+            True,
+        ),
+    }
+    for row in rows:
+        row["signals"] = {
+            name: scores[row["server"]] for name, scores in signals.items() if row["server"] in scores
+        }
+        total = sum(weights.get(name, 0.0) for name in row["signals"])
+        row["score"] = (
+            sum(weights.get(name, 0.0) * value for name, value in row["signals"].items()) / total
+            if total else 0.0
+        )
+    # Stable: equal scores keep the discover order.
+    return sorted(rows, key=lambda r: -r["score"])
+
+
+def _format_selection(query: str, rows: list[dict], missing: list[str]) -> str:
+    """Render the merged ranking for the agent."""
+    lines = [f"Ranked {len(rows)} MCP server(s) for: '{query}'"]
+    for idx, row in enumerate(rows, 1):
+        server = row["recommendation"]
+        name = server.get("name") or row["server"] or "Unknown"
+        badge = " ✓ Verified" if server.get("is_verified") else ""
+        lines.append(f"\n{idx}. {name}{badge} (score {row['score']:.2f})")
+        facts = []
+        if "confidence" in server:
+            facts.append(f"match {server['confidence']:.0%}")
+        if server.get("trust_score") is not None:
+            facts.append(f"trust {server['trust_score']}/100")
+        if row["latency_ms"] is not None:
+            facts.append(f"latency {row['latency_ms']:.0f}ms")
+        if row["uptime_pct"] is not None:
+            facts.append(f"uptime {row['uptime_pct']:.1f}%")
+        if row["success_rate"] is not None:
+            facts.append(f"success {row['success_rate']:.1f}%")
+        if row["capabilities"] is not None:
+            facts.append(f"{len(row['capabilities'])} capabilities")
+        if facts:
+            lines.append("   " + " | ".join(facts))
+        install = server.get("install_command") or server.get("installCommand")
+        if install:
+            lines.append(f"   Install: {install}")
+    if missing:
+        lines.append("\nPartial results: " + "; ".join(missing) + ".")
+    return "\n".join(lines)
+
+
+class MCPServerSelectionTool(BaseTool):
+    """Discover MCP servers and rank them by live metrics in one call.
+
+    Discovery goes through the wrapped :class:`MCPDiscoveryTool`, so its
+    cache, retries, rate limit and load balancing apply. The top ``top_k``
+    servers are then looked up with one ``/api/v1/metrics`` call each and
+    one ``/api/v1/compare`` call, all at once. Each of those calls is sent
+    once and given ``subcall_timeout`` seconds. The servers are ranked by
+    a weighted mix of discover relevance, latency, uptime, success rate and
+    capability count (see :func:`merge_selection`).
+
+    In embedded or semantic mode there is no API to ask for metrics, so the
+    ranking uses the metrics included in the discover results.
+
+    Example::
+
+        >>> tool = MCPServerSelectionTool(discovery=MCPDiscoveryTool(api_key="..."))
+        >>> print(tool.run({"query": "postgres database", "top_k": 3}))
+    """
+
+    name: str = "mcp_server_selection"
+    description: str = (
+        "Finds MCP servers for a task and ranks the best candidates by live "
+        "performance metrics (latency, uptime, success rate) and capabilities in one step. "
+        "Input should be a natural language description of what you need to accomplish."
+    )
+    args_schema: Type[BaseModel] = MCPServerSelectionInput
+    discovery: MCPDiscoveryTool = Field(
+        default_factory=MCPDiscoveryTool,
+        description="Discovery tool whose API settings, cache and connections are used.",
+    )
+    subcall_timeout: float = Field(
+        default=3.0,
+        gt=0,
+        description="Seconds each metrics or compare call may take before it is left out.",
+    )
+    compare_by: list[Literal["latency", "uptime", "features"]] = Field(
+        default_factory=lambda: ["latency", "uptime", "features"],
+        description="Dimensions passed to /api/v1/compare.",
+    )
+    signal_weights: dict[str, float] = Field(
+        default_factory=lambda: dict(DEFAULT_SIGNAL_WEIGHTS),
+        description="Weight of each ranking signal; see DEFAULT_SIGNAL_WEIGHTS.",
+    )
+
+    _pool: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _pool_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Threads for the sync fan-out: one per metrics call plus compare."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=_MAX_TOP_K + 1,
+                    thread_name_prefix="mcp-selection",
+                )
+            return self._pool
+
+    def close(self) -> None:
+        """Release the fan-out threads and the discovery tool's connections."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+        self.discovery.close()
+
+    async def aclose(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+        await self.discovery.aclose()
+
+    def _subcalls(self, ids: list[str], time_range: str) -> dict[tuple, tuple[str, dict]]:
+        """``(kind, id) -> (path, payload)`` for the metrics and compare fan-out."""
+        calls = {
+            ("metrics", ident): (METRICS_PATH, {"server_id": ident, "time_range": time_range})
+            for ident in ids
+        }
+        if len(ids) >= 2:
+            calls[("compare", None)] = (
+                COMPARE_PATH, {"server_ids": ids, "compare_by": list(self.compare_by)}
+            )
+        return calls
+
+    def _merge(
+        self, query: str, servers: list[dict], outcomes: dict[tuple, Any]
+    ) -> tuple[str, list[dict]]:
+        """Rank with whatever sub-calls succeeded and note the ones that did not."""
+        metrics: dict[str, dict] = {}
+        comparison = None
+        failed_metrics: dict[str, list[str]] = {}
+        missing = []
+        for (kind, ident), outcome in outcomes.items():
+            if isinstance(outcome, BaseException):
+                if kind == "metrics":
+                    failed_metrics.setdefault(_reason(outcome), []).append(ident)
+                else:
+                    missing.append(f"compare {_reason(outcome)}")
+            elif kind == "metrics":
+                metrics[ident] = outcome
+            else:
+                comparison = outcome
+        for reason, ids in failed_metrics.items():
+            missing.insert(0, f"metrics {reason} for {', '.join(ids)}")
+        rows = merge_selection(servers, metrics, comparison, self.signal_weights)
+        return _format_selection(query, rows, missing), rows
+
+    def _discover(self, query: str, top_k: int) -> tuple[str, list[dict]]:
+        call, token, start = self.discovery._begin_call(False)
+        try:
+            return self.discovery._discover(query, top_k, False, call)
+        finally:
+            self.discovery._end_call(call, token, start)
+
+    async def _adiscover(self, query: str, top_k: int) -> tuple[str, list[dict]]:
+        call, token, start = self.discovery._begin_call(False)
+        try:
+            return await self.discovery._adiscover(query, top_k, False, call)
+        finally:
+            self.discovery._end_call(call, token, start)
+
+    def select(self, query: str, top_k: int = 3, time_range: str = "24h") -> tuple[str, list[dict]]:
+        """Discover, fan out and merge (synchronous).
+
+        Returns:
+            The text for the agent and the merged rows (see
+            :func:`merge_selection`); the rows are empty if discovery found
+            nothing or failed.
+        """
+        if self.discovery._use_shared_loop():
+            return self.discovery._submit(None, self.aselect(query, top_k, time_range)).result()
+        text, servers = self._discover(query, top_k)
+        if not servers:
+            return text, []
+        servers = servers[:top_k]
+        if self.discovery.mode != "api":
+            return self._merge(query, servers, {})
+        calls = self._subcalls([s.get("server") for s in servers if s.get("server")], time_range)
+        pool = self._get_pool()
+        futures = {
+            key: pool.submit(self.discovery._call_api, path, payload, self.subcall_timeout)
+            for key, (path, payload) in calls.items()
+        }
+        # The calls time themselves out too; this bounds the wait for stragglers.
+        wait(futures.values(), timeout=self.subcall_timeout + 0.1)
+        outcomes: dict[tuple, Any] = {}
+        for key, future in futures.items():
+            if not future.done():
+                future.cancel()
+                outcomes[key] = asyncio.TimeoutError()
+            else:
+                outcomes[key] = future.exception() or future.result()
+        return self._merge(query, servers, outcomes)
+
+    async def aselect(
+        self, query: str, top_k: int = 3, time_range: str = "24h"
+    ) -> tuple[str, list[dict]]:
+        """Async :meth:`select`; sub-calls that overrun are cancelled."""
+        text, servers = await self._adiscover(query, top_k)
+        if not servers:
+            return text, []
+        servers = servers[:top_k]
+        if self.discovery.mode != "api":
+            return self._merge(query, servers, {})
+        calls = self._subcalls([s.get("server") for s in servers if s.get("server")], time_range)
+
+        async def bounded(path: str, payload: dict) -> dict:
+            return await asyncio.wait_for(
+                self.discovery._acall_api(path, payload, self.subcall_timeout),
+                self.subcall_timeout,
+            )
+
+        results = await asyncio.gather(
+            *(bounded(path, payload) for path, payload in calls.values()),
+            return_exceptions=True,
+        )
+        return self._merge(query, servers, dict(zip(calls, results)))
+
+    def _respond(self, text: str, rows: list[dict]) -> Any:
+        return (text, rows) if self.response_format == "content_and_artifact" else text
+
+    def _run(
+        self,
+        query: str,
+        top_k: int = 3,
+        time_range: str = "24h",
+        run_manager: Optional[Any] = None,
+    ) -> Any:
+        """Discover servers for ``query`` and rank the top ``top_k`` (synchronous).
+
+        Returns:
+            The ranked servers as text; with ``response_format=
+            "content_and_artifact"``, a ``(text, rows)`` tuple.
+        """
+        return self._respond(*self.select(query, top_k, time_range))
+
+    async def _arun(
+        self,
+        query: str,
+        top_k: int = 3,
+        time_range: str = "24h",
+        run_manager: Optional[Any] = None,
+    ) -> Any:
+        """Async :meth:`_run`."""
+        if self.discovery._use_shared_loop():
+            future = self.discovery._submit(None, self.aselect(query, top_k, time_range))
+            return self._respond(*await asyncio.wrap_future(future))
+        return self._respond(*await self.aselect(query, top_k, time_range))
+
+
+def _reason(error: BaseException) -> str:
+    """Short description of why a sub-call produced no answer."""
+    if isinstance(error, asyncio.TimeoutError) or _raised_by(error, "requests", "exceptions.Timeout"):
+        return "timed out"
+    return f"failed ({_error_message(error)})"
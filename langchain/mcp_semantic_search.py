@@ -0,0 +1,366 @@
+"""Offline semantic search for the MCP Discovery LangChain tool.
+
+Local keyword search only matches query tokens as substrings, so "persist
+data" never finds a database server that describes itself as "storage" or
+"sql". This module embeds the bundled snapshot into dense vectors without
+any external service, latent-semantic-analysis style:
+
+1. Each record's name, slug and description become hashed TF-IDF features:
+   words plus boundary-marked character trigrams ("persist" shares grams
+   with "persistence", "data" with "database"). Features are signed-hashed
+   into ``2**n_features_log2`` buckets, so there is no vocabulary to store.
+   Words in a small curated lexicon (``_CONCEPTS``) also emit a shared
+   concept feature, so "persist" lands next to "PostgreSQL" even though the
+   snapshot never uses them together.
+2. A randomized truncated SVD of that sparse matrix projects the features
+   onto the ``dim`` directions that carry the most co-occurrence signal.
+   Words that appear in the same kinds of descriptions end up close.
+3. Rows are L2-normalized and stored as one C-contiguous float32 matrix.
+
+A query is embedded the same way and answered with a single matrix-vector
+product (cosine similarity against every record) plus ``argpartition`` for
+the top k. NumPy is the only dependency; sparse products are done with
+``reduceat`` over CSR-ordered arrays.
+"""
+
+from typing import Optional, Sequence
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from mcp_local_search import _js_round, load_local_dataset, local_trust_score, tokenize
+
+# Floats gathered per block in sparse products; bounds temporary memory (16 MiB).
+_CHUNK_ELEMENTS = 1 << 22
+
+# Words that name the same capability. Co-occurrence in a few thousand
+# descriptions cannot teach that "persist" is about databases (in the
+# snapshot it mostly appears next to "memory"), so every word in a group
+# also emits a shared concept feature, and "persist data" meets "PostgreSQL
+# server" on it.
+_CONCEPTS: dict[str, tuple[str, ...]] = {
+    "storage": (
+        "persist", "persists", "persisted", "persisting", "persistent", "persistence",
+        "store", "stores", "stored", "storing", "storage", "save", "saves", "saving",
+        "database", "databases", "db", "dbs", "sql", "nosql", "postgres", "postgresql",
+        "mysql", "mariadb", "sqlite", "mongodb", "mongo", "redis", "supabase",
+        "dynamodb", "firestore", "firebase", "cassandra", "clickhouse", "duckdb",
+        "snowflake", "bigquery", "neo4j", "couchdb", "prisma", "tables", "rows",
+    ),
+    "email": (
+        "email", "emails", "mail", "mails", "gmail", "smtp", "imap", "inbox",
+        "outlook", "mailbox", "newsletter",
+    ),
+    "chat": (
+        "chat", "chats", "slack", "discord", "telegram", "whatsapp", "teams",
+        "messaging", "messenger", "channel", "channels", "team",
+    ),
+    "browser": (
+        "browser", "browsers", "headless", "puppeteer", "playwright", "selenium",
+        "webpage", "webpages", "scrape", "scraper", "scraping", "crawl", "crawler",
+        "crawling",
+    ),
+    "files": (
+        "file", "files", "filesystem", "folder", "folders", "directory",
+        "directories", "upload", "uploads", "download", "downloads", "s3", "bucket",
+        "buckets", "drive", "dropbox",
+    ),
+    "vcs": (
+        "git", "github", "gitlab", "bitbucket", "repository", "repositories", "repo",
+        "repos", "commit", "commits", "pull",
+    ),
+    "infra": (
+        "kubernetes", "k8s", "docker", "container", "containers", "deploy",
+        "deployment", "deployments", "aws", "gcp", "azure", "terraform", "cluster",
+        "clusters", "serverless",
+    ),
+    "payments": (
+        "payment", "payments", "pay", "stripe", "invoice", "invoices", "billing",
+        "checkout", "paypal", "subscription", "subscriptions",
+    ),
+    "calendar": (
+        "calendar", "calendars", "meeting", "meetings", "schedule", "scheduling",
+        "appointment", "appointments", "event", "events",
+    ),
+    "notes": (
+        "notion", "confluence", "wiki", "obsidian", "note", "notes", "notebook",
+        "knowledge",
+    ),
+    "search": (
+        "search", "searches", "searching", "lookup", "retrieval", "retrieve",
+        "google", "bing", "duckduckgo", "serp",
+    ),
+    "finance": (
+        "stock", "stocks", "trading", "trade", "market", "markets", "crypto",
+        "finance", "financial", "portfolio", "forex",
+    ),
+    "maps": (
+        "map", "maps", "location", "locations", "geocode", "geocoding", "places",
+        "directions", "route", "routes",
+    ),
+}
+_CONCEPT_OF = {word: concept for concept, words in _CONCEPTS.items() for word in words}
+# A concept feature weighs this many times a word feature.
+_CONCEPT_WEIGHT = 2.0
+
+
+class HashedTfidfEmbedder:
+    """Hashed TF-IDF features reduced to dense vectors with a randomized SVD.
+
+    Args:
+        dim: Size of the dense vectors.
+        n_features_log2: Hashed feature space is ``2 ** n_features_log2`` wide.
+        ngram: Character n-gram length (``0`` disables n-grams).
+        seed: Seed for the SVD's random projection.
+    """
+
+    def __init__(self, dim: int = 128, n_features_log2: int = 17, ngram: int = 3, seed: int = 0) -> None:
+        self.dim = dim
+        self.n_features = 1 << n_features_log2
+        self.ngram = ngram
+        self.seed = seed
+        self.idf: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None  # (n_features, dim) float32
+        self._token_features: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    def _features(self, token: str) -> tuple[np.ndarray, np.ndarray]:
+        """Hashed bucket ids and signs for one token: the word and its n-grams."""
+        cached = self._token_features.get(token)
+        if cached is not None:
+            return cached
+        grams = [f"w:{token}"]
+        weights = [1.0]
+        if self.ngram:
+            marked = f"<{token}>"
+            ngrams = [marked[i:i + self.ngram] for i in range(len(marked) - self.ngram + 1)]
+            # Words weigh as much as all of their n-grams together.
+            grams.extend(ngrams)
+            weights.extend([1.0 / len(ngrams)] * len(ngrams))
+        concept = _CONCEPT_OF.get(token)
+        if concept is not None:
+            grams.append(f"c:{concept}")
+            weights.append(_CONCEPT_WEIGHT)
+        hashes = np.array([zlib.crc32(g.encode()) for g in grams], dtype=np.uint32)
+        ids = (hashes & np.uint32(self.n_features - 1)).astype(np.int32)
+        signs = np.where(hashes & np.uint32(1 << 31), -1.0, 1.0).astype(np.float32)
+        signs *= np.array(weights, dtype=np.float32)
+        cached = self._token_features[token] = (ids, signs)
+        return cached
+
+    def _sparse_rows(self, texts: Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR arrays ``(indptr, indices, values)`` of sublinear term frequencies."""
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        indices: list[np.ndarray] = []
+        values: list[np.ndarray] = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            counts: dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            row_ids: list[np.ndarray] = []
+            row_vals: list[np.ndarray] = []
+            for token, count in counts.items():
+                ids, signs = self._features(token)
+                row_ids.append(ids)
+                row_vals.append(signs * (1.0 + math.log(count)))
+            if row_ids:
+                ids = np.concatenate(row_ids)
+                vals = np.concatenate(row_vals)
+                # Merge colliding buckets so each row has unique columns.
+                ids, inverse = np.unique(ids, return_inverse=True)
+                vals = np.bincount(inverse, weights=vals).astype(np.float32)
+                indices.append(ids)
+                values.append(vals)
+                indptr[row + 1] = indptr[row] + len(ids)
+            else:
+                indptr[row + 1] = indptr[row]
+        if indices:
+            return indptr, np.concatenate(indices), np.concatenate(values)
+        return indptr, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+    def _weighted(self, texts: Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        indptr, indices, values = self._sparse_rows(texts)
+        return indptr, indices, values * self.idf[indices]
+
+    @staticmethod
+    def _matmul(indptr: np.ndarray, indices: np.ndarray, values: np.ndarray, dense: np.ndarray) -> np.ndarray:
+        """Sparse (CSR) @ dense, a bounded block of nonzeros at a time."""
+        n_rows = len(indptr) - 1
+        out = np.zeros((n_rows, dense.shape[1]), dtype=np.float32)
+        step = max(1, _CHUNK_ELEMENTS // dense.shape[1])
+        row = 0
+        while row < n_rows:
+            # Whole rows, about ``step`` nonzeros per block.
+            end = int(np.searchsorted(indptr, indptr[row] + step, side="right")) - 1
+            end = min(max(end, row + 1), n_rows)
+            lo, hi = indptr[row], indptr[end]
+            if hi > lo:
+                gathered = dense[indices[lo:hi]] * values[lo:hi, None]
+                nonempty = np.flatnonzero(indptr[row + 1:end + 1] > indptr[row:end])
+                out[row + nonempty] = np.add.reduceat(gathered, indptr[row + nonempty] - lo, axis=0)
+            row = end
+        return out
+
+    def _rmatmul(self, indptr: np.ndarray, indices: np.ndarray, values: np.ndarray, dense: np.ndarray) -> np.ndarray:
+        """``X.T @ dense`` for CSR ``X``, walking the nonzeros in column order."""
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        order = np.argsort(indices, kind="stable")
+        out = np.zeros((self.n_features, dense.shape[1]), dtype=np.float32)
+        step = max(1, _CHUNK_ELEMENTS // dense.shape[1])
+        for lo in range(0, len(order), step):
+            picked = order[lo:lo + step]
+            cols = indices[picked]
+            gathered = dense[rows[picked]] * values[picked, None]
+            starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+            # A column split across two blocks is summed by the ``+=``.
+            out[cols[starts]] += np.add.reduceat(gathered, starts, axis=0)
+        return out
+
+    def fit(self, texts: Sequence[str], n_iter: int = 2) -> "HashedTfidfEmbedder":
+        """Learn IDF weights and the SVD projection from ``texts``."""
+        self.fit_transform(texts, n_iter)
+        return self
+
+    def fit_transform(self, texts: Sequence[str], n_iter: int = 2) -> np.ndarray:
+        """:meth:`fit` on ``texts`` and return their embeddings (featurizes once)."""
+        indptr, indices, values = self._sparse_rows(texts)
+        df = np.bincount(indices, minlength=self.n_features)
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        values = values * self.idf[indices]
+        matrix = (indptr, indices, values)
+
+        # Randomized SVD (Halko et al.) of the n x n_features matrix X. The
+        # range finder orthonormalizes on the document side only, and the
+        # right singular vectors come from the small r x r Gram matrix of
+        # B = Q.T @ X, so nothing n_features wide is ever factorized.
+        rank = min(self.dim + 16, len(texts))
+        rng = np.random.default_rng(self.seed)
+        omega = rng.standard_normal((self.n_features, rank), dtype=np.float32)
+        basis = self._matmul(*matrix, omega)
+        for _ in range(n_iter):
+            basis, _ = np.linalg.qr(basis)
+            basis = self._matmul(*matrix, self._rmatmul(*matrix, basis))
+        basis, _ = np.linalg.qr(basis)
+        used = np.flatnonzero(df)
+        b_t = self._rmatmul(*matrix, basis)[used]  # B.T restricted to features that occur
+        eigvals, eigvecs = np.linalg.eigh((b_t.T @ b_t).astype(np.float64))
+        top = np.argsort(eigvals)[::-1][: self.dim]
+        top = top[eigvals[top] > 1e-9]
+        components = np.zeros((self.n_features, len(top)), dtype=np.float32)
+        components[used] = b_t @ (eigvecs[:, top] / np.sqrt(eigvals[top])).astype(np.float32)
+        self.components = components
+        return _normalize(self._matmul(*matrix, components))
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text."""
+        if self.components is None:
+            raise RuntimeError("fit() the embedder first")
+        return _normalize(self._matmul(*self._weighted(texts), self.components))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def record_text(record: dict) -> str:
+    """The text embedded for a record: name, slug and description."""
+    return " ".join(filter(None, (record.get("name"), record.get("slug"), record.get("description"))))
+
+
+class SemanticSearchEngine:
+    """Cosine-similarity search over a float32 embedding matrix.
+
+    Args:
+        records: Normalized records, as from ``load_local_dataset``.
+        embedder: A fitted embedder; by default one is fitted on ``records``.
+        vectors: Precomputed embeddings for ``records`` (skips embedding).
+        min_similarity: Results below this cosine similarity are dropped.
+    """
+
+    def __init__(
+        self,
+        records: list[dict],
+        embedder: Optional[HashedTfidfEmbedder] = None,
+        vectors: Optional[np.ndarray] = None,
+        min_similarity: float = 0.2,
+    ) -> None:
+        self.records = records
+        if embedder is None:
+            embedder = HashedTfidfEmbedder()
+            vectors = embedder.fit_transform([record_text(r) for r in records])
+        elif vectors is None:
+            vectors = embedder.transform([record_text(r) for r in records])
+        self.embedder = embedder
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()  # the embedder's token cache is not thread-safe
+
+    def embed(self, query: str) -> np.ndarray:
+        with self._lock:
+            return self.embedder.transform([query])[0]
+
+    def top_k(self, query_vector: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Indices and similarities of the ``k`` best rows, best first."""
+        scores = self.vectors @ query_vector
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if k < len(scores):
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+        best = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return best, scores[best]
+
+    def search(self, query: str, limit: int) -> list[tuple[dict, float]]:
+        """``(record, similarity)`` pairs for ``query``, best first."""
+        if not tokenize(query):
+            return []
+        indices, scores = self.top_k(self.embed(query), limit)
+        return [
+            (self.records[i], float(s)) for i, s in zip(indices, scores) if s >= self.min_similarity
+        ]
+
+    def discover(self, query: str, limit: int = 5) -> list[dict]:
+        """Recommendations shaped like ``POST /api/v1/discover`` in local mode."""
+        return [
+            {
+                "server": record["slug"],
+                "npm_package": record["npm_package"],
+                "install_command": record["install_command"],
+                "confidence": _js_round(min(1.0, similarity) * 100) / 100,
+                "description": record["description"],
+                "category": record["category"],
+                "capabilities": [],
+                "metrics": {"avg_latency_ms": None, "uptime_pct": None, "last_checked": None},
+                "docs_url": record["docs_url"],
+                "github_url": record["github_url"],
+                "is_verified": False,
+                "trust_score": local_trust_score(record["stars"]),
+            }
+            for record, similarity in self.search(query, limit)
+        ]
+
+
+_engine: Optional[SemanticSearchEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_semantic_engine() -> SemanticSearchEngine:
+    """Return the process-wide engine, embedding the snapshot on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SemanticSearchEngine(load_local_dataset())
+        return _engine
+
+
+def reset_semantic_engine() -> None:
+    """Test hook: drop the memoized engine so the next call re-embeds."""
+    global _engine
+    with _engine_lock:
+        _engine = None
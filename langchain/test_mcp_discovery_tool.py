@@ -1,10 +1,22 @@
 """Unit tests for MCP Discovery Tool."""
 
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from mcp_discovery_tool import MCPDiscoveryTool, create_mcp_discovery_tool
 
 
+def _json_bytes(body):
+    """Encode a mock API response body the way the server sends it."""
+    return json.dumps(body).encode()
+
+
 class TestMCPDiscoveryTool(unittest.TestCase):
     """Test cases for MCPDiscoveryTool."""
     
@@ -24,12 +36,12 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         tool = create_mcp_discovery_tool(api_url=custom_url)
         self.assertEqual(tool.api_url, custom_url)
     
-    @patch('mcp_discovery_tool.requests.post')
+    @patch('mcp_discovery_tool.requests.Session.post')
     def test_successful_discovery(self, mock_post):
         """Test successful server discovery."""
         # Mock API response
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = _json_bytes({
             "recommendations": [
                 {
                     "name": "PostgreSQL MCP Server",
@@ -41,7 +53,7 @@ class TestMCPDiscoveryTool(unittest.TestCase):
                     "github_url": "https://github.com/example/postgres-mcp"
                 }
             ]
-        }
+        })
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -60,11 +72,11 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         self.assertIn("/api/v1/discover", call_args[0][0])
         self.assertEqual(call_args[1]["json"]["need"], "database access")
     
-    @patch('mcp_discovery_tool.requests.post')
+    @patch('mcp_discovery_tool.requests.Session.post')
     def test_no_results_found(self, mock_post):
         """Test handling when no servers match the query."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"recommendations": []}
+        mock_response.content = _json_bytes({"recommendations": []})
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -73,7 +85,7 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         self.assertIn("No MCP servers found", result)
         self.assertIn("nonexistent capability", result)
     
-    @patch('mcp_discovery_tool.requests.post')
+    @patch('mcp_discovery_tool.requests.Session.post')
     def test_timeout_handling(self, mock_post):
         """Test handling of API timeout."""
         import requests
@@ -83,7 +95,7 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         
         self.assertIn("timed out", result.lower())
     
-    @patch('mcp_discovery_tool.requests.post')
+    @patch('mcp_discovery_tool.requests.Session.post')
     def test_connection_error_handling(self, mock_post):
         """Test handling of connection errors."""
         import requests
@@ -93,11 +105,11 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         
         self.assertIn("Error connecting", result)
     
-    @patch('mcp_discovery_tool.requests.post')
+    @patch('mcp_discovery_tool.requests.Session.post')
     def test_multiple_servers_returned(self, mock_post):
         """Test formatting of multiple server results."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = _json_bytes({
             "recommendations": [
                 {
                     "name": "Server 1",
@@ -115,7 +127,7 @@ class TestMCPDiscoveryTool(unittest.TestCase):
                     "install_command": "npm install server3"
                 }
             ]
-        }
+        })
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -129,18 +141,18 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         self.assertIn("Server 2", result)
         self.assertIn("Server 3", result)
     
-    @patch('mcp_discovery_tool.requests.post')
+    @patch('mcp_discovery_tool.requests.Session.post')
     def test_server_without_metrics(self, mock_post):
         """Test handling of servers without performance metrics."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = _json_bytes({
             "recommendations": [
                 {
                     "name": "Basic Server",
                     "description": "A basic server without metrics"
                 }
             ]
-        }
+        })
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
@@ -162,6 +174,1398 @@ class TestMCPDiscoveryTool(unittest.TestCase):
         self.assertIsNotNone(field.description)
 
 
+class TestConnectionPooling(unittest.TestCase):
+    """Test pooled HTTP session lifecycle."""
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_sync_session_reused_across_calls(self, mock_post):
+        """Test repeated calls share one pooled requests session."""
+        mock_response = MagicMock()
+        mock_response.content = _json_bytes({"recommendations": []})
+        mock_post.return_value = mock_response
+
+        tool = create_mcp_discovery_tool()
+        tool.run("database")
+        session = tool._session
+        tool.run("email")
+
+        self.assertIsNotNone(session)
+        self.assertIs(tool._session, session)
+        self.assertEqual(mock_post.call_count, 2)
+
+        tool.close()
+        self.assertIsNone(tool._session)
+
+    def test_async_session_per_loop_and_aclose(self):
+        """Test the async session is reused within a loop and closed on exit."""
+        async def scenario():
+            async with create_mcp_discovery_tool() as tool:
+                first = tool._get_async_session()
+                self.assertIs(tool._get_async_session(), first)
+            return first
+
+        session = asyncio.run(scenario())
+        self.assertTrue(session.closed)
+
+
+class TestResultCache(unittest.TestCase):
+    """Test the client-side discovery cache."""
+
+    def _response(self, name):
+        mock_response = MagicMock()
+        mock_response.content = _json_bytes({"recommendations": [{"name": name}]})
+        return mock_response
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_repeated_query_served_from_cache(self, mock_post):
+        """Test normalized repeats of a query hit the cache."""
+        mock_post.return_value = self._response("Postgres Server")
+        tool = create_mcp_discovery_tool()
+
+        first = tool.run("postgres database")
+        second = tool.run("  Postgres   DATABASE ")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertIn("Postgres Server", second)
+        self.assertEqual(first.split("\n")[1:], second.split("\n")[1:])
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_force_refresh_skips_and_overwrites_cache(self, mock_post):
+        """Test force_refresh goes to the API and replaces the cached entry."""
+        mock_post.side_effect = [self._response("Old"), self._response("New")]
+        tool = create_mcp_discovery_tool()
+
+        tool.run("email")
+        refreshed = tool.run({"query": "email", "force_refresh": True})
+        cached = tool.run("email")
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIn("New", refreshed)
+        self.assertIn("New", cached)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at capacity."""
+        from mcp_discovery_tool import _ResultCache
+
+        cache = _ResultCache(maxsize=2, ttl=60)
+        cache.set(("a", 5), [])
+        cache.set(("b", 5), [])
+        cache.get(("a", 5))
+        cache.set(("c", 5), [])
+
+        self.assertIsNone(cache.get(("b", 5)))
+        self.assertIsNotNone(cache.get(("a", 5)))
+        self.assertEqual(len(cache), 2)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_persistent_cache_shared_across_tools(self, mock_post):
+        """Test a cache_path entry written by one tool is served to a fresh one."""
+        mock_post.return_value = self._response("Postgres Server")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            with MCPDiscoveryTool(cache_path=path) as first:
+                first.run("postgres")
+            with MCPDiscoveryTool(cache_path=path) as second:
+                result = second.run("postgres")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertIn("Postgres Server", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_persistent_cache_keyed_by_projection(self, mock_post):
+        """Test a projected table answer is not served to a full-format tool."""
+        mock_post.side_effect = [self._response("Table Server"), self._response("Full Server")]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            with MCPDiscoveryTool(cache_path=path, output_format="table") as table:
+                table.run("postgres")
+            with MCPDiscoveryTool(cache_path=path, output_format="full") as full:
+                result = full.run("postgres")
+            with MCPDiscoveryTool(cache_path=path, api_url="http://other:3000") as other:
+                self.assertIsNone(other._cache.get(other._key("postgres", 5)))
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIn("Full Server", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_persistent_cache_write_contention_is_a_miss(self, mock_post):
+        """Test a cache write blocked by another process still returns the API answer."""
+        import sqlite3
+
+        mock_post.return_value = self._response("Postgres Server")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            with MCPDiscoveryTool(cache_path=path) as tool:
+                tool._cache._connect().execute("PRAGMA busy_timeout = 50")
+                holder = sqlite3.connect(path, isolation_level=None)
+                holder.execute("BEGIN IMMEDIATE")
+                try:
+                    result = tool.run("postgres")
+                finally:
+                    holder.execute("ROLLBACK")
+                    holder.close()
+
+        self.assertIn("Postgres Server", result)
+        self.assertNotIn("Unexpected error", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_dataset_version_change_invalidates_cache(self, mock_post):
+        """Test a response with a new X-Dataset-Version drops older entries."""
+        old = self._response("Old")
+        old.headers = {"X-Dataset-Version": "v1"}
+        new = self._response("New")
+        new.headers = {"X-Dataset-Version": "v2"}
+        mock_post.side_effect = [old, new]
+        tool = create_mcp_discovery_tool()
+
+        tool.run("email")
+        tool.run("postgres")
+        self.assertEqual(len(tool._cache), 1)
+        self.assertIn("New", tool.run("postgres"))
+
+    def test_stale_while_revalidate(self):
+        """Test an expired entry is served immediately and refreshed in the background."""
+        tool = MCPDiscoveryTool(cache_ttl=0, stale_while_revalidate=True)
+        tool._cache.set(tool._key("slack", 5), [{"name": "Stale Slack"}])
+
+        async def fetch(query, limit, force_refresh):
+            return [{"name": "Fresh Slack"}]
+
+        async def scenario():
+            with patch.object(MCPDiscoveryTool, "_afetch", side_effect=fetch) as mock_fetch:
+                result = await tool.arun("slack")
+                await asyncio.gather(*tool._refresh_tasks)
+            return result, mock_fetch.call_count
+
+        result, calls = asyncio.run(scenario())
+        self.assertIn("Stale Slack", result)
+        self.assertEqual(calls, 1)
+        self.assertEqual(tool._cache.get(tool._key("slack", 5))[0], [{"name": "Fresh Slack"}])
+
+
+class TestQueryCanonicalization(unittest.TestCase):
+    """Test canonical query keys for the cache and coalescing."""
+
+    def test_equivalent_phrasings_share_a_key(self):
+        """Test stopwords, synonyms, inflections and word order are ignored."""
+        from mcp_discovery_tool import canonical_query
+
+        self.assertEqual(canonical_query("I need a PG database"), canonical_query("postgres databases"))
+        self.assertEqual(canonical_query("Send emails"), canonical_query("email sending"))
+        self.assertEqual(canonical_query("web scraping"), canonical_query("scrape the web"))
+        self.assertNotEqual(canonical_query("slack"), canonical_query("discord"))
+
+    def test_generic_request_words_are_ignored(self):
+        """Test phrasings that differ only in how they ask share a key."""
+        from mcp_discovery_tool import canonical_query
+
+        key = canonical_query("PostgreSQL database")
+        self.assertEqual(canonical_query("I need to query a PostgreSQL database"), key)
+        self.assertEqual(canonical_query("postgres db access"), key)
+        self.assertEqual(canonical_query("query"), "query")
+
+    def test_stopword_only_query_keeps_its_text(self):
+        """Test queries with no content tokens do not collapse to one key."""
+        from mcp_discovery_tool import canonical_query
+
+        self.assertEqual(canonical_query("The MCP  Server"), "the mcp server")
+
+    def test_custom_synonyms(self):
+        """Test the synonyms table is configurable per tool."""
+        tool = MCPDiscoveryTool(query_synonyms={"tg": "telegram"})
+        self.assertEqual(tool._key("tg bot", 5), tool._key("telegram bots", 5))
+        self.assertNotEqual(tool._key("pg", 5), tool._key("postgres", 5))
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_cache_hits_across_phrasings(self, mock_post):
+        """Test a rephrased query is answered from the cache."""
+        mock_post.return_value = _ok_response("Postgres")
+        tool = MCPDiscoveryTool()
+
+        tool.run("postgres database")
+        tool.run("I need a PG db")
+
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_canonicalization_can_be_disabled(self, mock_post):
+        """Test canonicalize_queries=False keys on the normalized text only."""
+        mock_post.return_value = _ok_response("Postgres")
+        tool = MCPDiscoveryTool(canonicalize_queries=False)
+
+        tool.run("postgres database")
+        tool.run("database postgres")
+
+        self.assertEqual(mock_post.call_count, 2)
+
+
+class TestQueryDecomposition(unittest.TestCase):
+    """Test splitting compound needs into concurrently searched intents."""
+
+    RESULTS = {
+        "read from postgres": ["PG Reader", "PG Slack Bridge"],
+        "post results to slack": ["Slack Poster", "PG Slack Bridge"],
+    }
+
+    def _post(self, url, json=None, timeout=None):
+        time.sleep(0.2)
+        response = MagicMock()
+        response.content = _json_bytes({"recommendations": [
+            {"server": name.lower().replace(" ", "-"), "name": name}
+            for name in self.RESULTS.get(json["need"], [])
+        ]})
+        return response
+
+    def test_conjunction_and_verb_splitting(self):
+        """Test clauses split on conjunctions only where a new need starts."""
+        from mcp_discovery_tool import decompose_query
+
+        self.assertEqual(
+            decompose_query("read from postgres and post results to slack"),
+            ["read from postgres", "post results to slack"],
+        )
+        self.assertEqual(
+            decompose_query("scrape websites, summarize pages and then store them in notion"),
+            ["scrape websites", "summarize pages", "store them in notion"],
+        )
+        self.assertEqual(
+            decompose_query("postgres database and slack notifications"),
+            ["postgres database", "slack notifications"],
+        )
+        for single in ("postgres, mysql and sqlite", "search and replace", "send emails"):
+            self.assertEqual(decompose_query(single), [single])
+
+    def test_intents_are_capped(self):
+        """Test intents past max_intents are folded into the last one."""
+        from mcp_discovery_tool import decompose_query
+
+        intents = decompose_query("read files; write files; upload to s3; send email", max_intents=2)
+        self.assertEqual(intents, ["read files", "write files and upload to s3 and send email"])
+
+    def test_reciprocal_rank_fusion(self):
+        """Test servers found by several rankings rise to the top."""
+        from mcp_discovery_tool import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([
+            [{"server": "a"}, {"server": "shared"}],
+            [{"server": "b"}, {"server": "shared"}],
+        ])
+        self.assertEqual([s["server"] for s in fused], ["shared", "a", "b"])
+
+    def test_sub_queries_run_concurrently_and_group(self):
+        """Test each intent is searched at once and reported in its own group."""
+        tool = MCPDiscoveryTool(decompose_queries=True, hedge_requests=False)
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=self._post) as mock_post:
+            start = time.monotonic()
+            result = tool.run("read from postgres and post results to slack")
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertLess(elapsed, 0.35)
+        self.assertIn("covers 2 needs", result)
+        first, second = result.split("[2/2]")
+        self.assertIn("[1/2] Found 2 MCP server(s) for: 'read from postgres'", first)
+        self.assertIn("for: 'post results to slack'", second)
+        # the server matching both intents leads both groups
+        self.assertLess(first.index("PG Slack Bridge"), first.index("PG Reader"))
+        self.assertLess(second.index("PG Slack Bridge"), second.index("Slack Poster"))
+
+    def test_intent_metrics_are_aggregated(self):
+        """Test a partly cached compound call reports "partial" and the fused count."""
+        tool = MCPDiscoveryTool(decompose_queries=True, hedge_requests=False)
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=self._post):
+            tool.run("read from postgres")
+            tool.run("read from postgres and post results to slack")
+
+            async def compound():
+                await tool.arun("read from postgres and post results to slack")
+
+            asyncio.run(compound())
+
+        stats = tool.get_stats()
+        self.assertEqual(stats["cache"]["misses"], 1)
+        self.assertEqual(stats["cache"]["partial"], 1)
+        self.assertEqual(stats["cache"]["hits"], 1)
+        # 2 for the single intent, then 3 fused servers for each compound call
+        self.assertEqual(stats["results"]["sum"], 2 + 3 + 3)
+
+    def test_async_artifact_is_fused(self):
+        """Test arun searches intents concurrently and returns the fused ranking."""
+        tool = MCPDiscoveryTool(
+            decompose_queries=True, response_format="content_and_artifact", hedge_requests=False
+        )
+        needs = []
+
+        async def fake_post(payload, timeout):
+            needs.append(payload["need"])
+            await asyncio.sleep(0.1)
+            return json.loads(self._post(None, payload).content)["recommendations"]
+
+        tool._apost = fake_post
+        message = asyncio.run(tool.ainvoke({
+            "type": "tool_call", "id": "1", "name": tool.name,
+            "args": {"query": "read from postgres and post results to slack"},
+        }))
+        self.assertEqual(sorted(needs), sorted(self.RESULTS))
+        self.assertEqual(
+            [s.server for s in message.artifact],
+            ["pg-slack-bridge", "pg-reader", "slack-poster"],
+        )
+
+    def test_failed_intent_reports_its_error(self):
+        """Test one failing sub-query does not hide the other's results."""
+        import requests
+
+        def post(url, json=None, timeout=None):
+            if "slack" in json["need"]:
+                raise requests.exceptions.ConnectionError("down")
+            return self._post(url, json, timeout)
+
+        tool = MCPDiscoveryTool(decompose_queries=True, max_retries=0, hedge_requests=False)
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=post):
+            result = tool.run("read from postgres and post results to slack")
+        self.assertIn("PG Reader", result)
+        self.assertIn("[2/2] Error connecting", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_disabled_by_default(self, mock_post):
+        """Test compound needs are sent as one query unless enabled."""
+        mock_post.return_value = _ok_response("Anything")
+        MCPDiscoveryTool().run("read from postgres and post results to slack")
+        self.assertEqual(mock_post.call_count, 1)
+
+
+class TestResultSubsumption(unittest.TestCase):
+    """Test smaller and filtered queries answered from a prefetched window."""
+
+    SERVERS = [
+        {"server": f"s{i}", "name": f"Server {i}", "confidence": 0.9 - i * 0.01,
+         "category": ("database", "communication")[i % 2],
+         "is_verified": i % 3 == 0, "trust_score": 50 + i * 2}
+        for i in range(20)
+    ]
+
+    def _post(self, url, json=None, timeout=None):
+        response = MagicMock()
+        response.content = _json_bytes({"recommendations": self.SERVERS[: json["limit"]]})
+        return response
+
+    def test_first_miss_fetches_window(self):
+        """Test a limit=5 miss fetches 20 and a later limit=10 is served locally."""
+        tool = MCPDiscoveryTool()
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=self._post) as mock_post:
+            first = tool.run({"query": "database", "limit": 5})
+            second = tool.run({"query": "databases", "limit": 10})
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(mock_post.call_args[1]["json"]["limit"], 20)
+        self.assertIn("Found 5 MCP server(s)", first)
+        self.assertIn("Found 10 MCP server(s)", second)
+        self.assertEqual(tool.get_stats()["cache"]["hits"], 1)
+
+    def test_filters_answered_locally(self):
+        """Test category, verified-only and trust filters apply to the cached window."""
+        tool = MCPDiscoveryTool(response_format="content_and_artifact")
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=self._post) as mock_post:
+            tool.invoke({"query": "database"})
+            by_category = tool._run("database", limit=5, category="Communication")[1]
+            verified = tool._run("database", limit=20, verified_only=True)[1]
+            trusted = tool._run("database", limit=3, min_trust_score=80)[1]
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual([s.server for s in by_category], ["s1", "s3", "s5", "s7", "s9"])
+        self.assertEqual([s.server for s in verified], [f"s{i}" for i in range(0, 20, 3)])
+        self.assertEqual([s.server for s in trusted], ["s15", "s16", "s17"])
+
+    def test_subsets_share_validated_models(self):
+        """Test artifacts cut from one cached window reuse its typed models."""
+        tool = MCPDiscoveryTool(response_format="content_and_artifact")
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=self._post):
+            full = tool._run("database", limit=20)[1]
+            head = tool._run("database", limit=3)[1]
+        self.assertTrue(all(a is b for a, b in zip(head, full)))
+
+    def test_prefetch_can_be_disabled(self):
+        """Test prefetch_limit=0 fetches exactly the requested limit per call."""
+        tool = MCPDiscoveryTool(prefetch_limit=0)
+        with patch('mcp_discovery_tool.requests.Session.post', side_effect=self._post) as mock_post:
+            tool.run({"query": "database", "limit": 5})
+            tool.run({"query": "database", "limit": 10})
+
+        self.assertEqual([c[1]["json"]["limit"] for c in mock_post.call_args_list], [5, 10])
+
+    def test_embedded_results_carry_category(self):
+        """Test embedded recommendations include the category the filter reads."""
+        tool = MCPDiscoveryTool(mode="embedded", response_format="content_and_artifact")
+        _, servers = tool._run("postgres database", limit=10)
+        self.assertTrue(any(s.category for s in servers))
+        category = next(s.category for s in servers if s.category)
+        _, filtered = tool._run("postgres database", limit=10, category=category)
+        self.assertTrue(filtered)
+        self.assertTrue(all(s.category == category for s in filtered))
+
+
+class TestBatchDiscovery(unittest.TestCase):
+    """Test batch discovery and in-flight request coalescing."""
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_batch_discover_preserves_order(self, mock_post):
+        """Test results come back in query order."""
+        def respond(url, json, timeout):
+            mock_response = MagicMock()
+            mock_response.content = _json_bytes({
+                "recommendations": [{"name": f"{json['need']} server"}]
+            })
+            return mock_response
+
+        mock_post.side_effect = respond
+        tool = create_mcp_discovery_tool()
+
+        results = tool.batch_discover(["database", "email", "weather"])
+
+        self.assertEqual(len(results), 3)
+        for query, result in zip(["database", "email", "weather"], results):
+            self.assertIn(f"{query} server", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_concurrent_identical_queries_coalesce(self, mock_post):
+        """Test identical in-flight queries share one POST."""
+        import time
+
+        def respond(url, json, timeout):
+            time.sleep(0.1)
+            mock_response = MagicMock()
+            mock_response.content = _json_bytes({"recommendations": [{"name": "DB"}]})
+            return mock_response
+
+        mock_post.side_effect = respond
+        tool = MCPDiscoveryTool(cache_maxsize=0)
+
+        results = tool.batch_discover(["database"] * 6, max_concurrency=6)
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertTrue(all("DB" in r for r in results))
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_forced_refresh_does_not_join_normal_request(self, mock_post):
+        """Test a force_refresh call sends its own POST while a normal one is in flight."""
+        import threading
+
+        started = threading.Event()
+
+        def respond(url, json, timeout):
+            if not json["force_refresh"]:
+                started.set()
+                time.sleep(0.2)
+            mock_response = MagicMock()
+            mock_response.content = _json_bytes(
+                {"recommendations": [{"name": "Fresh" if json["force_refresh"] else "Stale"}]}
+            )
+            return mock_response
+
+        mock_post.side_effect = respond
+        tool = MCPDiscoveryTool(cache_maxsize=0)
+        normal = threading.Thread(target=tool.run, args=("database",))
+        normal.start()
+        started.wait(1)
+
+        result = tool.run({"query": "database", "force_refresh": True})
+        normal.join()
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIn("Fresh", result)
+
+    def test_async_forced_refresh_does_not_join_normal_request(self):
+        """Test async force_refresh callers lead their own request too."""
+        async def fetch(query, limit, force_refresh):
+            await asyncio.sleep(0.05)
+            return [{"name": "Fresh" if force_refresh else "Stale"}]
+
+        tool = MCPDiscoveryTool(cache_maxsize=0)
+
+        async def scenario():
+            with patch.object(MCPDiscoveryTool, "_afetch", side_effect=fetch) as mock_fetch:
+                _, forced = await asyncio.gather(
+                    tool.arun("slack"), tool.arun({"query": "slack", "force_refresh": True})
+                )
+            return forced, mock_fetch.call_count
+
+        forced, calls = asyncio.run(scenario())
+        self.assertEqual(calls, 2)
+        self.assertIn("Fresh", forced)
+
+    def test_async_batch_coalesces(self):
+        """Test abatch_discover sends one request per distinct query."""
+        async def fetch(query, limit, force_refresh):
+            await asyncio.sleep(0.05)
+            return [{"name": f"{query} server"}]
+
+        tool = MCPDiscoveryTool(cache_maxsize=0)
+
+        async def scenario():
+            with patch.object(MCPDiscoveryTool, "_afetch", side_effect=fetch) as mock_fetch:
+                results = await tool.abatch_discover(["slack", "github", "slack", "slack"])
+            return results, mock_fetch.call_count
+
+        results, calls = asyncio.run(scenario())
+        self.assertEqual(calls, 2)
+        self.assertIn("slack server", results[2])
+        self.assertIn("github server", results[1])
+
+
+class TestEmbeddedMode(unittest.TestCase):
+    """Test in-process discovery over the bundled snapshot."""
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_embedded_mode_makes_no_http_calls(self, mock_post):
+        """Test embedded mode answers from the local index without the API."""
+        tool = create_mcp_discovery_tool(mode="embedded")
+
+        result = tool.run("send slack messages")
+
+        mock_post.assert_not_called()
+        self.assertIsNone(tool._session)
+        self.assertIn("slack", result.lower())
+        self.assertIn("Install:", result)
+
+    def test_embedded_mode_async(self):
+        """Test arun works in embedded mode."""
+        tool = create_mcp_discovery_tool(mode="embedded")
+        result = asyncio.run(tool.arun("postgres database"))
+        self.assertIn("MCP server(s)", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_semantic_mode(self, mock_post):
+        """Test semantic mode ranks the snapshot by embeddings without the API."""
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        tool = create_mcp_discovery_tool(mode="semantic")
+
+        result = tool.run("browser automation")
+
+        mock_post.assert_not_called()
+        self.assertIn("browser", result.lower())
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_semantic_warm_up_builds_index(self, mock_post):
+        """Test warm-up embeds the snapshot even with nothing to prefetch."""
+        try:
+            import mcp_semantic_search
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        mcp_semantic_search.reset_semantic_engine()
+        tool = create_mcp_discovery_tool(mode="semantic")
+
+        self.assertEqual(tool.warm_up([]).result(timeout=60), 0)
+
+        self.assertIsNotNone(mcp_semantic_search._engine)
+        mock_post.assert_not_called()
+
+
+def _http_error_response(status, headers=None):
+    """Build a mock response whose raise_for_status raises an HTTPError."""
+    import requests
+
+    mock_response = MagicMock()
+    mock_response.status_code = status
+    mock_response.headers = headers or {}
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        f"{status} Error", response=mock_response
+    )
+    return mock_response
+
+
+def _ok_response(name):
+    mock_response = MagicMock()
+    mock_response.content = _json_bytes({"recommendations": [{"name": name}]})
+    return mock_response
+
+
+class TestResilience(unittest.TestCase):
+    """Test retries, hedging, adaptive timeouts and the circuit breaker."""
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_retries_on_5xx_then_succeeds(self, mock_post):
+        """Test a 503 is retried and the retry's answer returned."""
+        mock_post.side_effect = [_http_error_response(503), _ok_response("Recovered")]
+        tool = MCPDiscoveryTool(retry_backoff=0)
+
+        result = tool.run("database")
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIn("Recovered", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_client_errors_are_not_retried(self, mock_post):
+        """Test a 400 fails immediately."""
+        mock_post.return_value = _http_error_response(400)
+        tool = MCPDiscoveryTool(retry_backoff=0)
+
+        result = tool.run("database")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertIn("Error connecting", result)
+
+    def test_backoff_honors_retry_after(self):
+        """Test Retry-After stretches the jittered delay."""
+        import requests
+
+        tool = MCPDiscoveryTool(retry_backoff=0.01, timeout=5)
+        error = requests.exceptions.HTTPError(
+            response=_http_error_response(429, {"Retry-After": "2"})
+        )
+        self.assertGreaterEqual(tool._backoff(0, error), 2)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_circuit_opens_and_falls_back_to_cache(self, mock_post):
+        """Test repeated failures open the circuit and the cached answer is served."""
+        import requests
+
+        tool = MCPDiscoveryTool(max_retries=0, circuit_failure_threshold=2)
+        mock_post.return_value = _ok_response("Cached DB")
+        tool.run("database")
+
+        mock_post.reset_mock()
+        mock_post.return_value = None
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+        tool.run("email")
+        tool.run("email")
+        self.assertEqual(mock_post.call_count, 2)
+
+        result = tool.run({"query": "database", "force_refresh": True})
+        self.assertEqual(mock_post.call_count, 2)  # failed fast, no request
+        self.assertIn("Cached DB", result)
+        self.assertIn("unavailable", result)
+
+        self.assertIn("temporarily unavailable", tool.run("weather"))
+
+    def test_adaptive_timeout_tracks_p99(self):
+        """Test the timeout follows observed latency within its bounds."""
+        tool = MCPDiscoveryTool(timeout=10, min_timeout=0.5)
+        self.assertEqual(tool._request_timeout(), 10)
+
+        for _ in range(50):
+            tool._latency.observe(0.4)
+        self.assertAlmostEqual(tool._request_timeout(), 1.2)
+
+        for _ in range(50):
+            tool._latency.observe(0.01)
+        self.assertGreaterEqual(tool._request_timeout(), 0.5)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_slow_request_is_hedged(self, mock_post):
+        """Test a request outliving p95 is raced by a second attempt."""
+        import time
+
+        calls = []
+
+        def respond(url, json, timeout):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                time.sleep(1.0)
+                return _ok_response("Slow")
+            return _ok_response("Hedge")
+
+        mock_post.side_effect = respond
+        tool = MCPDiscoveryTool(cache_maxsize=0)
+        for _ in range(20):
+            tool._latency.observe(0.02)
+
+        start = time.monotonic()
+        result = tool.run("database")
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertIn("Hedge", result)
+        self.assertEqual(len(calls), 2)
+        tool.close()
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test per-call metrics, get_stats() and the Prometheus export."""
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_stats_count_cache_results_and_retries(self, mock_post):
+        """Test misses, hits, retries and result counts are aggregated."""
+        mock_post.side_effect = [_http_error_response(503), _ok_response("Recovered")]
+        tool = MCPDiscoveryTool(retry_backoff=0)
+
+        tool.run("database")
+        tool.run("database")
+        stats = tool.get_stats()
+
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["cache"]["misses"], 1)
+        self.assertEqual(stats["cache"]["hits"], 1)
+        self.assertEqual(stats["cache"]["hit_rate"], 0.5)
+        self.assertEqual(stats["retries"]["sum"], 1)
+        self.assertEqual(stats["results"]["sum"], 2)
+        self.assertEqual(stats["call_seconds"]["count"], 2)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_metrics_event_reaches_callbacks(self, mock_post):
+        """Test each call dispatches a custom event to the run's handlers."""
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        events = []
+
+        class Recorder(BaseCallbackHandler):
+            def on_custom_event(self, name, data, **kwargs):
+                events.append((name, data))
+
+        mock_post.return_value = _ok_response("Postgres")
+        tool = MCPDiscoveryTool()
+        tool.run("postgres", callbacks=[Recorder()])
+
+        self.assertEqual(len(events), 1)
+        name, data = events[0]
+        self.assertEqual(name, "mcp_discovery_metrics")
+        self.assertEqual(data["cache"], "miss")
+        self.assertEqual(data["results"], 1)
+        self.assertGreater(data["total"], 0)
+
+    def test_async_path_records_wire_metrics(self):
+        """Test the aiohttp path records connect time, TTFB and body size."""
+        from aiohttp import web
+
+        body = b'{"recommendations": [{"name": "Local"}]}'
+
+        async def discover(request):
+            return web.Response(body=body, content_type="application/json")
+
+        async def scenario():
+            app = web.Application()
+            app.router.add_post("/api/v1/discover", discover)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            try:
+                async with MCPDiscoveryTool(api_url=f"http://127.0.0.1:{port}") as tool:
+                    result = await tool.arun("local")
+                    return result, tool.get_stats()
+            finally:
+                await runner.cleanup()
+
+        result, stats = asyncio.run(scenario())
+        self.assertIn("Local", result)
+        self.assertEqual(stats["response_bytes"]["sum"], len(body))
+        self.assertEqual(stats["ttfb_seconds"]["count"], 1)
+        self.assertEqual(stats["connect_seconds"]["count"], 1)
+
+    def test_prometheus_export(self):
+        """Test histograms export as cumulative buckets with sum and count."""
+        from mcp_discovery_tool import _CallMetrics
+
+        tool = MCPDiscoveryTool()
+        call = _CallMetrics()
+        call.total, call.results = 0.03, 4
+        tool._stats.record(call)
+        text = tool.export_prometheus()
+
+        self.assertIn('mcp_discovery_client_cache_lookups_total{result="miss"} 1', text)
+        self.assertIn('mcp_discovery_client_call_seconds_bucket{le="0.025"} 0', text)
+        self.assertIn('mcp_discovery_client_call_seconds_bucket{le="0.05"} 1', text)
+        self.assertIn('mcp_discovery_client_call_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("mcp_discovery_client_results_count 1", text)
+        self.assertIn("# TYPE mcp_discovery_client_dns_seconds histogram", text)
+
+
+def _servers(count, description_words=40):
+    return [
+        {
+            "server": f"server-{i}",
+            "description": " ".join(f"word{j}" for j in range(description_words)) + ".",
+            "install_command": f"npx -y server-{i}",
+            "confidence": 0.9 - i / 100,
+            "trust_score": 80,
+            "category": "database",
+            "metrics": {"avg_latency_ms": 120, "uptime_pct": 99.5},
+            "github_url": f"https://github.com/example/server-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+class TestOutputFormats(unittest.TestCase):
+    """Test the compact/table formats and output budgets."""
+
+    def test_truncate_prefers_word_boundaries(self):
+        """Test long text is cut at a word boundary with an ellipsis."""
+        from mcp_discovery_tool import _truncate
+
+        self.assertEqual(_truncate("short text", 40), "short text")
+        self.assertEqual(_truncate("alpha beta gamma delta", 15), "alpha beta…")
+        self.assertEqual(_truncate("First sentence. Second one is long", 25), "First sentence.")
+
+    def test_table_is_one_line_per_server(self):
+        """Test the table format renders a header and one row per server."""
+        from mcp_discovery_tool import _format_results
+
+        text = _format_results("db", _servers(5), "table")
+        lines = text.splitlines()
+        self.assertEqual(len(lines), 2 + 5)
+        self.assertTrue(lines[2].startswith("1 | server-0 | 90% | 80 | 120ms | npx -y server-0 | "))
+
+    def test_budget_is_respected(self):
+        """Test every format fits the budget, keeping the top-ranked servers."""
+        from mcp_discovery_tool import _format_results
+
+        servers = _servers(20)
+        for style in ("full", "compact", "table"):
+            with self.subTest(style=style):
+                text = _format_results("db", servers, style, max_chars=1000)
+                self.assertLessEqual(len(text), 1000)
+                self.assertIn("server-0", text)
+                self.assertIn("more not shown", text)
+
+    def test_compact_shares_budget_with_descriptions(self):
+        """Test leftover budget goes to shortened descriptions."""
+        from mcp_discovery_tool import _format_results
+
+        text = _format_results("db", _servers(3), "compact", max_chars=600)
+        self.assertLessEqual(len(text), 600)
+        self.assertEqual(text.count("…"), 3)
+        self.assertNotIn("more not shown", text)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_tool_uses_configured_format_and_token_budget(self, mock_post):
+        """Test output_format and max_output_tokens apply to tool output."""
+        mock_post.return_value = MagicMock()
+        mock_post.return_value.content = _json_bytes({"recommendations": _servers(20)})
+        tool = MCPDiscoveryTool(output_format="table", max_output_tokens=200)
+
+        result = tool.run({"query": "db", "limit": 20})
+
+        self.assertLessEqual(len(result), 800)
+        self.assertIn("# | server | match", result)
+
+
+class TestResponsePayload(unittest.TestCase):
+    """Test field projection and compressed responses."""
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_requests_only_rendered_fields(self, mock_post):
+        """Test the payload projects onto the fields the output format uses."""
+        mock_post.return_value = _ok_response("Postgres")
+        MCPDiscoveryTool(output_format="table").run("postgres")
+
+        fields = mock_post.call_args[1]["json"]["fields"]
+        self.assertIn("install_command", fields)
+        self.assertNotIn("capabilities", fields)
+        self.assertNotIn("github_url", fields)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_artifact_mode_requests_all_fields(self, mock_post):
+        """Test projection is skipped when the raw recommendations are returned."""
+        mock_post.return_value = MagicMock()
+        mock_post.return_value.content = _json_bytes({"recommendations": []})
+        MCPDiscoveryTool(response_format="content_and_artifact").run("postgres")
+
+        self.assertNotIn("fields", mock_post.call_args[1]["json"])
+
+    def test_compression_can_be_disabled(self):
+        """Test compression=False asks for identity encoding."""
+        tool = MCPDiscoveryTool(compression=False)
+        self.assertEqual(tool._get_session().headers["Accept-Encoding"], "identity")
+        self.assertNotIn("Accept-Encoding", MCPDiscoveryTool()._headers())
+
+    def test_async_path_decodes_gzip(self):
+        """Test a gzip-encoded response is negotiated and decoded."""
+        from aiohttp import web
+
+        seen = {}
+
+        async def discover(request):
+            seen["accept_encoding"] = request.headers.get("Accept-Encoding", "")
+            seen["fields"] = (await request.json()).get("fields")
+            response = web.json_response({"recommendations": _servers(20)})
+            response.enable_compression(web.ContentCoding.gzip)
+            return response
+
+        async def scenario():
+            app = web.Application()
+            app.router.add_post("/api/v1/discover", discover)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            try:
+                async with MCPDiscoveryTool(api_url=f"http://127.0.0.1:{port}") as tool:
+                    return await tool.arun({"query": "db", "limit": 20})
+            finally:
+                await runner.cleanup()
+
+        result = asyncio.run(scenario())
+        self.assertIn("gzip", seen["accept_encoding"])
+        self.assertIsNotNone(seen["fields"])
+        self.assertIn("server-19", result)
+
+
+class TestArtifactResponse(unittest.TestCase):
+    """Test response_format="content_and_artifact"."""
+
+    def _tool_call(self, query):
+        return {"name": "mcp_discovery", "args": {"query": query}, "id": "call-1", "type": "tool_call"}
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_tool_message_carries_typed_recommendations(self, mock_post):
+        """Test a tool call returns text content and ServerRecommendation artifacts."""
+        from mcp_discovery_tool import ServerRecommendation
+
+        mock_post.return_value = MagicMock()
+        mock_post.return_value.content = _json_bytes({"recommendations": _servers(2)})
+        tool = MCPDiscoveryTool(response_format="content_and_artifact")
+
+        message = tool.invoke(self._tool_call("db"))
+
+        self.assertIn("server-0", message.content)
+        self.assertEqual(len(message.artifact), 2)
+        top = message.artifact[0]
+        self.assertIsInstance(top, ServerRecommendation)
+        self.assertEqual(top.install_command, "npx -y server-0")
+        self.assertEqual(top.metrics.avg_latency_ms, 120)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_cached_results_reuse_validated_models(self, mock_post):
+        """Test cache hits return the same model instances without revalidating."""
+        mock_post.return_value = MagicMock()
+        mock_post.return_value.content = _json_bytes({"recommendations": _servers(2)})
+        tool = MCPDiscoveryTool(response_format="content_and_artifact")
+
+        _, first = tool._run("db")
+        with patch('mcp_discovery_tool.ServerRecommendation.model_validate') as validate:
+            _, second = tool._run("db")
+
+        validate.assert_not_called()
+        self.assertIs(first[0], second[0])
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_malformed_record_is_skipped(self, mock_post):
+        """Test a record that fails validation is left out instead of raising."""
+        servers = _servers(3)
+        del servers[1]["server"]
+        mock_post.return_value = MagicMock()
+        mock_post.return_value.content = _json_bytes({"recommendations": servers})
+        tool = MCPDiscoveryTool(response_format="content_and_artifact")
+
+        message = tool.invoke(self._tool_call("db"))
+        _, subset = tool._run("db", limit=2)
+
+        self.assertIn("server-0", message.content)
+        self.assertEqual([s.server for s in message.artifact], ["server-0", "server-2"])
+        self.assertEqual([s.server for s in subset], ["server-0"])
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_error_returns_empty_artifact(self, mock_post):
+        """Test a failed call returns the error text and no recommendations."""
+        import requests
+
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+        tool = MCPDiscoveryTool(response_format="content_and_artifact", max_retries=0)
+
+        text, artifact = tool._run("db")
+
+        self.assertIn("Error connecting", text)
+        self.assertEqual(artifact, [])
+
+
+class TestWarmUp(unittest.TestCase):
+    """Test background connection and cache warm-up."""
+
+    @patch('mcp_discovery_tool.requests.Session.get')
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_warm_up_prefetches_into_cache(self, mock_post, mock_get):
+        """Test warm-up pings /health and caches every query."""
+        mock_post.side_effect = lambda url, json, timeout: _ok_response(json["need"])
+        tool = MCPDiscoveryTool()
+
+        prefetched = tool.warm_up(["database", "email"]).result(timeout=5)
+
+        self.assertEqual(prefetched, 2)
+        self.assertIn("/health", mock_get.call_args[0][0])
+        with patch('mcp_discovery_tool.requests.Session.post') as later_post:
+            self.assertIn("email", tool.run("email"))
+            later_post.assert_not_called()
+        self.assertEqual(tool.get_stats()["calls"], 1)
+
+    @patch('mcp_discovery_tool.requests.Session.get')
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_rate_limited_warm_up_only_connects(self, mock_post, mock_get):
+        """Test warm-up spends no quota on prefetches when a rate limit is set."""
+        from mcp_rate_limit import reset_rate_limiters
+
+        self.addCleanup(reset_rate_limiters)
+        tool = MCPDiscoveryTool(rate_limit_tier="free")
+
+        self.assertEqual(tool.warm_up().result(timeout=5), 0)
+
+        mock_post.assert_not_called()
+        self.assertIn("/health", mock_get.call_args[0][0])
+
+    @patch('mcp_discovery_tool.requests.Session.get')
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_factory_warm_up_does_not_block(self, mock_post, mock_get):
+        """Test the factory returns while warm-up requests are still in flight."""
+        import threading
+        import time
+
+        release = threading.Event()
+
+        def slow(url, json, timeout):
+            release.wait(5)
+            return _ok_response(json["need"])
+
+        mock_post.side_effect = slow
+        start = time.monotonic()
+        tool = create_mcp_discovery_tool(warm_up=True, warmup_queries=["database"])
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        release.set()
+        for _ in range(100):
+            if tool._cache.get(tool._key("database", 5)) is not None:
+                break
+            time.sleep(0.02)
+        self.assertIsNotNone(tool._cache.get(tool._key("database", 5)))
+
+    def test_default_queries_are_scraper_categories(self):
+        """Test the default warm-up list covers the standardized categories."""
+        from mcp_discovery_tool import DEFAULT_WARMUP_QUERIES
+
+        self.assertIn("database", DEFAULT_WARMUP_QUERIES)
+        self.assertIn("communication", DEFAULT_WARMUP_QUERIES)
+        self.assertEqual(len(set(DEFAULT_WARMUP_QUERIES)), len(DEFAULT_WARMUP_QUERIES))
+
+
+class _ThreadedAPI:
+    """A stub /api/v1/discover served from its own thread, for cross-loop tests."""
+
+    def __init__(self, delay=0.0):
+        import threading
+
+        self.delay = delay
+        self.requests = 0
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _serve(self):
+        from aiohttp import web
+
+        async def discover(request):
+            self.requests += 1
+            need = (await request.json())["need"]
+            await asyncio.sleep(self.delay)
+            return web.json_response({"recommendations": [{"server": need, "name": need}]})
+
+        async def start():
+            app = web.Application()
+            app.router.add_post("/api/v1/discover", discover)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(start())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def __exit__(self, *exc_info):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+
+
+class TestSharedEventLoop(unittest.TestCase):
+    """Test shared_event_loop=True routes sync and async calls through one loop."""
+
+    def test_sync_and_async_share_session_and_cache(self):
+        """Test both paths use the tool's loop, one session and one cache."""
+        with _ThreadedAPI() as api:
+            tool = MCPDiscoveryTool(api_url=api.url, shared_event_loop=True)
+            self.assertIn("postgres", tool.run("postgres"))
+            self.assertIn("postgres", asyncio.run(tool.arun("postgres")))
+            self.assertIn("email", asyncio.run(tool.arun("email")))
+
+            self.assertEqual(api.requests, 2)
+            self.assertEqual(list(tool._async_sessions), [tool._loop_thread.loop])
+            self.assertIsNone(tool._session)  # requests was never used
+            tool.close()
+        self.assertIsNone(tool._loop_thread)
+
+    def test_sync_and_async_callers_coalesce(self):
+        """Test identical sync and async calls in flight share one request."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with _ThreadedAPI(delay=0.3) as api:
+            tool = MCPDiscoveryTool(api_url=api.url, shared_event_loop=True)
+
+            async def async_callers():
+                return await asyncio.gather(*(tool.arun("slack") for _ in range(3)))
+
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                sync_results = [pool.submit(tool.run, "slack") for _ in range(3)]
+                async_results = pool.submit(asyncio.run, async_callers())
+                results = [f.result() for f in sync_results] + async_results.result()
+
+            self.assertEqual(api.requests, 1)
+            self.assertTrue(all("slack" in r for r in results))
+            tool.close()
+
+    def test_batch_and_warm_up_run_on_the_loop(self):
+        """Test batch discovery and warm-up use the shared loop."""
+        with _ThreadedAPI() as api:
+            tool = MCPDiscoveryTool(api_url=api.url, shared_event_loop=True)
+            self.assertEqual(tool.warm_up(["database", "email"]).result(timeout=5), 2)
+            results = tool.batch_discover(["database", "email", "weather"])
+
+            self.assertIn("weather", results[2])
+            self.assertEqual(api.requests, 3)
+            self.assertIsNone(tool._session)
+            tool.close()
+
+
+class TestLoadBalancing(unittest.TestCase):
+    """Test routing across several API replicas."""
+
+    def test_power_of_two_choices_prefers_faster_endpoint(self):
+        """Test the endpoint with the lower latency EWMA wins the comparison."""
+        from mcp_discovery_tool import _EndpointBalancer
+
+        balancer = _EndpointBalancer(["http://fast", "http://slow"])
+        fast, slow = balancer.endpoints
+        fast.latency, slow.latency = 0.01, 0.5
+
+        self.assertIs(balancer.pick(), fast)
+        self.assertEqual(fast.inflight, 1)
+
+    def test_failing_endpoint_is_ejected_and_readmitted(self):
+        """Test consecutive failures eject a replica until its cool-down ends."""
+        from mcp_discovery_tool import _EndpointBalancer
+
+        balancer = _EndpointBalancer(["http://a", "http://b"], eject_seconds=0.05)
+        bad, good = balancer.endpoints
+        good.latency = 0.01
+        for _ in range(3):
+            bad.inflight += 1
+            balancer.record(bad, 0.01, False)
+
+        self.assertTrue(all(balancer.pick() is good for _ in range(10)))
+        time.sleep(0.06)
+        self.assertIn(bad, {balancer.pick() for _ in range(20)})
+
+    def test_single_endpoint_is_never_ejected(self):
+        """Test a lone endpoint keeps serving; the circuit breaker handles outages."""
+        from mcp_discovery_tool import _EndpointBalancer
+
+        balancer = _EndpointBalancer(["http://only"])
+        only = balancer.endpoints[0]
+        for _ in range(5):
+            balancer.record(balancer.pick(), 0.01, False)
+        self.assertIs(balancer.pick(), only)
+        self.assertEqual(only.ejected_until, 0.0)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_run_fails_over_to_healthy_replica(self, mock_post):
+        """Test sync calls retry on and then stick to the replica that works."""
+        import requests
+
+        def post(url, **kwargs):
+            if url.startswith("http://down"):
+                raise requests.exceptions.ConnectionError("refused")
+            return _ok_response("Up")
+
+        mock_post.side_effect = post
+        tool = MCPDiscoveryTool(api_url=["http://down", "http://up"], retry_backoff=0)
+
+        results = [tool.run(f"topic{i}") for i in range(10)]
+
+        self.assertTrue(all("Up" in r for r in results))
+        down = [c for c in mock_post.call_args_list if c.args[0].startswith("http://down")]
+        self.assertLessEqual(len(down), 2)
+        endpoints = {e["url"]: e for e in tool.get_stats()["endpoints"]}
+        # Ejection readmits a replica with a clean error rate
+        penalized = endpoints["http://down"]["error_rate_ewma"] > 0 or endpoints["http://down"]["ejected"]
+        self.assertEqual(penalized, bool(down))
+
+    def test_arun_spreads_load_by_latency(self):
+        """Test async calls favor the faster of two live replicas."""
+        with _ThreadedAPI(delay=0.05) as slow, _ThreadedAPI() as fast:
+            tool = MCPDiscoveryTool(
+                api_url=[slow.url, fast.url], hedge_requests=False, cache_maxsize=0
+            )
+
+            async def main():
+                for i in range(30):
+                    await tool.arun(f"query {i}")
+                await tool.aclose()
+
+            asyncio.run(main())
+
+        self.assertEqual(slow.requests + fast.requests, 30)
+        self.assertGreater(fast.requests, slow.requests)
+
+    def test_factory_accepts_endpoint_list(self):
+        """Test create_mcp_discovery_tool passes a replica list through."""
+        tool = create_mcp_discovery_tool(api_url=("http://a", "http://b/"))
+        self.assertEqual([e.url for e in tool._balancer.endpoints], ["http://a", "http://b"])
+
+
+class TestRateLimit(unittest.TestCase):
+    """Test client-side rate limiting."""
+
+    def tearDown(self):
+        from mcp_rate_limit import reset_rate_limiters
+
+        reset_rate_limiters()
+
+    def test_disabled_by_default(self):
+        """Test no limiter unless a tier or rate is configured."""
+        self.assertIsNone(MCPDiscoveryTool()._limiter)
+        self.assertIsNone(MCPDiscoveryTool(rate_limit_tier="enterprise")._limiter)
+
+    def test_tools_with_same_key_share_limiter(self):
+        """Test the bucket is process-wide per API URL and key."""
+        a = MCPDiscoveryTool(api_key="k", rate_limit_tier="pro")
+        b = MCPDiscoveryTool(api_key="k", rate_limit_tier="pro")
+        c = MCPDiscoveryTool(api_key="other", rate_limit_tier="pro")
+        self.assertIs(a._limiter, b._limiter)
+        self.assertIsNot(a._limiter, c._limiter)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_sends_api_key(self, mock_post):
+        """Test the API key is sent as X-API-Key."""
+        mock_post.return_value = _ok_response("DB")
+        tool = MCPDiscoveryTool(api_key="secret")
+        tool.run("database")
+        self.assertEqual(tool._headers()["X-API-Key"], "secret")
+        self.assertNotIn("X-API-Key", MCPDiscoveryTool()._headers())
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_exhausted_quota_falls_back_without_request(self, mock_post):
+        """Test a call that cannot get a slot is not sent and serves the cache."""
+        mock_post.return_value = _ok_response("Cached DB")
+        tool = MCPDiscoveryTool(
+            rate_limit_per_second=0.01, rate_limit_burst=1, rate_limit_max_wait=0.05
+        )
+        tool.run("database")
+
+        result = tool.run({"query": "database", "force_refresh": True})
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertIn("Cached DB", result)
+
+        result = tool.run("email")
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertIn("rate limit", result)
+
+    @patch('mcp_discovery_tool.requests.Session.post')
+    def test_tier_burst_is_not_paced(self, mock_post):
+        """Test a pro-tier burst runs at full speed against the monthly budget."""
+        mock_post.return_value = _ok_response("DB")
+        tool = MCPDiscoveryTool(rate_limit_tier="pro", rate_limit_max_wait=1)
+
+        start = time.monotonic()
+        topics = ("database", "email", "slack", "github", "browser", "weather", "stripe",
+                  "calendar", "notion", "redis", "docker", "maps", "twitter", "jira",
+                  "figma", "spotify", "youtube", "translate", "crypto", "pdf")
+        results = [tool.run(topic) for topic in topics]
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(mock_post.call_count, 20)
+        self.assertFalse(any("rate limit" in r for r in results))
+
+    def test_rate_limited_tool_does_not_hedge(self):
+        """Test hedged duplicates are disabled when requests spend quota."""
+        tool = MCPDiscoveryTool(rate_limit_tier="free")
+        for _ in range(50):
+            tool._latency.observe(0.01)
+        self.assertIsNone(tool._hedge_delay())
+
+    def test_arun_waits_for_slot(self):
+        """Test async calls queue for a slot instead of failing."""
+        tool = MCPDiscoveryTool(rate_limit_per_second=20, rate_limit_burst=1)
+        calls = []
+
+        async def fake_post(payload, timeout):
+            calls.append(time.monotonic())
+            return []
+
+        tool._apost = fake_post
+
+        async def main():
+            await asyncio.gather(*(tool.arun(q) for q in ("a1", "b2", "c3")))
+
+        asyncio.run(main())
+        self.assertEqual(len(calls), 3)
+        self.assertGreaterEqual(calls[-1] - calls[0], 0.08)
+
+
+class TestImportTime(unittest.TestCase):
+    """Test that importing the tool stays cheap."""
+
+    # Self time of the module and of whatever it imports outside LangChain,
+    # measured after LangChain itself has been imported. Building one tool
+    # first triggers the imports LangChain defers to the first BaseTool.
+    BUDGET_MS = 250
+    LANGCHAIN = ("langchain_core", "langsmith", "pydantic", "pydantic_core", "typing_extensions")
+    PRELOAD = (
+        "import langchain_core.callbacks, langchain_core.tools\n"
+        "class Probe(langchain_core.tools.BaseTool):\n"
+        "    name: str = 'probe'\n"
+        "    description: str = 'probe'\n"
+        "    def _run(self): pass\n"
+        "Probe()\n"
+    )
+
+    def _run(self, code, *flags):
+        here = os.path.dirname(os.path.abspath(__file__))
+        return subprocess.run(
+            [sys.executable, *flags, "-c", code],
+            cwd=here, capture_output=True, text=True, check=True,
+        )
+
+    def test_heavy_modules_are_deferred(self):
+        """aiohttp, the SQLite cache and the rate limiter load on first use only."""
+        result = self._run(
+            f"{self.PRELOAD}import sys, mcp_discovery_tool\n"
+            "mcp_discovery_tool.MCPDiscoveryTool().args_schema.model_json_schema()\n"
+            "print(' '.join(sorted(sys.modules)))"
+        )
+        loaded = set(result.stdout.split())
+        for name in ("aiohttp", "sqlite3", "mcp_disk_cache", "mcp_rate_limit", "numpy"):
+            self.assertNotIn(name, loaded)
+
+    def test_import_time_budget(self):
+        """python -X importtime: the tool's own import cost stays within budget."""
+        code = f"{self.PRELOAD}import mcp_discovery_tool"
+        self._run(code)  # write the bytecode cache so compiling is not timed
+        result = self._run(code, "-X", "importtime")
+        # Each line is "import time: self | cumulative | <indent>module", children
+        # first; the tool's subtree is the indented run ending at its own line.
+        rows = [line.split("|") for line in result.stderr.splitlines() if line.count("|") == 2]
+        end = next(i for i, row in enumerate(rows) if row[2].strip() == "mcp_discovery_tool")
+        start = end
+        while start > 0 and rows[start - 1][2].startswith("   "):
+            start -= 1
+        total_us = sum(
+            int(row[0].split(":")[-1])
+            for row in rows[start:end + 1]
+            if row[2].strip().split(".")[0] not in self.LANGCHAIN
+        )
+        self.assertLess(total_us / 1000, self.BUDGET_MS)
+
+
 class TestFactoryFunction(unittest.TestCase):
     """Test the factory function."""
     
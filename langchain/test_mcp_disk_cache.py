@@ -0,0 +1,141 @@
+"""Unit tests for the persistent SQLite discovery cache."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from mcp_disk_cache import SQLiteResultCache
+
+
+class TestSQLiteResultCache(unittest.TestCase):
+    """Test storage, expiry, eviction and dataset versions."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "cache.db")
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        self._tmp.cleanup()
+
+    def _cache(self, **kwargs):
+        kwargs.setdefault("maxsize", 100)
+        kwargs.setdefault("ttl", 60)
+        cache = SQLiteResultCache(self.path, **kwargs)
+        self.caches.append(cache)
+        return cache
+
+    def test_round_trip_and_wal(self):
+        """Test entries survive a round trip and the database runs in WAL mode."""
+        cache = self._cache()
+        cache.set(("postgres", 5), [{"name": "Postgres"}])
+
+        self.assertEqual(cache.get(("postgres", 5)), ([{"name": "Postgres"}], True))
+        self.assertIsNone(cache.get(("postgres", 10)))
+        mode = cache._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_shared_between_instances(self):
+        """Test a second cache on the same file (another process) sees the entry."""
+        self._cache().set(("email", 5), [{"name": "Mail"}])
+        self.assertEqual(self._cache().get(("email", 5))[0], [{"name": "Mail"}])
+
+    def test_expired_entry_is_stale(self):
+        """Test entries past the TTL are returned as not fresh."""
+        cache = self._cache(ttl=10)
+        cache.set(("email", 5), [])
+        with patch("mcp_disk_cache.time.time", return_value=time.time() + 11):
+            self.assertEqual(cache.get(("email", 5)), ([], False))
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry count limit evicts the least recently used entry."""
+        cache = self._cache(maxsize=2)
+        now = time.time()
+        with patch("mcp_disk_cache.time.time", side_effect=[now, now + 2, now + 4, now + 6]):
+            cache.set(("a", 5), [])
+            cache.set(("b", 5), [])
+            cache.get(("a", 5))
+            cache.set(("c", 5), [])
+
+        self.assertIsNone(cache.get(("b", 5)))
+        self.assertIsNotNone(cache.get(("a", 5)))
+        self.assertEqual(len(cache), 2)
+
+    def test_evicts_by_size(self):
+        """Test the byte limit evicts old entries."""
+        cache = self._cache(max_bytes=300)
+        for i in range(5):
+            cache.set((f"q{i}", 5), [{"description": "x" * 100}])
+        self.assertLessEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(("q4", 5)))
+
+    def test_dataset_version_change_invalidates(self):
+        """Test a new dataset version drops entries for every instance."""
+        writer, reader = self._cache(), self._cache()
+        writer.set_dataset_version("v1")
+        writer.set(("email", 5), [{"name": "Mail"}])
+        self.assertIsNotNone(reader.get(("email", 5)))
+
+        reader.set_dataset_version("v2")
+
+        self.assertIsNone(writer.get(("email", 5)))
+        writer.set(("email", 5), [{"name": "Mail v2"}])
+        self.assertEqual(reader.get(("email", 5))[0], [{"name": "Mail v2"}])
+
+    def test_concurrent_writers(self):
+        """Test threads writing at once neither fail nor lose entries."""
+        cache = self._cache(maxsize=1000)
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(25):
+                    cache.set((f"w{worker}-{i}", 5), [{"name": str(i)}])
+                    cache.get((f"w{worker}-{i}", 5))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), 200)
+
+    def test_scopes_do_not_share_entries(self):
+        """Test caches with different scopes on one file keep separate entries."""
+        self._cache(scope="table").set(("email", 5), [{"server": "mail"}])
+        self.assertIsNone(self._cache(scope="full").get(("email", 5)))
+        self.assertIsNotNone(self._cache(scope="table").get(("email", 5)))
+
+    def test_locked_write_is_dropped(self):
+        """Test a write that cannot get the lock is skipped instead of raising."""
+        import sqlite3
+
+        cache = self._cache(busy_timeout=0.05)
+        holder = sqlite3.connect(self.path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            cache.set(("email", 5), [{"name": "Mail"}])
+            cache.set_dataset_version("v2")
+        finally:
+            holder.execute("ROLLBACK")
+            holder.close()
+        self.assertIsNone(cache.get(("email", 5)))
+
+    def test_maxsize_zero_disables(self):
+        """Test maxsize=0 stores nothing."""
+        cache = self._cache(maxsize=0)
+        cache.set(("email", 5), [])
+        self.assertIsNone(cache.get(("email", 5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
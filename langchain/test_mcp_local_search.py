@@ -0,0 +1,97 @@
+"""Unit tests for the embedded local search engine."""
+
+import json
+import os
+import unittest
+
+from mcp_local_search import (
+    get_local_engine,
+    load_local_dataset,
+    local_trust_score,
+    score_record,
+    tokenize,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "local_search_parity.json")
+
+
+class TestLoadLocalDataset(unittest.TestCase):
+    """Test dataset loading and normalization."""
+
+    def test_dedupes_by_slug(self):
+        """Test every slug appears once, case-insensitively."""
+        records = load_local_dataset()
+        self.assertGreater(len(records), 5000)
+        slugs = {r["slug"].lower() for r in records}
+        self.assertEqual(len(slugs), len(records))
+
+    def test_normalizes_fields(self):
+        """Test github_url is a string or None and install_command is set."""
+        for record in load_local_dataset():
+            self.assertTrue(record["github_url"] is None or isinstance(record["github_url"], str))
+            self.assertTrue(record["install_command"])
+
+
+class TestParityWithTypeScript(unittest.TestCase):
+    """Check rankings against fixtures exported from src/services/local-search.ts.
+
+    Regenerate with ``npx tsx scripts/export-local-search-fixtures.ts``.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURES, encoding="utf-8") as f:
+            cls.fixtures = json.load(f)
+        cls.engine = get_local_engine()
+
+    def test_rankings_match(self):
+        """Test slugs, order and similarity match the TS localSearch for every query."""
+        limit = self.fixtures["limit"]
+        for query, expected in self.fixtures["queries"].items():
+            with self.subTest(query=query):
+                results = self.engine.search(query, limit)
+                got = [{"slug": r["slug"], "similarity": r["similarity"]} for r in results]
+                self.assertEqual(got, expected)
+
+    def test_smaller_limits_are_prefixes(self):
+        """Test the top-k shortcut returns the same head as the full ranking."""
+        for query, expected in self.fixtures["queries"].items():
+            with self.subTest(query=query):
+                results = self.engine.search(query, 3)
+                self.assertEqual([r["slug"] for r in results], [e["slug"] for e in expected[:3]])
+
+    def test_score_record_matches(self):
+        """Test the reference scorer on the TS test record."""
+        record = self.fixtures["score_record"]["record"]
+        for case in self.fixtures["score_record"]["cases"]:
+            with self.subTest(tokens=case["tokens"]):
+                self.assertEqual(score_record(record, case["tokens"]), case["score"])
+
+
+class TestLocalSearch(unittest.TestCase):
+    """Test search behavior on the bundled dataset."""
+
+    def test_stopword_query_is_empty(self):
+        """Test queries made only of stopwords return nothing."""
+        self.assertEqual(tokenize("the mcp server"), [])
+        self.assertEqual(get_local_engine().search("the mcp server", 5), [])
+
+    def test_discover_shape(self):
+        """Test discover returns API-shaped recommendations sorted by confidence."""
+        recommendations = get_local_engine().discover("postgres database", 10)
+        self.assertGreater(len(recommendations), 0)
+        self.assertLessEqual(len(recommendations), 10)
+        for prev, rec in zip(recommendations, recommendations[1:]):
+            self.assertLessEqual(rec["confidence"], prev["confidence"])
+        self.assertIn("install_command", recommendations[0])
+        self.assertIn("trust_score", recommendations[0])
+
+    def test_local_trust_score(self):
+        """Test stars map to 0-100 monotonically."""
+        self.assertEqual(local_trust_score(0), 0)
+        self.assertGreater(local_trust_score(10), local_trust_score(1))
+        self.assertLessEqual(local_trust_score(100000), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Unit tests for the client-side token-bucket rate limiter."""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from mcp_rate_limit import (
+    RateLimitTimeout,
+    TokenBucketLimiter,
+    get_rate_limiter,
+    reset_rate_limiters,
+    tier_budget,
+    tier_rate,
+)
+
+
+class TestTierRate(unittest.TestCase):
+    """Test tier presets."""
+
+    def test_monthly_quota_spread_over_a_month(self):
+        """Test free and pro quotas become a per-second rate."""
+        month = 30 * 24 * 3600
+        self.assertAlmostEqual(tier_rate("free") * month, 100)
+        self.assertAlmostEqual(tier_rate("pro") * month, 10000)
+
+    def test_enterprise_is_unlimited(self):
+        """Test the unlimited tier has no rate."""
+        self.assertIsNone(tier_rate("enterprise"))
+        self.assertIsNone(tier_budget("enterprise"))
+
+    def test_budget_holds_monthly_quota(self):
+        """Test a tier's bucket can spend its whole quota back to back."""
+        self.assertEqual(tier_budget("pro"), (tier_rate("pro"), 10000))
+        limiter = TokenBucketLimiter(*tier_budget("free"))
+        for _ in range(100):
+            limiter.acquire(timeout=0)
+        with self.assertRaises(RateLimitTimeout):
+            limiter.acquire(timeout=0)
+
+    def test_unknown_tier(self):
+        """Test an unknown tier is rejected."""
+        with self.assertRaises(ValueError):
+            tier_rate("platinum")
+
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    """Test pacing, timeouts and fair queueing."""
+
+    def test_burst_passes_immediately(self):
+        """Test calls up to the burst size do not wait."""
+        limiter = TokenBucketLimiter(rate=1, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire(timeout=0)
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_excess_call_waits_for_refill(self):
+        """Test the call past the burst queues until a token refills."""
+        limiter = TokenBucketLimiter(rate=20, burst=1)
+        limiter.acquire()
+        start = time.monotonic()
+        limiter.acquire(timeout=1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+
+    def test_timeout_raises_and_leaves_queue(self):
+        """Test a call that cannot get a slot in time raises and is dequeued."""
+        limiter = TokenBucketLimiter(rate=0.1, burst=1)
+        limiter.acquire()
+        with self.assertRaises(RateLimitTimeout) as ctx:
+            limiter.acquire(timeout=0.05)
+        self.assertGreater(ctx.exception.retry_after, 0)
+        self.assertEqual(len(limiter._queues), 0)
+
+    def test_unreachable_deadline_fails_fast(self):
+        """Test a call whose next token is past its deadline does not sleep first."""
+        limiter = TokenBucketLimiter(rate=0.1, burst=1)
+        limiter.acquire()
+        start = time.monotonic()
+        with self.assertRaises(RateLimitTimeout) as ctx:
+            limiter.acquire(timeout=5)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertGreater(ctx.exception.retry_after, 5)
+
+        async def main():
+            await limiter.aacquire(timeout=5)
+
+        start = time.monotonic()
+        with self.assertRaises(RateLimitTimeout):
+            asyncio.run(main())
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_round_robin_across_agents(self):
+        """Test a busy agent does not starve one that queued later."""
+        limiter = TokenBucketLimiter(rate=50, burst=1)
+        limiter.acquire("busy")
+        order = []
+        lock = threading.Lock()
+
+        def call(agent):
+            limiter.acquire(agent, timeout=5)
+            with lock:
+                order.append(agent)
+
+        threads = [threading.Thread(target=call, args=("busy",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.005)
+        quiet = threading.Thread(target=call, args=("quiet",))
+        quiet.start()
+        for thread in threads + [quiet]:
+            thread.join()
+
+        self.assertLessEqual(order.index("quiet"), 1)
+
+    def test_async_acquire(self):
+        """Test async callers are paced by the same bucket."""
+        limiter = TokenBucketLimiter(rate=20, burst=1)
+
+        async def main():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.aacquire("a", timeout=2) for _ in range(3)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(main()), 0.08)
+
+    def test_async_timeout(self):
+        """Test an async call times out like a sync one."""
+        limiter = TokenBucketLimiter(rate=0.1, burst=1)
+
+        async def main():
+            await limiter.aacquire()
+            await limiter.aacquire(timeout=0.05)
+
+        with self.assertRaises(RateLimitTimeout):
+            asyncio.run(main())
+
+    def test_file_backend_shared_between_limiters(self):
+        """Test two limiters on one state file draw from one bucket."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bucket")
+            first = TokenBucketLimiter(rate=0.1, burst=2, path=path)
+            second = TokenBucketLimiter(rate=0.1, burst=2, path=path)
+            first.acquire(timeout=0)
+            second.acquire(timeout=0)
+            with self.assertRaises(RateLimitTimeout):
+                first.acquire(timeout=0)
+
+
+class TestProcessRegistry(unittest.TestCase):
+    """Test the process-wide limiter registry."""
+
+    def tearDown(self):
+        reset_rate_limiters()
+
+    def test_same_key_shares_limiter(self):
+        """Test one limiter per key."""
+        a = get_rate_limiter(("http://api", "key"), 1)
+        b = get_rate_limiter(("http://api", "key"), 5)
+        c = get_rate_limiter(("http://api", "other"), 1)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+
+
+if __name__ == "__main__":
+    unittest.main()
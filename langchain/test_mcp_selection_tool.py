@@ -0,0 +1,202 @@
+"""Unit tests for the composite MCP server selection tool."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from mcp_discovery_tool import MCPDiscoveryTool
+from mcp_selection_tool import MCPServerSelectionTool, merge_selection
+
+SERVERS = [
+    {"server": "pg-fast", "name": "PG Fast", "confidence": 0.9, "install_command": "npx pg-fast"},
+    {"server": "pg-slow", "name": "PG Slow", "confidence": 0.95},
+    {"server": "pg-lite", "name": "PG Lite", "confidence": 0.7},
+]
+METRICS = {
+    "pg-fast": {"latency_ms": 40, "uptime_pct": 99.9, "success_rate": 99.5},
+    "pg-slow": {"latency_ms": 900, "uptime_pct": 90.0, "success_rate": 80.0},
+    "pg-lite": {"latency_ms": 100, "uptime_pct": 99.0, "success_rate": 99.0},
+}
+
+
+def _json_bytes(body):
+    """Encode a mock API response body the way the server sends it."""
+    return json.dumps(body).encode()
+
+
+def _metrics_body(ident):
+    return {"server": {"slug": ident}, "metrics": {"current": METRICS[ident], "history": []}}
+
+
+def _compare_body(ids):
+    return {"servers": [
+        {"slug": ident, "capabilities": ["query"] * (i + 1), "metrics": METRICS[ident]}
+        for i, ident in enumerate(ids)
+    ]}
+
+
+class _FakeAPI:
+    """Routes ``Session.post`` by path; ``delays`` slows individual calls."""
+
+    def __init__(self, delays=None, fail=()):
+        self.delays = delays or {}
+        self.fail = set(fail)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def body(self, path, payload):
+        key = (path, payload.get("server_id"))
+        with self.lock:
+            self.calls.append(key)
+        time.sleep(self.delays.get(key, self.delays.get(path, 0)))
+        if key in self.fail or path in self.fail:
+            raise ValueError("boom")
+        if path == "/api/v1/discover":
+            return {"recommendations": SERVERS[: payload["limit"]]}
+        if path == "/api/v1/metrics":
+            return _metrics_body(payload["server_id"])
+        return _compare_body(payload["server_ids"])
+
+    def post(self, url, json=None, timeout=None):
+        response = MagicMock()
+        response.content = _json_bytes(self.body(url.split("3000", 1)[1], json))
+        return response
+
+    async def apost_json(self, path, payload, timeout):
+        await asyncio.sleep(self.delays.get((path, payload.get("server_id")), 0))
+        return self.body(path, payload)
+
+
+class TestMergeSelection(unittest.TestCase):
+    """Test ranking of merged discover, metrics and compare answers."""
+
+    def test_metrics_outrank_small_relevance_gap(self):
+        """Test a slightly less relevant but much healthier server ranks first."""
+        rows = merge_selection(
+            SERVERS,
+            {ident: _metrics_body(ident) for ident in METRICS},
+            _compare_body([s["server"] for s in SERVERS]),
+        )
+        self.assertEqual([r["server"] for r in rows], ["pg-fast", "pg-lite", "pg-slow"])
+        self.assertEqual(rows[0]["latency_ms"], 40)
+        self.assertEqual(rows[0]["signals"]["latency"], 1.0)
+
+    def test_missing_signals_are_left_out(self):
+        """Test servers without metrics are scored on what is known."""
+        rows = merge_selection(SERVERS[:2], {"pg-fast": _metrics_body("pg-fast")}, None)
+        by_id = {r["server"]: r for r in rows}
+        self.assertEqual(set(by_id["pg-slow"]["signals"]), {"relevance"})
+        self.assertAlmostEqual(by_id["pg-slow"]["score"], 0.95)
+        self.assertIsNone(by_id["pg-slow"]["capabilities"])
+
+    def test_discover_metrics_used_as_fallback(self):
+        """Test latency from the discover result is used without a metrics answer."""
+        servers = [dict(SERVERS[0], metrics={"avg_latency_ms": 250}), SERVERS[1]]
+        rows = {r["server"]: r for r in merge_selection(servers, {}, None)}
+        self.assertEqual(rows["pg-fast"]["latency_ms"], 250)
+        self.assertIsNone(rows["pg-slow"]["latency_ms"])
+
+
+class TestSelectionTool(unittest.TestCase):
+    """Test the discover + metrics/compare fan-out."""
+
+    def _tool(self, **kwargs):
+        discovery = MCPDiscoveryTool(hedge_requests=False, max_retries=0, cache_maxsize=0)
+        return MCPServerSelectionTool(discovery=discovery, **kwargs)
+
+    def test_one_call_fans_out(self):
+        """Test one run issues discover, a metrics call per server and one compare."""
+        api = _FakeAPI()
+        with patch("mcp_discovery_tool.requests.Session.post", side_effect=api.post):
+            result = self._tool().run({"query": "postgres", "top_k": 3, "time_range": "7d"})
+
+        self.assertEqual(api.calls[0], ("/api/v1/discover", None))
+        self.assertEqual(
+            sorted(api.calls[1:]),
+            sorted([("/api/v1/compare", None)]
+                   + [("/api/v1/metrics", ident) for ident in METRICS]),
+        )
+        self.assertIn("Ranked 3 MCP server(s)", result)
+        self.assertLess(result.index("PG Fast"), result.index("PG Slow"))
+        self.assertIn("latency 40ms", result)
+        self.assertNotIn("Partial results", result)
+
+    def test_subcalls_run_concurrently(self):
+        """Test metrics and compare calls overlap instead of running in sequence."""
+        api = _FakeAPI(delays={"/api/v1/metrics": 0.2, "/api/v1/compare": 0.2})
+        with patch("mcp_discovery_tool.requests.Session.post", side_effect=api.post):
+            start = time.monotonic()
+            self._tool().run({"query": "postgres", "top_k": 3})
+            elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 0.6)
+
+    def test_slow_subcall_gives_partial_result(self):
+        """Test a metrics call past subcall_timeout is dropped and reported."""
+        api = _FakeAPI(delays={("/api/v1/metrics", "pg-slow"): 1.0})
+        with patch("mcp_discovery_tool.requests.Session.post", side_effect=api.post):
+            start = time.monotonic()
+            text, rows = self._tool(subcall_timeout=0.2).select("postgres", 3)
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.8)
+        self.assertIn("Partial results: metrics timed out for pg-slow", text)
+        # compare still answered, so its metrics stand in for the missing call
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({r["server"]: r["success_rate"] for r in rows}["pg-slow"], 80.0)
+
+    def test_failed_compare_is_reported(self):
+        """Test a failing compare call still returns metrics-based rankings."""
+        api = _FakeAPI(fail={"/api/v1/compare"})
+        with patch("mcp_discovery_tool.requests.Session.post", side_effect=api.post):
+            text, rows = self._tool().select("postgres", 3)
+        self.assertIn("compare failed", text)
+        self.assertEqual(rows[0]["server"], "pg-fast")
+        self.assertIsNone(rows[0]["capabilities"])
+
+    def test_discovery_failure_returns_its_message(self):
+        """Test no sub-calls are made when discovery finds nothing."""
+        api = _FakeAPI(fail={"/api/v1/discover"})
+        with patch("mcp_discovery_tool.requests.Session.post", side_effect=api.post):
+            text, rows = self._tool().select("postgres", 3)
+        self.assertEqual(rows, [])
+        self.assertEqual(api.calls, [("/api/v1/discover", None)])
+        self.assertIn("Unexpected error", text)
+
+    def test_async_cancels_slow_subcalls(self):
+        """Test arun drops a sub-call that overruns its timeout."""
+        api = _FakeAPI(delays={("/api/v1/metrics", "pg-lite"): 5.0})
+        tool = self._tool(subcall_timeout=0.2)
+        tool.discovery._apost_json = api.apost_json
+
+        start = time.monotonic()
+        result = asyncio.run(tool.arun({"query": "postgres", "top_k": 3}))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertIn("metrics timed out for pg-lite", result)
+        self.assertIn("PG Fast", result)
+
+    def test_artifact_rows(self):
+        """Test content_and_artifact returns the merged rows."""
+        api = _FakeAPI()
+        tool = self._tool(response_format="content_and_artifact")
+        tool.discovery._apost_json = api.apost_json
+        message = asyncio.run(tool.ainvoke({
+            "type": "tool_call", "id": "1", "name": tool.name,
+            "args": {"query": "postgres", "top_k": 2},
+        }))
+        self.assertEqual([r["server"] for r in message.artifact], ["pg-fast", "pg-slow"])
+
+    def test_embedded_mode_ranks_without_subcalls(self):
+        """Test embedded discovery is ranked without calling the API."""
+        tool = MCPServerSelectionTool(discovery=MCPDiscoveryTool(mode="embedded"))
+        with patch("mcp_discovery_tool.requests.Session.post") as mock_post:
+            text, rows = tool.select("postgres database", 3)
+        mock_post.assert_not_called()
+        self.assertEqual(len(rows), 3)
+        self.assertIn("Ranked 3 MCP server(s)", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
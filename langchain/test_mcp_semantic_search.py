@@ -0,0 +1,154 @@
+"""Unit tests for the offline semantic search engine."""
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+if np is not None:
+    from mcp_semantic_search import (
+        HashedTfidfEmbedder,
+        SemanticSearchEngine,
+        get_semantic_engine,
+    )
+
+
+def _record(slug, description):
+    return {
+        "name": slug,
+        "slug": slug,
+        "description": description,
+        "npm_package": None,
+        "github_url": None,
+        "install_command": f"npx -y {slug}",
+        "docs_url": None,
+        "category": None,
+        "source": None,
+        "stars": 0,
+    }
+
+
+CORPUS = [
+    _record("pg-server", "Query a PostgreSQL database with SQL and persist rows in tables"),
+    _record("sqlite-store", "Persist data in a local SQLite database file with SQL queries"),
+    _record("redis-cache", "Store and persist key value data in a Redis database"),
+    _record("mail-sender", "Send email messages through SMTP and read the inbox"),
+    _record("gmail-bot", "Read and send Gmail email, label messages in the inbox"),
+    _record("slack-bot", "Post messages to Slack channels and read threads"),
+    _record("web-browser", "Automate a headless browser, click pages and take screenshots"),
+    _record("playwright", "Browser automation with Playwright: navigate pages, fill forms"),
+    _record("weather", "Current weather and forecasts for any city"),
+    _record("k8s", "Manage Kubernetes clusters, pods and deployments"),
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestHashedTfidfEmbedder(unittest.TestCase):
+    """Test the offline embedder."""
+
+    def setUp(self):
+        self.texts = [f"{r['slug']} {r['description']}" for r in CORPUS]
+        self.embedder = HashedTfidfEmbedder(dim=8, n_features_log2=12)
+
+    def test_vectors_are_unit_float32(self):
+        """Test embeddings are a C-contiguous float32 matrix of unit rows."""
+        vectors = self.embedder.fit_transform(self.texts)
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertEqual(vectors.shape, (len(CORPUS), 8))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-5)
+
+    def test_transform_matches_fit_transform(self):
+        """Test re-embedding the training texts gives the same vectors."""
+        fitted = self.embedder.fit_transform(self.texts)
+        np.testing.assert_allclose(self.embedder.transform(self.texts), fitted, atol=1e-5)
+
+    def test_deterministic(self):
+        """Test the same seed gives the same embedding in any process."""
+        other = HashedTfidfEmbedder(dim=8, n_features_log2=12)
+        np.testing.assert_allclose(
+            self.embedder.fit_transform(self.texts), other.fit_transform(self.texts), atol=1e-5
+        )
+
+    def test_unseen_text_is_zero(self):
+        """Test text with no known features embeds to the zero vector, not NaN."""
+        self.embedder.fit(self.texts)
+        vector = self.embedder.transform([""])[0]
+        self.assertFalse(np.isnan(vector).any())
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestSemanticSearchEngine(unittest.TestCase):
+    """Test ranking over a small corpus."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = SemanticSearchEngine(CORPUS, min_similarity=0.0)
+
+    def test_top_k_matches_full_sort(self):
+        """Test argpartition top-k equals a full sort of the scores."""
+        query = self.engine.embed("send email")
+        indices, scores = self.engine.top_k(query, 3)
+        expected = np.argsort(-(self.engine.vectors @ query), kind="stable")[:3]
+        self.assertEqual(list(indices), list(expected))
+        self.assertTrue(all(a >= b for a, b in zip(scores, scores[1:])))
+
+    def test_k_larger_than_corpus(self):
+        """Test asking for more results than records returns them all."""
+        indices, _ = self.engine.top_k(self.engine.embed("email"), 50)
+        self.assertEqual(len(indices), len(CORPUS))
+
+    def test_matches_related_words(self):
+        """Test a query finds servers that share its meaning, not just its words."""
+        slugs = [r["slug"] for r, _ in self.engine.search("persist data", 3)]
+        self.assertTrue(set(slugs) <= {"pg-server", "sqlite-store", "redis-cache"})
+
+    def test_matches_concepts_without_shared_words(self):
+        """Test a query finds servers that share none of its words or trigrams."""
+        engine = SemanticSearchEngine(
+            [
+                _record("pg", "PostgreSQL tables"),
+                _record("mongo", "MongoDB collections"),
+                _record("smtp", "Outbound SMTP relay"),
+                _record("forecast", "Weather forecasts"),
+            ],
+            min_similarity=0.0,
+        )
+        slugs = [r["slug"] for r, _ in engine.search("persist", 2)]
+        self.assertEqual(set(slugs), {"pg", "mongo"})
+
+    def test_discover_shape(self):
+        """Test discover returns API-shaped recommendations."""
+        results = self.engine.discover("browser automation", 2)
+        self.assertEqual(len(results), 2)
+        self.assertIn(results[0]["server"], {"web-browser", "playwright"})
+        self.assertEqual(results[0]["install_command"], f"npx -y {results[0]['server']}")
+        self.assertLessEqual(results[0]["confidence"], 1)
+
+    def test_stopword_query_returns_nothing(self):
+        """Test a query with no searchable tokens returns no results."""
+        self.assertEqual(self.engine.search("the and of", 5), [])
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestSnapshotSearch(unittest.TestCase):
+    """Test the process-wide engine over the bundled snapshot."""
+
+    def test_snapshot_query(self):
+        """Test the snapshot engine ranks email servers for an email query."""
+        results = get_semantic_engine().discover("send emails", 5)
+        self.assertEqual(len(results), 5)
+        self.assertIn("email", results[0]["server"].lower())
+
+    def test_snapshot_related_concepts(self):
+        """Test "persist data" ranks database and storage servers on the snapshot."""
+        storage = ("database", "storage", "sql", "postgres", "supabase", "snowflake",
+                   "mongo", "redis", "sqlite", "store")
+        for record, _ in get_semantic_engine().search("persist data", 5):
+            text = f"{record['slug']} {record['description']}".lower()
+            self.assertTrue(any(word in text for word in storage), record["slug"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env tsx
+
+/**
+ * Export local-mode rankings as parity fixtures for the Python embedded
+ * search engine (langchain/mcp_local_search.py).
+ *
+ * Re-run after changing tokenization or scoring in
+ * src/services/local-search.ts, then commit the regenerated JSON:
+ *
+ *   npx tsx scripts/export-local-search-fixtures.ts
+ */
+
+import { writeFileSync } from 'node:fs';
+import { dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+import {
+  localSearch,
+  scoreRecord,
+  type LocalServerRecord,
+} from '../src/services/local-search.js';
+
+const QUERIES = [
+  'send slack messages',
+  'postgres database',
+  'I need to query a PostgreSQL database',
+  'send emails',
+  'file system operations',
+  'weather data',
+  'github pull requests',
+  'web scraping browser automation',
+  'kubernetes cluster management',
+  'image generation',
+  'stripe payments',
+  'notion notes',
+  'vector search embeddings',
+  'ai',
+  'the mcp server',
+];
+
+const LIMIT = 20;
+
+// Same record as tests/local-search.test.ts.
+const SCORE_RECORD: LocalServerRecord = {
+  name: 'slack-messenger',
+  slug: 'slack-messenger',
+  description: 'Send and read Slack messages from AI agents',
+  npm_package: null,
+  github_url: null,
+  install_command: 'npx -y slack-messenger',
+  docs_url: null,
+  category: 'other',
+  source: 'test',
+  stars: 50,
+};
+
+const SCORE_TOKENS = [
+  ['slack'],
+  ['agents'],
+  ['kubernetes'],
+  [],
+  ['slack', 'messenger'],
+  ['messenger', 'read', 'kubernetes'],
+  ['slack', 'slack'],
+];
+
+const fixtures = {
+  limit: LIMIT,
+  queries: Object.fromEntries(
+    QUERIES.map((query) => [
+      query,
+      localSearch(query, LIMIT).map((r) => ({
+        slug: r.slug,
+        similarity: r.similarity,
+      })),
+    ])
+  ),
+  score_record: {
+    record: SCORE_RECORD,
+    cases: SCORE_TOKENS.map((tokens) => ({
+      tokens,
+      score: scoreRecord(SCORE_RECORD, tokens),
+    })),
+  },
+};
+
+const root = join(dirname(fileURLToPath(import.meta.url)), '..');
+const out = join(root, 'langchain', 'fixtures', 'local_search_parity.json');
+writeFileSync(out, JSON.stringify(fixtures, null, 2) + '\n');
+console.log(`Wrote ${QUERIES.length} queries to ${out}`);
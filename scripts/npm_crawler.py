@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Concurrent, partitioned NPM registry search crawl
+
+Every search term and page is requested in parallel, within the per-host
+cap and request rate that ``HostLimits`` sets for registry.npmjs.org.
+The search API serves at most ``result_window`` results per query. When
+a query reports more matches than that, it is split into narrower
+sub-queries with search qualifiers and each part is crawled in turn:
+first ``is:unstable`` / ``not:unstable``, which splits the matches
+exactly, then a set of ``keywords:`` filters. Packages found by several
+terms or partitions are merged into a single set by name.
+"""
+
+import math
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+SEARCH_URL = "https://registry.npmjs.org/-/v1/search"
+PAGE_SIZE = 250
+RESULT_WINDOW = 1000
+
+SEARCH_TERMS = [
+    'mcp-server', 'model-context-protocol', '@modelcontextprotocol',
+    'mcp', 'model context protocol', 'anthropic-mcp', 'mcp-anthropic'
+]
+
+# Applied one level at a time to queries that overflow the result window
+PARTITIONS = [
+    ['is:unstable', 'not:unstable'],
+    ['keywords:mcp', 'keywords:mcp-server', 'keywords:modelcontextprotocol',
+     'keywords:model-context-protocol', 'keywords:claude', 'keywords:llm',
+     'keywords:ai', 'keywords:agent', 'keywords:tools', 'keywords:server'],
+]
+
+
+class NpmCrawler:
+    """Crawls NPM search results for a set of terms into one package map
+
+    ``session`` is a ``requests.Session``, normally one wrapped by
+    ``HostLimits``, which does the rate limiting.
+    """
+
+    def __init__(self, session, terms: Optional[List[str]] = None, workers: int = 8,
+                 result_window: int = RESULT_WINDOW,
+                 accept: Callable[[Dict], bool] = lambda p: 'mcp' in p.get('name', '').lower()):
+        self.session = session
+        self.terms = list(SEARCH_TERMS if terms is None else terms)
+        self.workers = workers
+        self.result_window = result_window
+        self.accept = accept
+        self.packages: Dict[str, Dict] = {}
+        self.requests = 0
+        self.errors = 0
+        self.partitioned: List[str] = []
+        self._lock = threading.Lock()
+
+    def crawl(self) -> List[Dict]:
+        """Run the crawl; returns the search ``package`` objects, one per name"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='npm') as pool:
+            pending = {pool.submit(self._first_page, term, 0) for term in self.terms}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Each finished request may schedule more pages or partitions
+                    for fn, args in future.result():
+                        pending.add(pool.submit(fn, *args))
+        return list(self.packages.values())
+
+    def _search(self, text: str, offset: int) -> Optional[Dict]:
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self.session.get(
+                SEARCH_URL, params={'text': text, 'size': PAGE_SIZE, 'from': offset}, timeout=30
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception:
+            pass
+        with self._lock:
+            self.errors += 1
+        return None
+
+    def _merge(self, data: Dict):
+        with self._lock:
+            for obj in data.get('objects', []):
+                p = obj.get('package', {})
+                name = p.get('name')
+                if name and name not in self.packages and self.accept(p):
+                    self.packages[name] = p
+
+    def _first_page(self, text: str, depth: int) -> List[Tuple[Callable, tuple]]:
+        data = self._search(text, 0)
+        if not data:
+            return []
+        self._merge(data)
+
+        total = data.get('total', 0)
+        reachable = min(total, self.result_window)
+        follow_ups = [
+            (self._page, (text, page * PAGE_SIZE))
+            for page in range(1, math.ceil(reachable / PAGE_SIZE))
+        ]
+        if total > self.result_window and depth < len(PARTITIONS):
+            with self._lock:
+                self.partitioned.append(text)
+            follow_ups += [
+                (self._first_page, (f"{text} {qualifier}", depth + 1))
+                for qualifier in PARTITIONS[depth]
+            ]
+        return follow_ups
+
+    def _page(self, text: str, offset: int) -> List[Tuple[Callable, tuple]]:
+        data = self._search(text, offset)
+        if data:
+            self._merge(data)
+        return []
@@ -15,17 +15,21 @@ Sources:
 """
 
 import json
-import csv
 import asyncio
 import aiohttp
 import requests
+import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from functools import partial
+from typing import AsyncIterator, List, Dict, Any, Optional
+from dataclasses import dataclass
 import os
 from pathlib import Path
 import time
 
+from scrape_orchestrator import RETRY_STATUSES, HostLimits, print_source_summary
+from scrape_pipeline import ScrapePipeline, Source, StreamWriter
+
 @dataclass
 class MCPServer:
     name: str
@@ -54,9 +58,9 @@ class MCPServer:
             self.description = f"MCP server: {self.name}"
 
 class MCPServerScraper:
-    def __init__(self):
-        self.servers: List[MCPServer] = []
+    def __init__(self, limits: Optional[HostLimits] = None):
         self.session: Optional[aiohttp.ClientSession] = None
+        self.limits = limits or HostLimits()
         self.stats = {
             'glama': 0,
             'smithery': 0,
@@ -80,36 +84,39 @@ class MCPServerScraper:
             await self.session.close()
     
     async def fetch_json(self, url: str, retries: int = 3) -> Optional[Dict]:
-        """Fetch JSON from URL with retries"""
+        """Fetch JSON from URL with retries
+        
+        Retries 429/5xx responses and connection errors. The wait before each
+        attempt comes from the host's adaptive rate, which slows down on
+        those responses and honors Retry-After.
+        """
         for attempt in range(retries):
             try:
-                async with self.session.get(url, timeout=30) as response:
+                async with self.limits.slot(url), self.session.get(url, timeout=30) as response:
+                    self.limits.observe(url, response.status, response.headers)
                     if response.status == 200:
                         return await response.json()
-                    elif response.status == 429:
-                        await asyncio.sleep(2 ** attempt)
-                    else:
+                    elif response.status not in RETRY_STATUSES:
                         print(f"  HTTP {response.status} for {url}")
                         return None
             except Exception as e:
+                self.limits.observe_error(url)
                 if attempt == retries - 1:
                     print(f"  Error fetching {url}: {e}")
-                await asyncio.sleep(1)
         return None
     
     async def fetch_text(self, url: str, retries: int = 3) -> Optional[str]:
-        """Fetch text from URL with retries"""
+        """Fetch text from URL with retries, paced like ``fetch_json``"""
         for attempt in range(retries):
             try:
-                async with self.session.get(url, timeout=30) as response:
+                async with self.limits.slot(url), self.session.get(url, timeout=30) as response:
+                    self.limits.observe(url, response.status, response.headers)
                     if response.status == 200:
                         return await response.text()
-                    elif response.status == 429:
-                        await asyncio.sleep(2 ** attempt)
             except Exception as e:
+                self.limits.observe_error(url)
                 if attempt == retries - 1:
                     print(f"  Error fetching {url}: {e}")
-                await asyncio.sleep(1)
         return None
     
     def map_category(self, categories: Optional[List[str]]) -> str:
@@ -183,15 +190,12 @@ class MCPServerScraper:
         return f"npx -y {name}"
     
     # ============== GLAMA.AI API ==============
-    async def scrape_glama(self, max_pages: int = 500) -> int:
-        """Scrape servers from Glama.ai API"""
-        print("\n[1/8] Scraping Glama.ai API...")
-        count = 0
+    async def glama_pages(self, max_pages: int = 500) -> AsyncIterator[List[Dict]]:
+        """Page through the Glama.ai API"""
+        print("\nScraping Glama.ai API...")
         cursor = None
-        page = 0
         
-        while page < max_pages:
-            page += 1
+        for page in range(1, max_pages + 1):
             url = f"https://glama.ai/api/mcp/v1/servers?limit=100"
             if cursor:
                 url += f"&after={cursor}"
@@ -201,46 +205,39 @@ class MCPServerScraper:
             if not data or 'servers' not in data or not data['servers']:
                 break
             
-            for s in data['servers']:
-                server = MCPServer(
-                    name=s.get('name', 'Unknown'),
-                    slug=s.get('slug', ''),
-                    description=s.get('description', f"MCP server: {s.get('name', '')}"),
-                    npm_package=s.get('npmPackage'),
-                    github_url=s.get('repository'),
-                    install_command=self.generate_install_command(s),
-                    homepage_url=s.get('homepage'),
-                    category=self.map_category(s.get('categories', [])),
-                    capabilities=s.get('categories', []),
-                    source='glama',
-                    author=s.get('namespace'),
-                    license=s.get('license'),
-                    stars=s.get('stars', 0),
-                    downloads=s.get('downloads', 0)
-                )
-                self.servers.append(server)
-                count += 1
+            yield data['servers']
             
             cursor = data.get('pageInfo', {}).get('endCursor')
             has_next = data.get('pageInfo', {}).get('hasNextPage', False)
             
             if page % 10 == 0:
-                print(f"  Page {page}: {count} servers fetched")
+                print(f"  Glama page {page}")
             
             if not has_next or not cursor:
                 break
-                
-            await asyncio.sleep(0.2)
-        
-        self.stats['glama'] = count
-        print(f"  ✓ Glama.ai: {count} servers")
-        return count
+    
+    def normalize_glama(self, s: Dict) -> MCPServer:
+        return MCPServer(
+            name=s.get('name', 'Unknown'),
+            slug=s.get('slug', ''),
+            description=s.get('description', f"MCP server: {s.get('name', '')}"),
+            npm_package=s.get('npmPackage'),
+            github_url=s.get('repository'),
+            install_command=self.generate_install_command(s),
+            homepage_url=s.get('homepage'),
+            category=self.map_category(s.get('categories', [])),
+            capabilities=s.get('categories', []),
+            source='glama',
+            author=s.get('namespace'),
+            license=s.get('license'),
+            stars=s.get('stars', 0),
+            downloads=s.get('downloads', 0)
+        )
     
     # ============== SMITHERY.AI ==============
-    async def scrape_smithery(self, max_pages: int = 50) -> int:
-        """Scrape servers from Smithery.ai"""
-        print("\n[2/8] Scraping Smithery.ai...")
-        count = 0
+    async def smithery_pages(self, max_pages: int = 50) -> AsyncIterator[List[Dict]]:
+        """Page through Smithery.ai"""
+        print("\nScraping Smithery.ai...")
         
         for page in range(1, max_pages + 1):
             url = f"https://smithery.ai/api/servers?page={page}&limit=100"
@@ -249,46 +246,37 @@ class MCPServerScraper:
             if not data or not data.get('servers'):
                 break
             
-            for s in data.get('servers', []):
-                server = MCPServer(
-                    name=s.get('name', 'Unknown'),
-                    slug=s.get('slug', s.get('name', '').lower().replace(' ', '-')),
-                    description=s.get('description', ''),
-                    npm_package=s.get('npmPackage'),
-                    github_url=s.get('repository'),
-                    install_command=self.generate_install_command(s),
-                    homepage_url=s.get('homepage'),
-                    category=self.map_category(s.get('categories', [])),
-                    capabilities=s.get('categories', []),
-                    source='smithery',
-                    author=s.get('author'),
-                    stars=s.get('stars', 0)
-                )
-                self.servers.append(server)
-                count += 1
+            yield data['servers']
             
             if page % 5 == 0:
-                print(f"  Page {page}: {count} servers fetched")
+                print(f"  Smithery page {page}")
             
-            if len(data.get('servers', [])) < 100:
+            if len(data['servers']) < 100:
                 break
-                
-            await asyncio.sleep(0.3)
-        
-        self.stats['smithery'] = count
-        print(f"  ✓ Smithery.ai: {count} servers")
-        return count
+    
+    def normalize_smithery(self, s: Dict) -> MCPServer:
+        return MCPServer(
+            name=s.get('name', 'Unknown'),
+            slug=s.get('slug', s.get('name', '').lower().replace(' ', '-')),
+            description=s.get('description', ''),
+            npm_package=s.get('npmPackage'),
+            github_url=s.get('repository'),
+            install_command=self.generate_install_command(s),
+            homepage_url=s.get('homepage'),
+            category=self.map_category(s.get('categories', [])),
+            capabilities=s.get('categories', []),
+            source='smithery',
+            author=s.get('author'),
+            stars=s.get('stars', 0)
+        )
     
     # ============== OFFICIAL MCP REGISTRY ==============
-    async def scrape_official_registry(self) -> int:
-        """Scrape from official MCP registry"""
-        print("\n[3/8] Scraping Official MCP Registry...")
-        count = 0
+    async def official_pages(self) -> AsyncIterator[List[Dict]]:
+        """Page through the official MCP registry"""
+        print("\nScraping Official MCP Registry...")
         cursor = None
-        page = 0
         
-        while page < 100:
-            page += 1
+        for _ in range(100):
             url = "https://registry.modelcontextprotocol.io/v0.1/servers"
             if cursor:
                 url += f"?cursor={cursor}"
@@ -298,38 +286,31 @@ class MCPServerScraper:
             if not data or not data.get('servers'):
                 break
             
-            for s in data.get('servers', []):
-                server = MCPServer(
-                    name=s.get('name') or s.get('display_name', 'Unknown'),
-                    slug=s.get('slug', ''),
-                    description=s.get('description', ''),
-                    npm_package=s.get('package', {}).get('name') if s.get('package') else None,
-                    github_url=s.get('repository', {}).get('url') if s.get('repository') else None,
-                    install_command=self.generate_install_command(s),
-                    homepage_url=s.get('homepage'),
-                    category=self.map_category(s.get('categories', [])),
-                    capabilities=s.get('capabilities', []),
-                    source='official',
-                    author=s.get('author')
-                )
-                self.servers.append(server)
-                count += 1
+            yield data['servers']
             
             cursor = data.get('next_cursor')
             if not cursor:
                 break
-                
-            await asyncio.sleep(0.3)
-        
-        self.stats['official'] = count
-        print(f"  ✓ Official Registry: {count} servers")
-        return count
+    
+    def normalize_official(self, s: Dict) -> MCPServer:
+        return MCPServer(
+            name=s.get('name') or s.get('display_name', 'Unknown'),
+            slug=s.get('slug', ''),
+            description=s.get('description', ''),
+            npm_package=s.get('package', {}).get('name') if s.get('package') else None,
+            github_url=s.get('repository', {}).get('url') if s.get('repository') else None,
+            install_command=self.generate_install_command(s),
+            homepage_url=s.get('homepage'),
+            category=self.map_category(s.get('categories', [])),
+            capabilities=s.get('capabilities', []),
+            source='official',
+            author=s.get('author')
+        )
     
     # ============== NPM REGISTRY ==============
-    async def scrape_npm(self) -> int:
-        """Scrape NPM registry for MCP packages"""
-        print("\n[4/8] Scraping NPM Registry...")
-        count = 0
+    async def npm_pages(self) -> AsyncIterator[List[Dict]]:
+        """Search the NPM registry for MCP packages"""
+        print("\nScraping NPM Registry...")
         
         search_terms = [
             'mcp-server',
@@ -340,50 +321,37 @@ class MCPServerScraper:
         
         for term in search_terms:
             url = f"https://registry.npmjs.org/-/v1/search?text={term}&size=250"
+            data = await self.fetch_json(url)
             
-            try:
-                async with self.session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for pkg in data.get('objects', []):
-                            p = pkg.get('package', {})
-                            name = p.get('name', '')
-                            
-                            # Skip if not MCP related
-                            if 'mcp' not in name.lower():
-                                continue
-                            
-                            server = MCPServer(
-                                name=name,
-                                slug=name.replace('@', '').replace('/', '-'),
-                                description=p.get('description', ''),
-                                npm_package=name,
-                                github_url=p.get('links', {}).get('repository'),
-                                install_command=f"npx -y {name}",
-                                homepage_url=p.get('links', {}).get('homepage'),
-                                category='other',
-                                source='npm',
-                                author=p.get('author', {}).get('name') if p.get('author') else p.get('publisher', {}).get('username')
-                            )
-                            self.servers.append(server)
-                            count += 1
-                        
-                        print(f"  Term '{term}': {len(data.get('objects', []))} packages")
-            except Exception as e:
-                print(f"  Error searching NPM for '{term}': {e}")
-            
-            await asyncio.sleep(0.5)
-        
-        self.stats['npm'] = count
-        print(f"  ✓ NPM Registry: {count} packages")
-        return count
+            if data:
+                print(f"  Term '{term}': {len(data.get('objects', []))} packages")
+                yield data.get('objects', [])
+    
+    def normalize_npm(self, pkg: Dict) -> Optional[MCPServer]:
+        p = pkg.get('package', {})
+        name = p.get('name', '')
+        
+        # Skip if not MCP related
+        if 'mcp' not in name.lower():
+            return None
+        
+        return MCPServer(
+            name=name,
+            slug=name.replace('@', '').replace('/', '-'),
+            description=p.get('description', ''),
+            npm_package=name,
+            github_url=p.get('links', {}).get('repository'),
+            install_command=f"npx -y {name}",
+            homepage_url=p.get('links', {}).get('homepage'),
+            category='other',
+            source='npm',
+            author=p.get('author', {}).get('name') if p.get('author') else p.get('publisher', {}).get('username')
+        )
     
     # ============== GITHUB TOPICS ==============
-    async def scrape_github_topics(self) -> int:
-        """Scrape GitHub for MCP-related repositories"""
-        print("\n[5/8] Scraping GitHub topics...")
-        count = 0
+    async def github_pages(self) -> AsyncIterator[List[Dict]]:
+        """Search GitHub for MCP-related repositories"""
+        print("\nScraping GitHub topics...")
         
         # GitHub topic search URLs
         topics = ['mcp-server', 'model-context-protocol', 'mcp', 'modelcontextprotocol']
@@ -397,36 +365,27 @@ class MCPServerScraper:
                 if not data or not data.get('items'):
                     break
                 
-                for repo in data.get('items', []):
-                    name = repo.get('name', '')
-                    full_name = repo.get('full_name', '')
-                    
-                    server = MCPServer(
-                        name=name,
-                        slug=name.lower().replace('_', '-'),
-                        description=repo.get('description', ''),
-                        github_url=repo.get('html_url'),
-                        install_command=f"# Clone from GitHub: git clone {repo.get('clone_url', '')}",
-                        homepage_url=repo.get('homepage'),
-                        category='other',
-                        source='github',
-                        author=repo.get('owner', {}).get('login'),
-                        stars=repo.get('stargazers_count', 0)
-                    )
-                    self.servers.append(server)
-                    count += 1
-                
-                await asyncio.sleep(0.5)
-        
-        self.stats['github'] = count
-        print(f"  ✓ GitHub: {count} repos")
-        return count
+                yield data['items']
+    
+    def normalize_github(self, repo: Dict) -> MCPServer:
+        name = repo.get('name', '')
+        return MCPServer(
+            name=name,
+            slug=name.lower().replace('_', '-'),
+            description=repo.get('description', ''),
+            github_url=repo.get('html_url'),
+            install_command=f"# Clone from GitHub: git clone {repo.get('clone_url', '')}",
+            homepage_url=repo.get('homepage'),
+            category='other',
+            source='github',
+            author=repo.get('owner', {}).get('login'),
+            stars=repo.get('stargazers_count', 0)
+        )
     
     # ============== AWESOME MCP LISTS ==============
-    async def scrape_awesome_lists(self) -> int:
-        """Scrape awesome-mcp lists from GitHub"""
-        print("\n[6/8] Scraping awesome-mcp lists...")
-        count = 0
+    async def awesome_pages(self) -> AsyncIterator[List[tuple]]:
+        """Pull install commands and repo links out of awesome-mcp lists"""
+        print("\nScraping awesome-mcp lists...")
         
         awesome_lists = [
             'https://raw.githubusercontent.com/punkpeye/awesome-mcp-servers/main/README.md',
@@ -436,159 +395,103 @@ class MCPServerScraper:
         
         for url in awesome_lists:
             content = await self.fetch_text(url)
-            if content:
-                # Parse markdown for MCP server links
-                import re
-                
-                # Find all links with MCP server patterns
-                npm_pattern = r'`(npx -y @[\w-]+/[\w-]+)`|`(npx -y [\w-]+)`'
-                npm_matches = re.findall(npm_pattern, content)
-                
-                for match in npm_matches:
-                    cmd = match[0] or match[1]
-                    if cmd:
-                        pkg = cmd.replace('npx -y ', '')
-                        server = MCPServer(
-                            name=pkg.split('/')[-1] if '/' in pkg else pkg,
-                            slug=pkg.replace('@', '').replace('/', '-'),
-                            description=f"MCP server from awesome list",
-                            npm_package=pkg,
-                            install_command=cmd,
-                            category='other',
-                            source='awesome-list'
-                        )
-                        self.servers.append(server)
-                        count += 1
-                
-                # Find GitHub repo links
-                github_pattern = r'github\.com/([\w-]+)/([\w.-]+)'
-                github_matches = re.findall(github_pattern, content)
-                
-                for owner, repo in github_matches:
-                    if 'mcp' in repo.lower() or 'model' in repo.lower():
-                        server = MCPServer(
-                            name=repo,
-                            slug=f"{owner}-{repo}".lower(),
-                            description=f"MCP server from awesome list",
-                            github_url=f"https://github.com/{owner}/{repo}",
-                            category='other',
-                            source='awesome-list',
-                            author=owner
-                        )
-                        self.servers.append(server)
-                        count += 1
-        
-        print(f"  ✓ Awesome lists: ~{count} servers")
-        return count
-    
-    # ============== DEDUPLICATION ==============
-    def deduplicate(self) -> int:
-        """Remove duplicate servers"""
-        print("\n[7/8] Deduplicating servers...")
-        
-        seen = {}
-        unique = []
-        
-        for server in self.servers:
-            # Create unique key based on npm package or github URL
-            key = None
-            if server.npm_package:
-                key = f"npm:{server.npm_package}"
-            elif server.github_url:
-                # Normalize GitHub URL
-                url = server.github_url.lower().replace('https://', '').replace('http://', '')
-                key = f"github:{url}"
-            else:
-                key = f"slug:{server.slug.lower()}"
+            if not content:
+                continue
             
-            if key and key not in seen:
-                seen[key] = server
-                unique.append(server)
-        
-        before = len(self.servers)
-        self.servers = unique
-        after = len(self.servers)
-        
-        print(f"  ✓ Deduplicated: {before} → {after} (removed {before - after})")
-        return after
+            # Find all links with MCP server patterns
+            npm_pattern = r'`(npx -y @[\w-]+/[\w-]+)`|`(npx -y [\w-]+)`'
+            commands = [('npm', match[0] or match[1]) for match in re.findall(npm_pattern, content)]
+            
+            # Find GitHub repo links
+            github_pattern = r'github\.com/([\w-]+)/([\w.-]+)'
+            repos = [('github', owner, repo) for owner, repo in re.findall(github_pattern, content)]
+            
+            yield commands + repos
     
-    # ============== OUTPUT GENERATION ==============
-    def save_outputs(self, output_dir: str = "data"):
-        """Save servers to various output formats"""
-        print("\n[8/8] Saving output files...")
-        
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # 1. JSON Output
-        json_path = os.path.join(output_dir, "mcp_servers.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump([asdict(s) for s in self.servers], f, indent=2, ensure_ascii=False)
-        print(f"  ✓ JSON: {json_path} ({len(self.servers)} servers)")
-        
-        # 2. CSV Output
-        csv_path = os.path.join(output_dir, "mcp_servers.csv")
-        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
-            if self.servers:
-                writer = csv.DictWriter(f, fieldnames=asdict(self.servers[0]).keys())
-                writer.writeheader()
-                for server in self.servers:
-                    writer.writerow(asdict(server))
-        print(f"  ✓ CSV: {csv_path}")
-        
-        # 3. Markdown Summary
+    def normalize_awesome(self, item: tuple) -> Optional[MCPServer]:
+        if item[0] == 'npm':
+            cmd = item[1]
+            if not cmd:
+                return None
+            pkg = cmd.replace('npx -y ', '')
+            return MCPServer(
+                name=pkg.split('/')[-1] if '/' in pkg else pkg,
+                slug=pkg.replace('@', '').replace('/', '-'),
+                description=f"MCP server from awesome list",
+                npm_package=pkg,
+                install_command=cmd,
+                category='other',
+                source='awesome-list'
+            )
+        
+        _, owner, repo = item
+        if 'mcp' not in repo.lower() and 'model' not in repo.lower():
+            return None
+        return MCPServer(
+            name=repo,
+            slug=f"{owner}-{repo}".lower(),
+            description=f"MCP server from awesome list",
+            github_url=f"https://github.com/{owner}/{repo}",
+            category='other',
+            source='awesome-list',
+            author=owner
+        )
+    
+    def sources(self) -> List[Source]:
+        return [
+            Source('glama', partial(self.glama_pages, max_pages=500), self.normalize_glama),
+            Source('smithery', partial(self.smithery_pages, max_pages=50), self.normalize_smithery),
+            Source('official', self.official_pages, self.normalize_official),
+            Source('npm', self.npm_pages, self.normalize_npm),
+            Source('github', self.github_pages, self.normalize_github),
+            Source('awesome', self.awesome_pages, self.normalize_awesome),
+        ]
+    
+    # ============== SUMMARY FILES ==============
+    def save_summary(self, writer: StreamWriter, output_dir: str = "data"):
+        """Write the Markdown and JSON summaries from the writer's running totals"""
         md_path = os.path.join(output_dir, "MCP_SERVERS.md")
         with open(md_path, 'w', encoding='utf-8') as f:
             f.write("# MCP Servers Database\n\n")
-            f.write(f"**Total Servers:** {len(self.servers):,}\n\n")
+            f.write(f"**Total Servers:** {writer.count:,}\n\n")
             f.write(f"**Last Updated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             
             # Stats by source
             f.write("## Sources\n\n")
             for source, count in self.stats.items():
-                if count > 0:
+                if count > 0 and source != 'total':
                     f.write(f"- **{source.capitalize()}:** {count:,} servers\n")
-            f.write(f"- **Total Unique:** {len(self.servers):,} servers\n\n")
+            f.write(f"- **Total Unique:** {writer.count:,} servers\n\n")
             
             # Stats by category
             f.write("## Categories\n\n")
-            categories = {}
-            for s in self.servers:
-                cat = s.category or 'other'
-                categories[cat] = categories.get(cat, 0) + 1
-            
-            for cat, count in sorted(categories.items(), key=lambda x: -x[1]):
+            for cat, count in writer.categories.most_common():
                 f.write(f"- **{cat.capitalize()}:** {count:,} servers\n")
             f.write("\n")
             
             # Top servers by stars
             f.write("## Top 50 Most Popular Servers\n\n")
-            top_servers = sorted(self.servers, key=lambda x: x.stars, reverse=True)[:50]
-            for i, s in enumerate(top_servers, 1):
+            for i, s in enumerate(writer.top(50), 1):
                 f.write(f"{i}. **{s.name}** - {s.description[:100]}{'...' if len(s.description) > 100 else ''}\n")
                 f.write(f"   - ⭐ {s.stars:,} | 📦 {s.npm_package or 'N/A'} | 🔗 [GitHub]({s.github_url})\n\n")
             
-            # All servers table
+            # Most popular servers table
             f.write("## All Servers\n\n")
             f.write("| Name | Category | Install Command | Stars |\n")
             f.write("|------|----------|-----------------|-------|\n")
             
-            for s in sorted(self.servers, key=lambda x: x.stars, reverse=True)[:500]:
+            for s in writer.top(500):
                 name = s.name.replace('|', '\\|')
                 install = s.install_command.replace('|', '\\|')[:50]
                 f.write(f"| {name} | {s.category} | `{install}` | {s.stars:,} |\n")
         
         print(f"  ✓ Markdown: {md_path}")
         
-        # 4. Summary JSON
         summary = {
-            'total_servers': len(self.servers),
+            'total_servers': writer.count,
             'last_updated': datetime.now().isoformat(),
             'sources': self.stats,
-            'categories': dict(sorted(
-                [(s.category, sum(1 for x in self.servers if x.category == s.category)) 
-                 for s in self.servers],
-                key=lambda x: -x[1]
-            ))
+            'categories': dict(writer.categories.most_common())
         }
         
         summary_path = os.path.join(output_dir, "summary.json")
@@ -597,8 +500,9 @@ class MCPServerScraper:
         print(f"  ✓ Summary: {summary_path}")
         
         return {
-            'json': json_path,
-            'csv': csv_path,
+            'jsonl': writer.paths['jsonl'],
+            'json': writer.paths['json'],
+            'csv': writer.paths['csv'],
             'markdown': md_path,
             'summary': summary_path
         }
@@ -613,20 +517,21 @@ async def main():
     
     start_time = time.time()
     
-    async with MCPServerScraper() as scraper:
-        # Scrape all sources
-        await scraper.scrape_glama(max_pages=500)
-        await scraper.scrape_smithery(max_pages=50)
-        await scraper.scrape_official_registry()
-        await scraper.scrape_npm()
-        await scraper.scrape_github_topics()
-        await scraper.scrape_awesome_lists()
-        
-        # Deduplicate
-        scraper.deduplicate()
-        
-        # Save outputs
-        outputs = scraper.save_outputs("data")
+    # Records are deduplicated and written as they arrive, not held until the end;
+    # duplicates resolve in the order of scraper.sources() (glama first)
+    writer = StreamWriter("data", "mcp_servers", MCPServer)
+    pipeline = ScrapePipeline(writer)
+    try:
+        async with MCPServerScraper() as scraper:
+            results = await pipeline.run(scraper.sources())
+    finally:
+        writer.close()
+    
+    print_source_summary(results, time.time() - start_time)
+    for name, result in results.items():
+        scraper.stats[name] = result.count
+    scraper.stats['total'] = writer.count
+    outputs = scraper.save_summary(writer, "data")
     
     elapsed = time.time() - start_time
     
@@ -634,7 +539,8 @@ async def main():
     print("SCRAPING COMPLETE")
     print("=" * 70)
     print(f"Total time: {elapsed:.1f}s")
-    print(f"Total unique servers: {len(scraper.servers):,}")
+    print(f"Total unique servers: {writer.count:,} "
+          f"({pipeline.duplicates:,} duplicates, {sum(pipeline.invalid.values()):,} malformed records skipped)")
     print("\nOutput files:")
     for name, path in outputs.items():
         print(f"  - {name}: {path}")
@@ -16,6 +16,8 @@ import os
 import time
 import sys
 
+from scrape_orchestrator import HostLimits
+
 # DRAMATIC MESSAGES
 START_MESSAGES = [
     "🔥 INITIATING SERVER HARVEST PROTOCOL 🔥",
@@ -65,6 +67,8 @@ class DramaticScraper:
         self.session.headers.update({
             'User-Agent': 'MCP-Discovery-Scraper/3.0 (DRAMATIC EDITION)'
         })
+        # Adaptive per-host pacing instead of fixed sleeps between requests
+        HostLimits().wrap_session(self.session)
         self.stats = {'glama': 0, 'npm': 0, 'awesome': 0, 'official': 0}
         self.start_time = time.time()
         
@@ -189,8 +193,6 @@ class DramaticScraper:
                     print(f"\n\n🎉 GLAMA CONQUERED! {count} servers in {page} pages!")
                     break
                 
-                time.sleep(0.1)
-                
             except Exception as e:
                 print(f"\n💥 GLAMA ERROR: {e}")
                 break
@@ -247,8 +249,6 @@ class DramaticScraper:
                     
             except Exception as e:
                 print(f"❌ Error: {e}")
-            
-            time.sleep(0.3)
         
         print(f"\n🎊 NPM DOMINATED! {count} packages acquired!")
         self.stats['npm'] = count
@@ -379,8 +379,6 @@ class DramaticScraper:
                 cursor = data.get('next_cursor')
                 if not cursor:
                     break
-                    
-                time.sleep(0.2)
                 
             except Exception as e:
                 break
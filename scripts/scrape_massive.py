@@ -14,6 +14,13 @@ from dataclasses import dataclass, asdict
 import os
 import time
 
+from npm_crawler import NpmCrawler
+from scrape_orchestrator import HostLimits, print_source_summary, run_sources_sync
+
+# Record ``source`` tags in main()'s source order. Sources run concurrently,
+# so dedupe ranks records by this instead of arrival order: glama wins.
+SOURCE_PRIORITY = ['glama', 'official', 'npm', 'awesome-list', 'github-topics', 'smithery', 'mcp.so', 'pulsemcp']
+
 @dataclass
 class MCPServer:
     name: str
@@ -31,12 +38,14 @@ class MCPServer:
     downloads: int = 0
 
 class MassiveScraper:
-    def __init__(self):
+    def __init__(self, limits: Optional[HostLimits] = None):
         self.servers: List[MCPServer] = []
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        # Sources run in parallel threads that share this session
+        (limits or HostLimits()).wrap_session(self.session)
         self.stats = {
             'glama': 0, 'smithery': 0, 'official': 0, 'npm': 0, 
             'github_search': 0, 'github_topics': 0, 'awesome': 0, 'pypi': 0,
@@ -109,9 +118,6 @@ class MassiveScraper:
                     print(f"  End of pagination at page {page}")
                     break
                 
-                # Small delay to be nice to API
-                time.sleep(0.1)
-                
             except Exception as e:
                 print(f"  Error at page {page}: {e}")
                 break
@@ -189,7 +195,6 @@ class MassiveScraper:
                 cursor = data.get('next_cursor')
                 if not cursor:
                     break
-                time.sleep(0.2)
                 
             except Exception as e:
                 break
@@ -204,57 +209,26 @@ class MassiveScraper:
         print("\n[3/9] Scraping NPM Registry (deep)...")
         count = 0
         
-        search_terms = [
-            'mcp-server', 'model-context-protocol', '@modelcontextprotocol',
-            'mcp', 'model context protocol', 'anthropic-mcp', 'mcp-anthropic'
-        ]
-        
-        all_packages = set()
-        
-        for term in search_terms:
-            for page in range(0, 5):
-                try:
-                    url = f"https://registry.npmjs.org/-/v1/search?text={term}&size=250&from={page*250}"
-                    response = self.session.get(url, timeout=30)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        for pkg in data.get('objects', []):
-                            p = pkg.get('package', {})
-                            name = p.get('name', '')
-                            
-                            # Filter for MCP-related packages
-                            if 'mcp' not in name.lower():
-                                continue
-                            if name in all_packages:
-                                continue
-                            
-                            all_packages.add(name)
-                            
-                            self.add_server(MCPServer(
-                                name=name,
-                                slug=name.replace('@', '').replace('/', '-'),
-                                description=p.get('description', ''),
-                                npm_package=name,
-                                github_url=p.get('links', {}).get('repository'),
-                                install_command=f"npx -y {name}",
-                                homepage_url=p.get('links', {}).get('homepage'),
-                                source='npm',
-                                author=p.get('author', {}).get('name') if p.get('author') else None
-                            ))
-                            count += 1
-                        
-                        if len(data.get('objects', [])) < 250:
-                            break
-                            
-                except Exception as e:
-                    pass
-                
-                time.sleep(0.3)
+        # All terms and pages in parallel; oversized queries are partitioned
+        crawler = NpmCrawler(self.session)
+        for p in crawler.crawl():
+            name = p['name']
+            self.add_server(MCPServer(
+                name=name,
+                slug=name.replace('@', '').replace('/', '-'),
+                description=p.get('description', ''),
+                npm_package=name,
+                github_url=p.get('links', {}).get('repository'),
+                install_command=f"npx -y {name}",
+                homepage_url=p.get('links', {}).get('homepage'),
+                source='npm',
+                author=p.get('author', {}).get('name') if p.get('author') else None
+            ))
+            count += 1
         
         self.stats['npm'] = count
-        print(f"  ✓ NPM: {count} packages")
+        print(f"  ✓ NPM: {count} packages ({crawler.requests} requests, "
+              f"{len(crawler.partitioned)} queries partitioned, {crawler.errors} failed)")
         return count
     
     # ============== AWESOME LISTS ==============
@@ -375,8 +349,6 @@ class MassiveScraper:
                         
                 except Exception as e:
                     pass
-                
-                time.sleep(0.5)
         
         self.stats['github_topics'] = count
         print(f"  ✓ GitHub topics: {count} repos")
@@ -423,8 +395,6 @@ class MassiveScraper:
                 
                 if len(servers) < 100:
                     break
-                    
-                time.sleep(0.2)
                 
             except Exception as e:
                 break
@@ -501,13 +471,16 @@ class MassiveScraper:
     
     # ============== DEDUPLICATION ==============
     def deduplicate(self):
-        """Remove duplicates"""
+        """Remove duplicates, keeping the copy from the highest-priority source"""
         print("\n[9/9] Deduplicating...")
         
         seen = {}
         unique = []
+        # Stable sort: within a source, records keep the order they were found in
+        rank = {source: i for i, source in enumerate(SOURCE_PRIORITY)}
+        ordered = sorted(self.servers, key=lambda s: rank.get(s.source, len(rank)))
         
-        for server in self.servers:
+        for server in ordered:
             key = None
             
             if server.npm_package and isinstance(server.npm_package, str):
@@ -632,15 +605,18 @@ def main():
     start_time = time.time()
     scraper = MassiveScraper()
     
-    # Scrape all sources
-    scraper.scrape_glama_unlimited()
-    scraper.scrape_official()
-    scraper.scrape_npm_deep()
-    scraper.scrape_awesome_lists()
-    scraper.scrape_github_topics()
-    scraper.scrape_smithery()
-    scraper.scrape_mcp_so()
-    scraper.scrape_pulsemcp()
+    # Scrape all sources concurrently; a failing source doesn't stop the rest
+    results = run_sources_sync({
+        'glama': scraper.scrape_glama_unlimited,
+        'official': scraper.scrape_official,
+        'npm': scraper.scrape_npm_deep,
+        'awesome': scraper.scrape_awesome_lists,
+        'github_topics': scraper.scrape_github_topics,
+        'smithery': scraper.scrape_smithery,
+        'mcp_so': scraper.scrape_mcp_so,
+        'pulsemcp': scraper.scrape_pulsemcp,
+    })
+    print_source_summary(results, time.time() - start_time)
     
     # Deduplicate
     scraper.deduplicate()
@@ -11,7 +11,12 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scrape_orchestrator import HostLimits, print_source_summary, run_sources_sync
+
+# Record ``source`` tags in main()'s source order. Sources run concurrently,
+# so dedupe ranks records by this instead of arrival order: glama wins.
+SOURCE_PRIORITY = ['glama', 'official', 'npm', 'awesome-list', 'smithery']
 
 @dataclass
 class MCPServer:
@@ -36,10 +41,12 @@ class MCPServer:
             self.description = f"MCP server: {self.name}"
 
 class MCPServerScraper:
-    def __init__(self):
+    def __init__(self, limits: Optional[HostLimits] = None):
         self.servers: List[MCPServer] = []
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': 'MCP-Discovery-Scraper/2.0'})
+        # Sources run in parallel threads that share this session
+        (limits or HostLimits()).wrap_session(self.session)
         self.stats = {'glama': 0, 'smithery': 0, 'official': 0, 'npm': 0, 'github': 0, 'awesome': 0}
         
     def map_category(self, categories: Optional[List[str]]) -> str:
@@ -126,8 +133,6 @@ class MCPServerScraper:
                 
                 if not has_next or not cursor:
                     break
-                    
-                time.sleep(0.1)
                 
             except Exception as e:
                 print(f"  Error on page {page}: {e}")
@@ -175,8 +180,6 @@ class MCPServerScraper:
                 cursor = data.get('next_cursor')
                 if not cursor:
                     break
-                    
-                time.sleep(0.2)
                 
             except Exception as e:
                 print(f"  Error: {e}")
@@ -225,8 +228,6 @@ class MCPServerScraper:
                     
             except Exception as e:
                 print(f"  Error for '{term}': {e}")
-            
-            time.sleep(0.3)
         
         self.stats['npm'] = count
         print(f"  ✓ NPM: {count} packages")
@@ -325,8 +326,6 @@ class MCPServerScraper:
                 
                 if len(data['servers']) < 100:
                     break
-                    
-                time.sleep(0.2)
                 
             except Exception as e:
                 break
@@ -336,13 +335,16 @@ class MCPServerScraper:
         return count
     
     def deduplicate(self) -> int:
-        """Remove duplicates"""
+        """Remove duplicates, keeping the copy from the highest-priority source"""
         print("\n[6/6] Deduplicating...")
         
         seen = {}
         unique = []
+        # Stable sort: within a source, records keep the order they were found in
+        rank = {source: i for i, source in enumerate(SOURCE_PRIORITY)}
+        ordered = sorted(self.servers, key=lambda s: rank.get(s.source, len(rank)))
         
-        for server in self.servers:
+        for server in ordered:
             key = None
             if server.npm_package and isinstance(server.npm_package, str):
                 key = f"npm:{server.npm_package.lower()}"
@@ -453,12 +455,15 @@ def main():
     start_time = time.time()
     scraper = MCPServerScraper()
     
-    # Scrape all sources
-    scraper.scrape_glama()
-    scraper.scrape_official_registry()
-    scraper.scrape_npm()
-    scraper.scrape_awesome_lists()
-    scraper.scrape_smithery()
+    # Scrape all sources concurrently; a failing source doesn't stop the rest
+    results = run_sources_sync({
+        'glama': scraper.scrape_glama,
+        'official': scraper.scrape_official_registry,
+        'npm': scraper.scrape_npm,
+        'awesome': scraper.scrape_awesome_lists,
+        'smithery': scraper.scrape_smithery,
+    })
+    print_source_summary(results, time.time() - start_time)
     scraper.deduplicate()
     
     # Save
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Concurrent source orchestration for the scrapers
+
+Runs every source adapter at the same time instead of one phase after
+another, so a crawl takes as long as its slowest source rather than the
+sum of all of them. HTTP requests are capped globally and per host and
+paced by each host's adaptive rate. A source that raises is reported and
+skipped without stopping the others.
+
+Async adapters (coroutine functions) run on the event loop; plain
+functions, such as the requests-based scrapers, each get a worker thread.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from scrape_rate_limit import DEFAULT_RATE, AdaptiveRate
+
+DEFAULT_GLOBAL_LIMIT = 16
+DEFAULT_PER_HOST_LIMIT = 4
+
+# Hosts that throttle anonymous clients hard get fewer parallel requests
+HOST_LIMITS = {
+    'api.github.com': 2,
+    'github.com': 2,
+}
+
+# Starting requests per second; each host's rate then adapts (see scrape_rate_limit)
+HOST_RATES = {
+    'registry.npmjs.org': 5.0,
+    'api.github.com': 0.5,
+    'github.com': 2.0,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def host_of(url: str) -> str:
+    """Return the lower-cased host name of a URL"""
+    return (urlsplit(url).hostname or '').lower()
+
+
+class HostLimits:
+    """Global and per-host caps on in-flight requests
+
+    ``async with limits.slot(url)`` guards aiohttp calls on one event loop;
+    ``with limits.hold(url)`` does the same for requests made from worker
+    threads. ``wrap_session`` applies ``hold`` to every call of a
+    ``requests.Session``. Requests to each host are also paced by an
+    ``AdaptiveRate`` shared by both paths, starting from ``rates`` (or
+    ``DEFAULT_RATE``) and tuned by what callers pass to ``observe``.
+    """
+
+    def __init__(self, global_limit: int = DEFAULT_GLOBAL_LIMIT,
+                 per_host: int = DEFAULT_PER_HOST_LIMIT,
+                 overrides: Optional[Dict[str, int]] = None,
+                 rates: Optional[Dict[str, float]] = None):
+        self.global_limit = global_limit
+        self.per_host = per_host
+        self.overrides = dict(HOST_LIMITS if overrides is None else overrides)
+        self.rates = dict(HOST_RATES if rates is None else rates)
+        self._lock = threading.Lock()
+        self._adaptive: Dict[str, AdaptiveRate] = {}
+        self._async_global: Optional[asyncio.Semaphore] = None
+        self._async_hosts: Dict[str, asyncio.Semaphore] = {}
+        self._thread_global = threading.BoundedSemaphore(global_limit)
+        self._thread_hosts: Dict[str, threading.BoundedSemaphore] = {}
+
+    def limit_for(self, host: str) -> int:
+        return self.overrides.get(host, self.per_host)
+
+    def rate_for(self, host: str) -> AdaptiveRate:
+        with self._lock:
+            if host not in self._adaptive:
+                self._adaptive[host] = AdaptiveRate(self.rates.get(host, DEFAULT_RATE))
+            return self._adaptive[host]
+
+    def observe(self, url: str, status: int, headers):
+        """Feed a response's status and headers back into the host's rate"""
+        self.rate_for(host_of(url)).on_response(status, headers)
+
+    def observe_error(self, url: str):
+        """Feed a timeout or connection error back into the host's rate"""
+        self.rate_for(host_of(url)).on_error()
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Hold a global and a per-host slot for one async request"""
+        host = host_of(url)
+        # Created lazily so they bind to the running loop
+        if self._async_global is None:
+            self._async_global = asyncio.Semaphore(self.global_limit)
+        if host not in self._async_hosts:
+            self._async_hosts[host] = asyncio.Semaphore(self.limit_for(host))
+        async with self._async_hosts[host]:
+            # Wait out the host's pacing before taking a global slot
+            delay = self.rate_for(host).reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            async with self._async_global:
+                yield
+
+    @contextmanager
+    def hold(self, url: str):
+        """Hold a global and a per-host slot for one blocking request"""
+        host = host_of(url)
+        with self._lock:
+            if host not in self._thread_hosts:
+                self._thread_hosts[host] = threading.BoundedSemaphore(self.limit_for(host))
+            per_host = self._thread_hosts[host]
+        with per_host:
+            delay = self.rate_for(host).reserve()
+            if delay:
+                time.sleep(delay)
+            with self._thread_global:
+                yield
+
+    def wrap_session(self, session, retries: int = 3):
+        """Route every request of a ``requests.Session`` through ``hold``
+
+        Responses are passed to ``observe``. 429/5xx responses and connection
+        errors are retried up to ``retries`` attempts in all, each one paced by
+        the lowered rate or the server's Retry-After. A response that is
+        retried is closed first, so its connection goes back to the pool.
+        Other exceptions (a malformed URL, a bug) propagate at once.
+        """
+        import requests
+
+        request = session.request
+        network_errors = (requests.ConnectionError, requests.Timeout)
+
+        def limited(method, url, *args, **kwargs):
+            for attempt in range(retries):
+                try:
+                    with self.hold(url):
+                        response = request(method, url, *args, **kwargs)
+                except network_errors:
+                    self.observe_error(url)
+                    if attempt == retries - 1:
+                        raise
+                    continue
+                self.observe(url, response.status_code, response.headers)
+                if response.status_code not in RETRY_STATUSES or attempt == retries - 1:
+                    return response
+                response.close()
+
+        session.request = limited
+        return session
+
+
+# ============== ORCHESTRATION ==============
+@dataclass
+class SourceResult:
+    name: str
+    count: int = 0
+    seconds: float = 0.0
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def run_sources(sources: Dict[str, Callable[[], Any]]) -> Dict[str, SourceResult]:
+    """Run all source adapters concurrently and collect one result each
+
+    Each adapter returns the number of servers it added. An adapter that
+    raises yields a failed ``SourceResult``; the others keep running.
+    """
+    loop = asyncio.get_running_loop()
+    blocking = [name for name, fn in sources.items() if not asyncio.iscoroutinefunction(fn)]
+    # One thread per blocking source, so none of them waits for a free worker
+    pool = ThreadPoolExecutor(max_workers=len(blocking), thread_name_prefix='source') if blocking else None
+
+    async def run(name: str, fn: Callable[[], Any]) -> SourceResult:
+        start = time.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                count = await fn()
+            else:
+                count = await loop.run_in_executor(pool, fn)
+            return SourceResult(name, count or 0, time.monotonic() - start)
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            print(f"  ✗ {name} failed after {elapsed:.1f}s: {e!r}")
+            return SourceResult(name, 0, elapsed, e)
+
+    try:
+        results = await asyncio.gather(*(run(name, fn) for name, fn in sources.items()))
+    finally:
+        if pool:
+            pool.shutdown(wait=False)
+    return {result.name: result for result in results}
+
+
+def run_sources_sync(sources: Dict[str, Callable[[], Any]]) -> Dict[str, SourceResult]:
+    """``run_sources`` for scripts without an event loop of their own"""
+    return asyncio.run(run_sources(sources))
+
+
+def print_source_summary(results: Dict[str, SourceResult], elapsed: float):
+    """Print per-source counts and timings next to the wall-clock time"""
+    print("\nSources:")
+    for result in sorted(results.values(), key=lambda r: -r.seconds):
+        status = '✓' if result.ok else '✗'
+        print(f"  {status} {result.name:<16} {result.count:>7,} servers  {result.seconds:6.1f}s")
+    sequential = sum(r.seconds for r in results.values())
+    print(f"  Wall clock {elapsed:.1f}s (sources summed: {sequential:.1f}s)")
+    failed = [r.name for r in results.values() if not r.ok]
+    if failed:
+        print(f"  Failed sources: {', '.join(failed)}")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Streaming scrape pipeline
+
+Fetching, normalizing, deduplicating and writing run as concurrent stages
+joined by bounded asyncio queues:
+
+    fetch pages -> normalize into records -> dedupe -> write
+
+When a queue is full, the stage feeding it waits, so fetching never gets
+more than a few pages ahead of the disk. Each accepted record is appended
+to the JSON Lines file as soon as it arrives; if a crawl dies, everything
+accepted so far is already there. Only compact dedupe keys stay in memory,
+however big the catalog is.
+
+Sources run concurrently, but duplicates resolve as if they had run one
+after another in the order given: the record from the earliest source in
+the list wins (glama first in ``scrape_all_mcp_servers.py``). A record
+that loses to a later-arriving duplicate is dropped when the writer
+closes, which rewrites the JSON Lines file and writes the JSON and CSV
+files from it in one streaming pass.
+"""
+
+import asyncio
+import csv
+import hashlib
+import heapq
+import json
+import os
+import textwrap
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from scrape_orchestrator import SourceResult, run_sources
+
+PAGE_QUEUE_SIZE = 8
+RECORD_QUEUE_SIZE = 500
+TOP_N = 500
+
+
+def dedupe_key(server) -> str:
+    """Identity of a server: npm package, else GitHub URL, else slug"""
+    if server.npm_package and isinstance(server.npm_package, str):
+        return f"npm:{server.npm_package.lower()}"
+    if server.github_url and isinstance(server.github_url, str):
+        url = server.github_url.lower().replace('https://', '').replace('http://', '').rstrip('/')
+        return f"github:{url}"
+    return f"slug:{server.slug.lower()}"
+
+
+@dataclass
+class Source:
+    """A source adapter: an async iterator of raw pages and a normalizer
+
+    ``normalize`` turns one raw item into a record, or returns ``None`` to
+    skip it. A source's position in the list given to ``ScrapePipeline.run``
+    is its dedupe priority.
+    """
+    name: str
+    pages: Callable[[], AsyncIterator[List[Any]]]
+    normalize: Callable[[Any], Any]
+
+
+# ============== OUTPUT ==============
+class StreamWriter:
+    """Appends accepted records to JSON Lines; writes JSON and CSV on close
+
+    Keeps running per-source counts of accepted records. ``drop`` marks an
+    earlier record as superseded by a duplicate; ``close`` leaves dropped
+    lines out of every file and counts categories and the ``top_n``
+    records by stars for the closing summary.
+    """
+
+    def __init__(self, output_dir: str, basename: str, record_type, top_n: int = TOP_N):
+        os.makedirs(output_dir, exist_ok=True)
+        self.paths = {
+            'jsonl': os.path.join(output_dir, f"{basename}.jsonl"),
+            'json': os.path.join(output_dir, f"{basename}.json"),
+            'csv': os.path.join(output_dir, f"{basename}.csv"),
+        }
+        self.record_type = record_type
+        self._jsonl = open(self.paths['jsonl'], 'w', encoding='utf-8')
+        self.lines = 0
+        self.count = 0
+        self.sources: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.top_n = top_n
+        self._top: list = []
+        self._dropped = set()
+
+    def write(self, server, source: str) -> int:
+        """Append a record accepted from ``source``; returns its line number"""
+        self._jsonl.write(json.dumps(asdict(server), ensure_ascii=False) + '\n')
+        self.count += 1
+        self.sources[source] += 1
+        self.lines += 1
+        return self.lines - 1
+
+    def drop(self, line: int, source: str):
+        """Leave the record on ``line`` (accepted from ``source``) out of the output"""
+        self._dropped.add(line)
+        self.count -= 1
+        self.sources[source] -= 1
+
+    def top(self, n: Optional[int] = None) -> list:
+        """The highest-starred records, best first; complete after ``close``"""
+        ranked = sorted(self._top, key=lambda e: e[:2], reverse=True)[:n]
+        return [self.record_type(**row) for _, _, row in ranked]
+
+    def flush(self):
+        self._jsonl.flush()
+
+    def close(self):
+        self._jsonl.close()
+        fieldnames = [f.name for f in fields(self.record_type)]
+        compacted = self.paths['jsonl'] + '.tmp'
+        with open(self.paths['jsonl'], encoding='utf-8') as src, \
+                open(compacted, 'w', encoding='utf-8') as jsonl, \
+                open(self.paths['json'], 'w', encoding='utf-8') as out, \
+                open(self.paths['csv'], 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
+            writer.writeheader()
+            out.write('[')
+            written = 0
+            for line, text in enumerate(src):
+                if line in self._dropped:
+                    continue
+                row = json.loads(text)
+                jsonl.write(text)
+                # Same layout as json.dump(records, indent=2)
+                item = textwrap.indent(json.dumps(row, indent=2, ensure_ascii=False), '  ')
+                out.write((',\n' if written else '\n') + item)
+                writer.writerow(row)
+                written += 1
+                self.categories[row.get('category') or 'other'] += 1
+                # Earlier records win ties, as with a stable sort
+                entry = (row.get('stars') or 0, -written, row)
+                if len(self._top) < self.top_n:
+                    heapq.heappush(self._top, entry)
+                else:
+                    heapq.heappushpop(self._top, entry)
+            out.write('\n]\n' if written else ']\n')
+        os.replace(compacted, self.paths['jsonl'])
+
+
+# ============== PIPELINE ==============
+class ScrapePipeline:
+    """Runs sources through normalize, dedupe and write stages
+
+    Among duplicates, the record from the source listed first wins,
+    whichever arrives first.
+    """
+
+    def __init__(self, writer: StreamWriter, key: Callable[[Any], str] = dedupe_key,
+                 page_queue_size: int = PAGE_QUEUE_SIZE,
+                 record_queue_size: int = RECORD_QUEUE_SIZE):
+        self.writer = writer
+        self.key = key
+        self.page_queue_size = page_queue_size
+        self.record_queue_size = record_queue_size
+        self.duplicates = 0
+        # Records each source's normalizer rejected with an exception
+        self.invalid: Counter = Counter()
+        # Key digest -> (source priority, line in the writer's output)
+        self._seen: Dict[bytes, Tuple[int, int]] = {}
+        self._names: List[str] = []
+
+    async def run(self, sources: List[Source]) -> Dict[str, SourceResult]:
+        """Crawl every source concurrently; returns accepted record counts per source"""
+        self._names = [source.name for source in sources]
+        pages: asyncio.Queue = asyncio.Queue(self.page_queue_size)
+        records: asyncio.Queue = asyncio.Queue(self.record_queue_size)
+        stages = [
+            asyncio.create_task(self._normalize(pages, records)),
+            asyncio.create_task(self._accept(records)),
+        ]
+        fetch = asyncio.create_task(run_sources({
+            source.name: self._pump(rank, source, pages) for rank, source in enumerate(sources)
+        }))
+
+        await asyncio.wait([fetch, *stages], return_when=asyncio.FIRST_COMPLETED)
+        if not fetch.done():
+            # A downstream stage died; nothing would drain the queues
+            fetch.cancel()
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(fetch, *stages, return_exceptions=True)
+            for task in stages:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+
+        results = fetch.result()
+        await pages.put(None)
+        await stages[0]
+        await records.put(None)
+        await stages[1]
+        self.writer.flush()
+        for name, result in results.items():
+            result.count = self.writer.sources[name]
+        return results
+
+    def _pump(self, rank: int, source: Source, pages: asyncio.Queue):
+        async def pump():
+            async for page in source.pages():
+                await pages.put((rank, source, page))
+        return pump
+
+    async def _normalize(self, pages: asyncio.Queue, records: asyncio.Queue):
+        while True:
+            item = await pages.get()
+            if item is None:
+                return
+            rank, source, page = item
+            for raw in page:
+                try:
+                    server = source.normalize(raw)
+                except Exception:
+                    self.invalid[source.name] += 1
+                    continue
+                if server is not None:
+                    await records.put((rank, server))
+
+    async def _accept(self, records: asyncio.Queue):
+        while True:
+            item = await records.get()
+            if item is None:
+                return
+            rank, server = item
+            # 8-byte digests keep the seen-map small for very large crawls
+            digest = hashlib.blake2b(self.key(server).encode('utf-8'), digest_size=8).digest()
+            seen = self._seen.get(digest)
+            if seen is None:
+                self._seen[digest] = (rank, self.writer.write(server, self._names[rank]))
+            else:
+                self.duplicates += 1
+                seen_rank, line = seen
+                if rank < seen_rank:
+                    # A higher-priority source supersedes the record already written
+                    self.writer.drop(line, self._names[seen_rank])
+                    self._seen[digest] = (rank, self.writer.write(server, self._names[rank]))
+            if records.empty():
+                self.writer.flush()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-host request rates for the scrapers
+
+Each host gets a send rate that adjusts itself AIMD-style. Every healthy
+response raises the rate by a small constant. A 429, a 5xx or a
+connection error halves it. The server's own signals take precedence:
+
+- ``Retry-After`` holds all requests to the host until it has passed.
+- ``X-RateLimit-Remaining: 0`` holds them until ``X-RateLimit-Reset``.
+- A non-zero remaining budget caps the rate, so the budget lasts until
+  the reset. The cap is lifted once the reset time has passed.
+
+The result is the fastest crawl each host tolerates, not a hand-tuned
+sleep.
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+DEFAULT_RATE = 4.0
+MIN_RATE = 0.2
+MAX_RATE = 50.0
+INCREASE = 0.2
+DECREASE = 0.5
+# Concurrent failures from one overload only halve the rate once
+DECREASE_COOLDOWN = 1.0
+# X-RateLimit-Reset above this is an epoch timestamp, below it a delay
+EPOCH_THRESHOLD = 1e9
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header: delay in seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def reset_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse X-RateLimit-Reset: epoch seconds (GitHub) or seconds from now"""
+    if not value:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    if reset > EPOCH_THRESHOLD:
+        reset -= time.time()
+    return max(0.0, reset)
+
+
+class AdaptiveRate:
+    """AIMD send rate for one host, safe to share across threads and a loop"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, min_rate: float = MIN_RATE,
+                 max_rate: float = MAX_RATE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.ceiling = max_rate
+        self._ceiling_until = 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+        self._blocked_until = 0.0
+        self._decreased_at = float('-inf')
+
+    def reserve(self) -> float:
+        """Reserve the next send time; returns how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._ceiling_until:
+                self.ceiling = self.max_rate  # the budget's window has reset
+            at = max(now, self._next_at, self._blocked_until)
+            self._next_at = at + 1.0 / min(self.rate, self.ceiling)
+        return at - now
+
+    def on_response(self, status: int, headers: Mapping[str, str]):
+        """Adjust the rate from a response's status and rate-limit headers"""
+        with self._lock:
+            now = time.monotonic()
+            if status == 429 or status >= 500:
+                self._decrease(now)
+            elif status < 400:
+                self.rate = min(self.max_rate, self.rate + INCREASE)
+
+            wait = retry_after_seconds(headers.get('Retry-After'))
+            if wait is not None and status >= 400:
+                self._blocked_until = max(self._blocked_until, now + wait)
+
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = reset_seconds(headers.get('X-RateLimit-Reset'))
+            if remaining is None or reset is None:
+                return
+            try:
+                remaining = int(remaining)
+            except ValueError:
+                return
+            if remaining <= 0:
+                self._blocked_until = max(self._blocked_until, now + reset)
+            else:
+                # Spread what is left of the budget over the rest of the window
+                self.ceiling = remaining / max(reset, 1.0)
+                self._ceiling_until = now + reset
+
+    def on_error(self):
+        """A timeout or connection failure counts as overload"""
+        with self._lock:
+            self._decrease(time.monotonic())
+
+    def _decrease(self, now: float):
+        if now - self._decreased_at >= DECREASE_COOLDOWN:
+            self.rate = max(self.min_rate, self.rate * DECREASE)
+            self._decreased_at = now
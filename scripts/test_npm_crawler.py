@@ -0,0 +1,107 @@
+"""Unit tests for the partitioned NPM search crawl."""
+
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from npm_crawler import PAGE_SIZE, NpmCrawler
+
+WINDOW = 500
+
+
+class FakeRegistry:
+    """Fake session serving /-/v1/search pages over a fixed package set.
+
+    Each package has search terms, an unstable flag and keywords; a query is
+    a term followed by ``is:unstable``, ``not:unstable`` or ``keywords:``
+    qualifiers.
+    """
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def _matches(self, package, text):
+        term, *qualifiers = text.split(' ')
+        if term not in package['terms']:
+            return False
+        for qualifier in qualifiers:
+            if qualifier == 'is:unstable' and not package['unstable']:
+                return False
+            if qualifier == 'not:unstable' and package['unstable']:
+                return False
+            if qualifier.startswith('keywords:') and qualifier[9:] not in package['keywords']:
+                return False
+        return True
+
+    def get(self, url, params, timeout):
+        text, size, offset = params['text'], params['size'], params['from']
+        with self._lock:
+            self.queries.append((text, offset))
+        matches = sorted((p for p in self.packages if self._matches(p, text)), key=lambda p: p['name'])
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            'total': len(matches),
+            'objects': [{'package': {'name': p['name']}} for p in matches[offset:offset + size]],
+        }
+        return response
+
+
+def _package(name, terms, unstable=False, keywords=()):
+    return {'name': name, 'terms': set(terms), 'unstable': unstable, 'keywords': set(keywords)}
+
+
+class TestNpmCrawler(unittest.TestCase):
+    """Test paging, partitioning and merging across terms."""
+
+    def setUp(self):
+        # 900 "mcp" matches: 300 unstable, then 600 stable split by keyword
+        packages = [
+            _package(f"mcp-a{i:03d}", ['mcp'] + (['mcp-server'] if i < 10 else []),
+                     unstable=i < 300, keywords=['mcp' if i % 2 else 'claude'])
+            for i in range(900)
+        ]
+        packages += [
+            _package('mcp-server-x', ['mcp-server']),
+            _package('other-tool', ['mcp-server']),  # rejected: no "mcp" in the name
+        ]
+        self.registry = FakeRegistry(packages)
+        self.crawler = NpmCrawler(self.registry, terms=['mcp', 'mcp-server'], workers=4,
+                                  result_window=WINDOW)
+
+    def test_overflowing_query_is_partitioned(self):
+        """Test a query past the window splits by stability, then by keyword."""
+        packages = self.crawler.crawl()
+
+        names = {p['name'] for p in packages}
+        self.assertEqual(len(names), 901)
+        self.assertIn('mcp-server-x', names)
+        self.assertEqual(self.crawler.partitioned, ['mcp', 'mcp not:unstable'])
+        texts = {text for text, _ in self.registry.queries}
+        self.assertIn('mcp is:unstable', texts)
+        self.assertIn('mcp not:unstable keywords:claude', texts)
+        # 300 unstable matches fit the window and are not split further
+        self.assertNotIn('mcp is:unstable keywords:mcp', texts)
+
+    def test_pages_stay_inside_the_window(self):
+        """Test no page is requested past the result window or the match count."""
+        self.crawler.crawl()
+        offsets = [offset for _, offset in self.registry.queries]
+        self.assertLess(max(offsets), WINDOW)
+        self.assertTrue(all(offset % PAGE_SIZE == 0 for offset in offsets))
+        self.assertEqual(self.crawler.requests, len(self.registry.queries))
+        self.assertEqual(self.crawler.errors, 0)
+
+    def test_results_merge_across_terms(self):
+        """Test packages found by several terms are returned once, filtered by name."""
+        packages = self.crawler.crawl()
+        names = [p['name'] for p in packages]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertNotIn('other-tool', names)
+        self.assertIn('mcp-a000', names)  # found by both terms
+
+
+if __name__ == "__main__":
+    unittest.main()
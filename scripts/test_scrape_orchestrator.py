@@ -0,0 +1,74 @@
+"""Unit tests for host limits and the retrying session wrapper."""
+
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from scrape_orchestrator import HostLimits, host_of
+
+URL = "http://scrape.test/page"
+
+
+def _response(status):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = {}
+    return response
+
+
+def _session(*outcomes):
+    """A wrapped mock session returning ``outcomes`` in turn, and its raw request mock"""
+    session = MagicMock()
+    request = session.request
+    request.side_effect = list(outcomes)
+    # Fast pacing, so retries do not slow the tests down
+    return HostLimits(rates={host_of(URL): 1000}).wrap_session(session), request
+
+
+class TestWrapSession(unittest.TestCase):
+    """Test retries, closing and error handling of wrapped sessions."""
+
+    def test_retried_responses_are_closed(self):
+        """Test each 429/5xx response is closed before the retry; the last is returned open."""
+        busy, down, ok = _response(429), _response(503), _response(200)
+        session, request = _session(busy, down, ok)
+
+        self.assertIs(session.request("GET", URL), ok)
+
+        self.assertEqual(request.call_count, 3)
+        busy.close.assert_called_once()
+        down.close.assert_called_once()
+        ok.close.assert_not_called()
+
+    def test_final_failure_is_returned(self):
+        """Test the response of the last attempt is returned even if it failed."""
+        last = _response(503)
+        session, _ = _session(_response(503), _response(503), last)
+        self.assertIs(session.request("GET", URL), last)
+        last.close.assert_not_called()
+
+    def test_network_error_is_retried(self):
+        """Test connection errors and timeouts count as overload and are retried."""
+        ok = _response(200)
+        session, request = _session(requests.ConnectionError("reset"), requests.Timeout("slow"), ok)
+        self.assertIs(session.request("GET", URL), ok)
+        self.assertEqual(request.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        """Test a non-network exception propagates on the first attempt."""
+        limits = HostLimits(rates={host_of(URL): 1000})
+        session = MagicMock()
+        request = session.request
+        request.side_effect = requests.exceptions.MissingSchema("no scheme")
+        limits.wrap_session(session)
+
+        with self.assertRaises(requests.exceptions.MissingSchema):
+            session.request("GET", URL)
+
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(limits.rate_for(host_of(URL)).rate, 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Unit tests for the streaming scrape pipeline."""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+from typing import Optional
+
+from scrape_pipeline import ScrapePipeline, Source, StreamWriter
+
+
+@dataclass
+class Record:
+    name: str
+    slug: str
+    npm_package: Optional[str] = None
+    github_url: Optional[str] = None
+    source: str = ""
+    category: str = "other"
+    stars: int = 0
+
+
+def _source(name, items, delay=0.0):
+    """A source yielding one-item pages; items starting with '!' fail to normalize"""
+    async def pages():
+        for item in items:
+            await asyncio.sleep(delay)
+            yield [item]
+
+    def normalize(item):
+        if item.startswith("!"):
+            raise ValueError(item)
+        return Record(name=item, slug=item, source=name, stars=len(item))
+
+    return Source(name, pages, normalize)
+
+
+class TestSourcePriority(unittest.TestCase):
+    """Test duplicate resolution and per-source counts."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.writer = StreamWriter(self.tmp.name, "out", Record)
+        self.pipeline = ScrapePipeline(self.writer)
+
+    def _read(self, ext):
+        with open(os.path.join(self.tmp.name, f"out.{ext}"), encoding="utf-8") as f:
+            return f.read()
+
+    def test_higher_priority_duplicate_arriving_later_wins(self):
+        """Test the first-listed source's copy is kept even when it arrives last."""
+        sources = [
+            # Listed first, but slower: every key reaches the dedupe stage late
+            _source("glama", ["shared", "glama-only", "!broken"], delay=0.05),
+            _source("npm", ["shared", "npm-only", "!bad", "!worse"]),
+        ]
+        try:
+            results = asyncio.run(self.pipeline.run(sources))
+        finally:
+            self.writer.close()
+
+        rows = [json.loads(line) for line in self._read("jsonl").splitlines()]
+        self.assertEqual(
+            sorted((r["name"], r["source"]) for r in rows),
+            [("glama-only", "glama"), ("npm-only", "npm"), ("shared", "glama")],
+        )
+        self.assertEqual(json.loads(self._read("json")), rows)
+        self.assertEqual(len(self._read("csv").splitlines()), 1 + len(rows))
+
+        self.assertEqual({name: r.count for name, r in results.items()}, {"glama": 2, "npm": 1})
+        self.assertEqual(self.writer.sources, {"glama": 2, "npm": 1})
+        self.assertEqual(self.pipeline.invalid, {"glama": 1, "npm": 2})
+        self.assertEqual(self.pipeline.duplicates, 1)
+        self.assertEqual(self.writer.count, 3)
+        self.assertEqual(self.writer.categories["other"], 3)
+
+    def test_lower_priority_duplicate_is_skipped(self):
+        """Test a later duplicate from a lower-priority source is never written."""
+        sources = [_source("glama", ["shared"]), _source("npm", ["shared"], delay=0.05)]
+        try:
+            results = asyncio.run(self.pipeline.run(sources))
+        finally:
+            self.writer.close()
+
+        rows = [json.loads(line) for line in self._read("jsonl").splitlines()]
+        self.assertEqual([(r["name"], r["source"]) for r in rows], [("shared", "glama")])
+        self.assertEqual(results["npm"].count, 0)
+        self.assertEqual([s.source for s in self.writer.top()], ["glama"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Unit tests for the adaptive per-host scraper rates."""
+
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch
+
+from scrape_rate_limit import (
+    DECREASE_COOLDOWN,
+    AdaptiveRate,
+    reset_seconds,
+    retry_after_seconds,
+)
+
+
+class TestHeaderParsing(unittest.TestCase):
+    """Test Retry-After and X-RateLimit-Reset parsing."""
+
+    def test_retry_after_seconds(self):
+        """Test a delay in seconds is returned as is."""
+        self.assertEqual(retry_after_seconds("5"), 5.0)
+        self.assertIsNone(retry_after_seconds(None))
+        self.assertIsNone(retry_after_seconds("soon"))
+
+    def test_retry_after_http_date(self):
+        """Test an HTTP date becomes the seconds until it."""
+        wait = retry_after_seconds(formatdate(time.time() + 30, usegmt=True))
+        self.assertAlmostEqual(wait, 30, delta=1.5)
+
+    def test_reset_epoch_and_delta(self):
+        """Test X-RateLimit-Reset as an epoch timestamp or as seconds from now."""
+        self.assertAlmostEqual(reset_seconds(str(int(time.time()) + 20)), 20, delta=1.5)
+        self.assertEqual(reset_seconds("20"), 20.0)
+
+
+class TestAdaptiveRate(unittest.TestCase):
+    """Test pacing, backoff and server-imposed holds."""
+
+    def test_retry_after_holds_requests(self):
+        """Test a 429 with Retry-After holds the next send until it passes."""
+        rate = AdaptiveRate(rate=100)
+        rate.on_response(429, {"Retry-After": "2"})
+        self.assertAlmostEqual(rate.reserve(), 2, delta=0.1)
+
+    def test_exhausted_budget_holds_until_epoch_reset(self):
+        """Test X-RateLimit-Remaining: 0 holds until an epoch X-RateLimit-Reset."""
+        rate = AdaptiveRate(rate=100)
+        rate.on_response(200, {
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + 20),
+        })
+        self.assertAlmostEqual(rate.reserve(), 20, delta=1.5)
+
+    def test_exhausted_budget_holds_until_delta_reset(self):
+        """Test X-RateLimit-Remaining: 0 holds for a delta X-RateLimit-Reset."""
+        rate = AdaptiveRate(rate=100)
+        rate.on_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "20"})
+        self.assertAlmostEqual(rate.reserve(), 20, delta=0.1)
+
+    def test_halves_once_per_cooldown(self):
+        """Test concurrent failures from one overload only halve the rate once."""
+        rate = AdaptiveRate(rate=8)
+        now = time.monotonic()
+        with patch("scrape_rate_limit.time.monotonic", return_value=now):
+            rate.on_response(503, {})
+            rate.on_response(429, {})
+            rate.on_error()
+        self.assertEqual(rate.rate, 4)
+        with patch("scrape_rate_limit.time.monotonic", return_value=now + DECREASE_COOLDOWN):
+            rate.on_response(503, {})
+        self.assertEqual(rate.rate, 2)
+
+    def test_budget_ceiling_lifts_after_reset(self):
+        """Test a low remaining budget caps the rate only until its reset time."""
+        rate = AdaptiveRate(rate=10)
+        now = time.monotonic()
+        with patch("scrape_rate_limit.time.monotonic", return_value=now):
+            rate.on_response(200, {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": "100"})
+        self.assertAlmostEqual(rate.ceiling, 0.01)
+        with patch("scrape_rate_limit.time.monotonic", return_value=now + 101):
+            rate.reserve()
+        self.assertEqual(rate.ceiling, rate.max_rate)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,9 @@ import { handleDiscover } from './tools/discover.js';
 import { handleGetMetrics } from './tools/metrics.js';
 import { handleCompare } from './tools/compare.js';
 import { checkRateLimit, logUsage, generateApiKey } from './services/auth.js';
+import { datasetVersion } from './services/search.js';
 import { logger } from './utils/logger.js';
+import { sendJson } from './utils/http.js';
 import { getSupabaseClient } from './db/client.js';
 import { v4 as uuidv4 } from 'uuid';
 
@@ -169,8 +171,9 @@ const server = createServer(async (req: IncomingMessage, res: ServerResponse) =>
 
       await logUsage(rateLimit.apiKeyId, '/api/v1/discover', args.need || '', responseTime);
 
-      res.writeHead(200, { 'Content-Type': 'application/json' });
-      res.end(JSON.stringify(result));
+      // Lets clients drop cached results when the catalog is reloaded.
+      res.setHeader('X-Dataset-Version', datasetVersion());
+      sendJson(req, res, 200, result);
     } catch (error) {
       const message = error instanceof Error ? error.message : String(error);
       res.writeHead(400, { 'Content-Type': 'application/json' });
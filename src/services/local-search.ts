@@ -1,4 +1,5 @@
-import { existsSync, readFileSync } from 'node:fs';
+import { createHash } from 'node:crypto';
+import { existsSync, readFileSync, statSync } from 'node:fs';
 import { dirname, join } from 'node:path';
 import { fileURLToPath } from 'node:url';
 
@@ -76,6 +77,7 @@ function normalizeGithubUrl(
 }
 
 let dataset: LocalServerRecord[] | null = null;
+let datasetVersion: string | null = null;
 
 export function loadLocalDataset(): LocalServerRecord[] {
   if (dataset) return dataset;
@@ -113,13 +115,28 @@ export function loadLocalDataset(): LocalServerRecord[] {
   }
 
   dataset = [...bySlug.values()];
+  const stat = statSync(path);
+  datasetVersion = createHash('sha1')
+    .update(`${path}:${stat.size}:${stat.mtimeMs}`)
+    .digest('hex')
+    .slice(0, 12);
   logger.info(`Local dataset loaded: ${dataset.length} servers from ${path}`);
   return dataset;
 }
 
+/**
+ * Identifies the loaded snapshot (file path, size and mtime), so clients
+ * can drop cached results when the dataset is replaced and reloaded.
+ */
+export function localDatasetVersion(): string {
+  loadLocalDataset();
+  return datasetVersion as string;
+}
+
 /** Test hook: drop the memoized dataset so the next load re-reads disk. */
 export function resetLocalDataset(): void {
   dataset = null;
+  datasetVersion = null;
 }
 
 const STOPWORDS = new Set([
@@ -1,5 +1,10 @@
 import { generateEmbedding } from './embeddings.js';
-import { isLocalMode, localSearch, localTrustScore } from './local-search.js';
+import {
+  isLocalMode,
+  localDatasetVersion,
+  localSearch,
+  localTrustScore,
+} from './local-search.js';
 import { getCachedSearch, setCachedSearch } from './cache.js';
 import {
   searchServersByEmbedding,
@@ -70,6 +75,16 @@ export async function semanticSearch(
   return filtered.slice(0, limit);
 }
 
+/**
+ * Version of the catalog that discover results come from. Local mode derives
+ * it from the snapshot file; hosted deployments set MCP_DISCOVERY_DATASET_VERSION
+ * when they reload the registry.
+ */
+export function datasetVersion(): string {
+  if (isLocalMode()) return localDatasetVersion();
+  return process.env.MCP_DISCOVERY_DATASET_VERSION || 'hosted';
+}
+
 export async function discoverServers(
   input: DiscoverInput
 ): Promise<{
@@ -155,6 +170,7 @@ export async function discoverServers(
         install_command: server.install_command,
         confidence: Math.round(server.similarity * 100) / 100,
         description: server.description,
+        category: server.category,
         capabilities: capabilityNames,
         metrics: {
           avg_latency_ms: metrics?.latency_ms || null,
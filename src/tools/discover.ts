@@ -1,7 +1,7 @@
 import { discoverServers } from '../services/search.js';
 import { validateDiscoverInput } from '../utils/validation.js';
 import { logger } from '../utils/logger.js';
-import type { DiscoverOutput } from '../types/index.js';
+import type { DiscoverOutput, ServerRecommendation } from '../types/index.js';
 
 export const discoverToolDefinition = {
   name: 'discover_mcp_server',
@@ -44,6 +44,12 @@ export const discoverToolDefinition = {
         description:
           'Set to true to bypass the cache and fetch fresh results. Use when you need the latest server list rather than a cached response.',
       },
+      fields: {
+        type: 'array',
+        items: { type: 'string' },
+        description:
+          'Only return these recommendation fields (e.g. ["server", "install_command"]). "server" is always included.',
+      },
     },
     required: ['need'],
   },
@@ -69,6 +75,15 @@ export async function handleDiscover(
       query_time_ms: result.query_time_ms,
     });
 
+    if (validatedInput.fields) {
+      return {
+        ...result,
+        recommendations: projectRecommendations(
+          result.recommendations,
+          validatedInput.fields
+        ),
+      };
+    }
     return result;
   } catch (error) {
     logger.error('Discovery failed', {
@@ -77,3 +92,17 @@ export async function handleDiscover(
     throw error;
   }
 }
+
+/**
+ * Keep only the requested fields of each recommendation (plus `server`, so
+ * results stay identifiable). Cached results are never mutated.
+ */
+export function projectRecommendations(
+  recommendations: ServerRecommendation[],
+  fields: readonly string[]
+): Partial<ServerRecommendation>[] {
+  const keep = new Set<string>(['server', ...fields]);
+  return recommendations.map((rec) =>
+    Object.fromEntries(Object.entries(rec).filter(([key]) => keep.has(key)))
+  );
+}
@@ -54,6 +54,8 @@ export interface DiscoverInput {
   limit?: number;
   /** Skip cache and fetch fresh results from the discovery API */
   force_refresh?: boolean;
+  /** Only return these recommendation fields (`server` is always kept) */
+  fields?: (keyof ServerRecommendation)[];
 }
 
 export interface ServerRecommendation {
@@ -62,6 +64,7 @@ export interface ServerRecommendation {
   install_command: string;
   confidence: number;
   description: string | null;
+  category: string | null;
   capabilities: string[];
   metrics: {
     avg_latency_ms: number | null;
@@ -80,7 +83,8 @@ export interface ServerRecommendation {
 }
 
 export interface DiscoverOutput {
-  recommendations: ServerRecommendation[];
+  /** Full recommendations, or only the requested `fields` of each */
+  recommendations: ServerRecommendation[] | Partial<ServerRecommendation>[];
   total_found: number;
   query_time_ms: number;
 }
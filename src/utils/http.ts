@@ -0,0 +1,59 @@
+import { brotliCompressSync, constants, gzipSync } from 'zlib';
+import type { IncomingMessage, ServerResponse } from 'http';
+
+/** Bodies smaller than this are sent uncompressed; the framing costs more than it saves. */
+const MIN_COMPRESS_BYTES = 1024;
+
+/**
+ * Pick a response encoding from the request's Accept-Encoding header.
+ * Brotli is preferred over gzip; `q=0` entries are treated as refused.
+ */
+export function negotiateEncoding(
+  acceptEncoding: string | undefined
+): 'br' | 'gzip' | null {
+  if (!acceptEncoding) return null;
+  const accepted = new Set<string>();
+  for (const part of acceptEncoding.split(',')) {
+    const [coding, ...params] = part.trim().toLowerCase().split(';');
+    const q = params.find((p) => p.trim().startsWith('q='));
+    if (q && Number(q.trim().slice(2)) === 0) continue;
+    accepted.add(coding.trim());
+  }
+  if (accepted.has('br')) return 'br';
+  if (accepted.has('gzip') || accepted.has('*')) return 'gzip';
+  return null;
+}
+
+/** Send `body` as JSON, compressed when the client accepts br or gzip. */
+export function sendJson(
+  req: IncomingMessage,
+  res: ServerResponse,
+  status: number,
+  body: unknown
+): void {
+  let payload: Buffer = Buffer.from(JSON.stringify(body));
+  const headers: Record<string, string> = {
+    'Content-Type': 'application/json',
+    Vary: 'Accept-Encoding',
+  };
+  const encoding =
+    payload.length >= MIN_COMPRESS_BYTES
+      ? negotiateEncoding(req.headers['accept-encoding'])
+      : null;
+  if (encoding === 'br') {
+    // Quality 5 compresses JSON close to gzip -9 size at a fraction of the CPU.
+    payload = brotliCompressSync(payload, {
+      params: {
+        [constants.BROTLI_PARAM_QUALITY]: 5,
+        [constants.BROTLI_PARAM_MODE]: constants.BROTLI_MODE_TEXT,
+        [constants.BROTLI_PARAM_SIZE_HINT]: payload.length,
+      },
+    });
+  } else if (encoding === 'gzip') {
+    payload = gzipSync(payload, { level: 6 });
+  }
+  if (encoding) headers['Content-Encoding'] = encoding;
+  headers['Content-Length'] = String(payload.length);
+  res.writeHead(status, headers);
+  res.end(payload);
+}
@@ -1,5 +1,21 @@
 import { z } from 'zod';
 
+/** Top-level recommendation fields a discover caller may project onto. */
+export const RECOMMENDATION_FIELDS = [
+  'server',
+  'npm_package',
+  'install_command',
+  'confidence',
+  'description',
+  'category',
+  'capabilities',
+  'metrics',
+  'docs_url',
+  'github_url',
+  'is_verified',
+  'trust_score',
+] as const;
+
 export const DiscoverInputSchema = z.object({
   need: z.string().min(1, 'Need is required'),
   constraints: z
@@ -11,6 +27,7 @@ export const DiscoverInputSchema = z.object({
     .optional(),
   limit: z.number().int().positive().max(20).default(5),
   force_refresh: z.boolean().optional(),
+  fields: z.array(z.enum(RECOMMENDATION_FIELDS)).min(1).optional(),
 });
 
 export const GetMetricsInputSchema = z.object({
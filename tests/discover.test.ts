@@ -28,6 +28,7 @@ describe('discover_mcp_server (local mode, end to end)', () => {
       expect(rec.confidence).toBeLessThanOrEqual(1);
       expect(rec.trust_score).toBeGreaterThanOrEqual(0);
       expect(rec.trust_score).toBeLessThanOrEqual(100);
+      expect(rec).toHaveProperty('category');
     }
   });
 
@@ -49,6 +50,21 @@ describe('discover_mcp_server (local mode, end to end)', () => {
 
     expect(second.recommendations.map((r) => r.server)).not.toContain(topSlug);
   });
+
+  it('projects recommendations onto the requested fields', async () => {
+    const result = (await handleDiscover({
+      need: 'query a postgres database',
+      limit: 3,
+      fields: ['install_command', 'confidence'],
+    })) as DiscoverOutput;
+
+    expect(result.recommendations.length).toBeGreaterThan(0);
+    for (const rec of result.recommendations) {
+      expect(Object.keys(rec).sort()).toEqual(
+        ['confidence', 'install_command', 'server']
+      );
+    }
+  });
 });
 
 describe('hosted-only tools in local mode', () => {
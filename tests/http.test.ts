@@ -0,0 +1,17 @@
+import { describe, expect, it } from 'vitest';
+
+import { negotiateEncoding } from '../src/utils/http.js';
+
+describe('negotiateEncoding', () => {
+  it('prefers brotli, then gzip', () => {
+    expect(negotiateEncoding('gzip, deflate, br')).toBe('br');
+    expect(negotiateEncoding('gzip, deflate')).toBe('gzip');
+    expect(negotiateEncoding('*')).toBe('gzip');
+  });
+
+  it('honors q=0 and missing headers', () => {
+    expect(negotiateEncoding('br;q=0, gzip')).toBe('gzip');
+    expect(negotiateEncoding('identity')).toBeNull();
+    expect(negotiateEncoding(undefined)).toBeNull();
+  });
+});
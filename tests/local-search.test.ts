@@ -3,6 +3,7 @@ import { beforeAll, describe, expect, it } from 'vitest';
 import {
   isLocalMode,
   loadLocalDataset,
+  localDatasetVersion,
   localSearch,
   localTrustScore,
   scoreRecord,
@@ -20,6 +21,14 @@ describe('isLocalMode', () => {
   });
 });
 
+describe('localDatasetVersion', () => {
+  it('is a short stable hash of the loaded snapshot', () => {
+    const version = localDatasetVersion();
+    expect(version).toMatch(/^[0-9a-f]{12}$/);
+    expect(localDatasetVersion()).toBe(version);
+  });
+});
+
 describe('loadLocalDataset', () => {
   it('loads the bundled dataset with thousands of unique servers', () => {
     const records = loadLocalDataset();
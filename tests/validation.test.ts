@@ -23,6 +23,13 @@ describe('validateDiscoverInput', () => {
     expect(result.constraints?.max_latency_ms).toBe(500);
   });
 
+  it('accepts known projection fields only', () => {
+    expect(
+      validateDiscoverInput({ need: 'x', fields: ['server', 'trust_score'] }).fields
+    ).toEqual(['server', 'trust_score']);
+    expect(() => validateDiscoverInput({ need: 'x', fields: ['secret'] })).toThrow();
+  });
+
   it('rejects an empty need and limits over 20', () => {
     expect(() => validateDiscoverInput({ need: '' })).toThrow();
     expect(() => validateDiscoverInput({ need: 'x', limit: 21 })).toThrow();